@@ -18,7 +18,8 @@ from python.helpers import (
     tokens,
     context as context_helper,
     dirty_json,
-    subagents
+    subagents,
+    tool_registry,
 )
 from python.helpers.print_style import PrintStyle
 
@@ -64,7 +65,19 @@ class AgentContext:
         data: dict | None = None,
         output_data: dict | None = None,
         set_current: bool = False,
+        loader: "Callable[[AgentContext], None] | None" = None,
+        log_output: dict | None = None,
     ):
+        # contexts restored from disk can defer loading their agents and log until
+        # first accessed, log_output then stands in for the log in output()
+        self._loader = loader
+        self._load_lock = threading.RLock()
+        self._loading = False
+        self._log_output = log_output or {}
+        self._log: Log.Log | None = None
+        self._agent0: "Agent|None" = None
+        self._streaming_agent: "Agent|None" = None
+
         # initialize context
         self.id = id or AgentContext.generate_id()
         existing = None
@@ -83,10 +96,11 @@ class AgentContext:
         self.config = config
         self.data = data or {}
         self.output_data = output_data or {}
-        self.log = log or Log.Log()
-        self.log.context = self
+        if not loader:
+            self.log = log or Log.Log()
+            self.log.context = self
         self.paused = paused
-        self.streaming_agent = streaming_agent
+        self._streaming_agent = streaming_agent
         self.task: DeferredTask | None = None
         self.created_at = created_at or datetime.now(timezone.utc)
         self.type = type
@@ -95,7 +109,53 @@ class AgentContext:
         self.last_message = last_message or datetime.now(timezone.utc)
 
         # initialize agent at last (context is complete now)
-        self.agent0 = agent0 or Agent(0, self.config, self)
+        if not loader:
+            self.agent0 = agent0 or Agent(0, self.config, self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loader is None
+
+    def _ensure_loaded(self):
+        if self._loader is None:
+            return
+        with self._load_lock:
+            # the loader itself may access the context while building agents
+            if self._loader is None or self._loading:
+                return
+            self._loading = True
+            try:
+                self._loader(self)
+                self._loader = None
+            finally:
+                self._loading = False
+
+    @property
+    def log(self) -> Log.Log:
+        self._ensure_loaded()
+        return self._log  # type: ignore[return-value]
+
+    @log.setter
+    def log(self, log: Log.Log):
+        self._log = log
+
+    @property
+    def agent0(self) -> "Agent":
+        self._ensure_loaded()
+        return self._agent0  # type: ignore[return-value]
+
+    @agent0.setter
+    def agent0(self, agent: "Agent"):
+        self._agent0 = agent
+
+    @property
+    def streaming_agent(self) -> "Agent|None":
+        self._ensure_loaded()
+        return self._streaming_agent
+
+    @streaming_agent.setter
+    def streaming_agent(self, agent: "Agent|None"):
+        self._streaming_agent = agent
 
     @staticmethod
     def get(id: str):
@@ -159,6 +219,8 @@ class AgentContext:
             context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        if context:
+            context.close_background_jobs()
         return context
 
     def get_data(self, key: str, recursive: bool = True):
@@ -187,9 +249,7 @@ class AgentContext:
                 else Localization.get().serialize_datetime(datetime.fromtimestamp(0))
             ),
             "no": self.no,
-            "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
-            "log_length": len(self.log.logs),
+            **self._output_log(),
             "paused": self.paused,
             "last_message": (
                 Localization.get().serialize_datetime(self.last_message)
@@ -201,6 +261,15 @@ class AgentContext:
             **self.output_data,
         }
 
+    def _output_log(self):
+        if not self.loaded:
+            return self._log_output
+        return {
+            "log_guid": self.log.guid,
+            "log_version": self.log.version,
+            "log_length": len(self.log.logs),
+        }
+
     @staticmethod
     def log_to_all(
         type: Log.Type,
@@ -224,8 +293,18 @@ class AgentContext:
         if self.task:
             self.task.kill()
 
+    def close_background_jobs(self):
+        # jobs are not stopped with the task, an unloaded chat has not started any
+        agent = self._agent0
+        while agent:
+            jobs = agent.data.pop(Agent.DATA_NAME_BACKGROUND_JOBS, None)
+            if jobs:
+                jobs.close()
+            agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+
     def reset(self):
         self.kill_process()
+        self.close_background_jobs()
         self.log.reset()
         self.agent0 = Agent(0, self.config, self)
         self.streaming_agent = None
@@ -357,6 +436,7 @@ class Agent:
 
     DATA_NAME_SUPERIOR = "_superior"
     DATA_NAME_SUBORDINATE = "_subordinate"
+    DATA_NAME_BACKGROUND_JOBS = "_cet_jobs"  # background_jobs.BackgroundJobs of code_execution_tool
     DATA_NAME_CTX_WINDOW = "ctx_window"
 
     def __init__(
@@ -959,7 +1039,12 @@ class Agent:
         try:
             if len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
+            # resumable parser, only the new part of the stream is parsed
+            parser = self.loop_data.params_temporary.get("response_stream_parser")
+            if parser is None:
+                parser = DirtyJson()
+                self.loop_data.params_temporary["response_stream_parser"] = parser
+            response = parser.feed_full(stream)
             if isinstance(response, dict):
                 await self.call_extensions(
                     "response_stream",
@@ -981,20 +1066,9 @@ class Agent:
         **kwargs,
     ):
         from python.tools.unknown import Unknown
-        from python.helpers.tool import Tool
-
-        classes = []
-
-        # search for tools in agent's folder hierarchy
-        paths = subagents.get_paths(self, "tools", name + ".py", default_root="python")
-        for path in paths:
-            try:
-                classes = extract_tools.load_classes_from_file(path, Tool)  # type: ignore[arg-type]
-                break
-            except Exception:
-                continue
 
-        tool_class = classes[0] if classes else Unknown
+        # search for tools in agent's folder hierarchy, loaded modules are cached
+        tool_class = tool_registry.get_tool_class(self, name) or Unknown
         return tool_class(
             agent=self,
             name=name,
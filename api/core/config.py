@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     # Agent0 connection (internal Docker network)
     agent0_internal_url: str = "http://agent0:80"
     agent0_api_key: str = ""
+    agent0_max_connections: int = 50
+    agent0_max_keepalive_connections: int = 20
+    agent0_max_in_flight: int = 32    # concurrent short requests to Agent0 (log, inventory, health polls)
+    agent0_max_scan_calls: int = 16   # concurrent /api_message calls, limited separately from the polls
 
     # Database
     database_url: str
@@ -18,6 +22,17 @@ class Settings(BaseSettings):
     json_extract_timeout: int = 180   # JSON extraction can be slower on remote models
     quick_scan_timeout_seconds: int = 180
     stale_scan_timeout_seconds: int = 1800
+
+    # Scan queue
+    scan_workers: int = 2                 # scans run concurrently by this process
+    scan_per_target_limit: int = 1        # scans running at once against one target
+    scan_lease_seconds: int = 60          # lease renewed by heartbeats while a scan runs
+    scan_max_attempts: int = 2            # runs before a scan lost by crashed workers fails
+    scan_queue_poll_seconds: float = 5.0  # idle workers also check for scans queued elsewhere
+
+    # Offline CVE enrichment, findings with a service and version but no CVE are filled from the index
+    cve_index_path: str = "usr/cve/cve.idx"
+    cve_feeds_path: str = "usr/cve/feeds"  # NVD 2.0 JSON feeds, the index is rebuilt when they change
     debug: bool = False
 
     class Config:
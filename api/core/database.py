@@ -1,3 +1,4 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -29,6 +30,59 @@ async def get_db() -> AsyncSession:
         yield session
 
 
+# Columns added after tables were first created, create_all does not alter existing tables
+SCHEMA_UPGRADES = [
+    "ALTER TABLE scan_sessions ADD COLUMN IF NOT EXISTS scan_type VARCHAR(20) NOT NULL DEFAULT 'full'",
+    "ALTER TABLE scan_sessions ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(100)",
+    "ALTER TABLE scan_sessions ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE scan_sessions ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    *(
+        f"ALTER TABLE scan_sessions ADD COLUMN IF NOT EXISTS {column} INTEGER NOT NULL DEFAULT 0"
+        for column in ("finding_count", "critical_count", "high_count", "medium_count", "low_count", "info_count")
+    ),
+    "CREATE INDEX IF NOT EXISTS ix_scan_sessions_created_at_id ON scan_sessions (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_scan_sessions_target_created_at ON scan_sessions (target, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_findings_scan_id_severity ON findings (scan_id, severity)",
+    "ALTER TABLE findings ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64)",
+    "ALTER TABLE findings ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP WITH TIME ZONE",
+    "CREATE UNIQUE INDEX IF NOT EXISTS findings_fingerprint_key ON findings (fingerprint)",
+    # findings outlive the scan that first reported them while later scans link to them
+    "ALTER TABLE findings ALTER COLUMN scan_id DROP NOT NULL",
+    """
+    ALTER TABLE findings DROP CONSTRAINT IF EXISTS findings_scan_id_fkey,
+        ADD CONSTRAINT findings_scan_id_fkey FOREIGN KEY (scan_id)
+        REFERENCES scan_sessions (id) ON DELETE SET NULL NOT VALID
+    """,
+    # links of findings stored before scan_findings existed, only while the table is empty
+    """
+    INSERT INTO scan_findings (scan_id, finding_id)
+    SELECT scan_id, id FROM findings
+    WHERE scan_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM scan_findings)
+    """,
+    # counts of scans completed before the count columns existed, later scans have them set by run_scan
+    """
+    UPDATE scan_sessions AS s SET
+        finding_count = c.total, critical_count = c.critical, high_count = c.high,
+        medium_count = c.medium, low_count = c.low, info_count = c.info
+    FROM (
+        SELECT l.scan_id, count(*) AS total,
+            count(*) FILTER (WHERE f.severity = 'critical') AS critical,
+            count(*) FILTER (WHERE f.severity = 'high') AS high,
+            count(*) FILTER (WHERE f.severity = 'medium') AS medium,
+            count(*) FILTER (WHERE f.severity = 'low') AS low,
+            count(*) FILTER (WHERE f.severity = 'info') AS info
+        FROM scan_findings AS l JOIN findings AS f ON f.id = l.finding_id
+        WHERE l.scan_id IN (SELECT id FROM scan_sessions WHERE finding_count = 0 AND status = 'completed')
+        GROUP BY l.scan_id
+    ) AS c
+    WHERE s.id = c.scan_id
+    """,
+]
+
+
 async def create_tables() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
@@ -4,13 +4,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.core.database import create_tables
-from api.routers import health, scans
+from api.routers import health, scans, stats
+from api.services import scan_queue
+from api.services.agent0_client import close_http_client, open_http_client
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_tables()
+    open_http_client()
+    await scan_queue.start()
     yield
+    await scan_queue.stop()
+    await close_http_client()
 
 
 app = FastAPI(
@@ -28,7 +34,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # scan list pagination, hidden from the UI otherwise
 )
 
 app.include_router(health.router)
 app.include_router(scans.router)
+app.include_router(stats.router)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Table, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,7 +18,12 @@ class ScanSession(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     target: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", index=True)
+    scan_type: Mapped[str] = mapped_column(String(20), nullable=False, default="full")
     context_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # queue lease: worker holding the scan and until when (renewed by heartbeats)
+    lease_owner: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     tools_used: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -26,9 +31,21 @@ class ScanSession(Base):
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    # finding counts written by run_scan, list views and stats do not read findings
+    finding_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    critical_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    high_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    medium_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    low_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    info_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
-    findings: Mapped[list["Finding"]] = relationship(
-        "Finding", back_populates="scan", cascade="all, delete-orphan"
+    # written by finding_store, a finding is shared by every scan of the target that reported it
+    findings: Mapped[list["Finding"]] = relationship("Finding", secondary="scan_findings", viewonly=True)
+
+    __table_args__ = (
+        # keyset pagination of the scan list and per-target history
+        Index("ix_scan_sessions_created_at_id", "created_at", "id"),
+        Index("ix_scan_sessions_target_created_at", "target", "created_at"),
     )
 
 
@@ -36,10 +53,11 @@ class Finding(Base):
     __tablename__ = "findings"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    scan_id: Mapped[uuid.UUID] = mapped_column(
+    # scan that first reported the finding, later scans are linked through scan_findings
+    scan_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("scan_sessions.id", ondelete="CASCADE"),
-        nullable=False,
+        ForeignKey("scan_sessions.id", ondelete="SET NULL"),
+        nullable=True,
         index=True,
     )
     severity: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
@@ -48,6 +66,18 @@ class Finding(Base):
     cve: Mapped[str | None] = mapped_column(String(50), nullable=True)
     cvss: Mapped[float | None] = mapped_column(Float, nullable=True)
     remediation: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # sha256 of target, CVE or normalized title and port, repeated scans update the same row
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True, unique=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    last_seen: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_findings_scan_id_severity", "scan_id", "severity"),)
+
 
-    scan: Mapped["ScanSession"] = relationship("ScanSession", back_populates="findings")
+# findings reported by each scan
+scan_findings = Table(
+    "scan_findings",
+    Base.metadata,
+    Column("scan_id", UUID(as_uuid=True), ForeignKey("scan_sessions.id", ondelete="CASCADE"), primary_key=True),
+    Column("finding_id", UUID(as_uuid=True), ForeignKey("findings.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
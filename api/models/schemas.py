@@ -28,7 +28,8 @@ class FindingOut(BaseModel):
     cve: str | None
     cvss: float | None
     remediation: str | None
-    created_at: datetime
+    created_at: datetime  # first found
+    last_seen: datetime | None = None
 
     model_config = {"from_attributes": True}
 
@@ -56,11 +57,39 @@ class ScanSummaryOut(BaseModel):
     completed_at: datetime | None
     summary: str | None
     finding_count: int = 0
+    severity_counts: dict[str, int] = {}
     created_at: datetime
 
     model_config = {"from_attributes": True}
 
 
+class SeverityStatsOut(BaseModel):
+    """Findings of the completed scans of one target in one period."""
+    target: str
+    period: datetime  # start of the day, week or month
+    scans: int
+    findings: int
+    severity_counts: dict[str, int]
+
+
+class StatsOut(BaseModel):
+    since: datetime
+    bucket: str
+    series: list[SeverityStatsOut]
+
+
+class QueueMetricsOut(BaseModel):
+    pending: int
+    leased: int
+    running: int
+    oldest_pending_seconds: float | None
+    started_last_hour: int
+    avg_wait_seconds: float | None
+    max_wait_seconds: float | None
+    workers: int  # in this API process
+    busy_workers: int
+
+
 class HealthOut(BaseModel):
     status: str
     agent0: str
@@ -1,16 +1,15 @@
-import asyncio
 import json
 import logging
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.core.database import AsyncSessionLocal, get_db
+from api.core.database import get_db
 from api.core.security import verify_api_key
-from api.models.schemas import ScanOut, ScanRequest, ScanStarted, ScanSummaryOut
-from api.services import scan_service
+from api.models.schemas import QueueMetricsOut, ScanOut, ScanRequest, ScanStarted, ScanSummaryOut
+from api.services import scan_events, scan_queue, scan_service
 from api.services.agent0_client import Agent0Client, get_agent0_client
 from python.helpers.target_policy import is_authorized_target
 
@@ -27,7 +26,7 @@ async def start_scan(
     agent0: Agent0Client = Depends(get_agent0_client),
     _: str = Depends(verify_api_key),
 ) -> ScanStarted:
-    """Accepts a scan request and returns immediately. Poll /stream for live output."""
+    """Queues a scan request and returns immediately. Poll /stream for live output."""
     allowed, reason = is_authorized_target(request.target)
     if not allowed:
         raise HTTPException(status_code=400, detail=reason)
@@ -35,8 +34,8 @@ async def start_scan(
     await scan_service.fail_stale_running_scans(db)
     scan = await scan_service.create_pending_scan(db, request.target, request.scan_type)
 
-    # Run in background — uses its own DB session
-    asyncio.create_task(_run_scan_task(scan.id, request.target, request.scan_type))
+    # Queued in the ScanSession table, a worker of the scan queue runs it
+    scan_queue.wake()
 
     return ScanStarted(
         scan_id=scan.id,
@@ -45,17 +44,20 @@ async def start_scan(
     )
 
 
-async def _run_scan_task(scan_id: uuid.UUID, target: str, scan_type: str) -> None:
-    """Background task wrapper — creates its own DB session."""
-    async with AsyncSessionLocal() as db:
-        agent0 = Agent0Client()
-        try:
-            healthy = await agent0.check_health()
-            if not healthy:
-                logger.error("Agent0 unreachable before scan %s", scan_id)
-            await scan_service.run_scan(db, agent0, scan_id, target, scan_type)
-        except Exception:
-            logger.exception("Background scan task failed for %s", scan_id)
+# ─── Queue metrics ───────────────────────────────────────────────────────────
+
+@router.get("/queue", response_model=QueueMetricsOut)
+async def queue_metrics(
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(verify_api_key),
+) -> QueueMetricsOut:
+    metrics = await scan_queue.queue_metrics(db)
+    pool = scan_queue.pool
+    return QueueMetricsOut(
+        **metrics,
+        workers=pool.size if pool else 0,
+        busy_workers=pool.busy if pool else 0,
+    )
 
 
 # ─── SSE live stream ─────────────────────────────────────────────────────────
@@ -63,58 +65,14 @@ async def _run_scan_task(scan_id: uuid.UUID, target: str, scan_type: str) -> Non
 @router.get("/{scan_id}/stream")
 async def stream_scan(
     scan_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
-    agent0: Agent0Client = Depends(get_agent0_client),
     _: str = Depends(verify_api_key),
 ) -> StreamingResponse:
     """Server-Sent Events stream of live Agent0 output for this scan."""
 
     async def event_generator():
-        seen = 0
-        while True:
-            scan = await scan_service.get_scan(db, scan_id)
-            if not scan:
-                yield _sse("error", "Scan not found")
-                break
-
-            # Stream new log lines if we have a context_id
-            if scan.context_id:
-                log_data = await agent0.get_log(scan.context_id, start=seen)
-                items = log_data.get("items", [])
-                for item in items:
-                    line = item.get("content") or item.get("text") or ""
-                    if line:
-                        yield _sse("log", line)
-                seen += len(items)
-
-            if scan.status == "completed":
-                # Send structured findings as the final event
-                findings_payload = [
-                    {
-                        "id": str(f.id),
-                        "severity": f.severity,
-                        "title": f.title,
-                        "tool": f.tool,
-                        "cve": f.cve,
-                        "cvss": f.cvss,
-                        "remediation": f.remediation,
-                    }
-                    for f in (scan.findings or [])
-                ]
-                yield _sse("complete", json.dumps({
-                    "scan_id": str(scan.id),
-                    "target": scan.target,
-                    "summary": scan.summary,
-                    "findings": findings_payload,
-                }))
-                break
-
-            if scan.status == "failed":
-                yield _sse("error", scan.error or "Scan failed")
-                break
-
-            # Still running — keep polling
-            await asyncio.sleep(1)
+        # one tailing task per scan feeds all connected streams
+        async for event, data in scan_events.subscribe(scan_id):
+            yield _sse(event, data)
 
     return StreamingResponse(
         event_generator(),
@@ -135,12 +93,21 @@ def _sse(event: str, data: str) -> str:
 
 @router.get("", response_model=list[ScanSummaryOut])
 async def list_scans(
+    response: Response,
     offset: int = 0,
     limit: int = 20,
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     _: str = Depends(verify_api_key),
 ) -> list[ScanSummaryOut]:
-    scans = await scan_service.list_scans(db, offset=offset, limit=min(limit, 100))
+    """Newest first. Pass the X-Next-Cursor header of a page as cursor to get the next one."""
+    limit = min(limit, 100)
+    try:
+        scans = await scan_service.list_scans(db, offset=offset, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(scans) == limit:
+        response.headers["X-Next-Cursor"] = scan_service.encode_cursor(scans[-1])
     return [_to_summary(s) for s in scans]
 
 
@@ -192,6 +159,7 @@ def _to_scan_out(scan) -> ScanOut:
             "cvss": f.cvss,
             "remediation": f.remediation,
             "created_at": f.created_at,
+            "last_seen": f.last_seen,
         } for f in (scan.findings or [])],
         created_at=scan.created_at,
     )
@@ -205,6 +173,7 @@ def _to_summary(scan) -> ScanSummaryOut:
         started_at=scan.started_at,
         completed_at=scan.completed_at,
         summary=scan.summary,
-        finding_count=len(scan.findings) if scan.findings else 0,
+        finding_count=scan.finding_count or 0,
+        severity_counts=scan_service.severity_counts(scan),
         created_at=scan.created_at,
     )
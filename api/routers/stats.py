@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.database import get_db
+from api.core.security import verify_api_key
+from api.models.schemas import StatsOut
+from api.services import scan_service
+
+router = APIRouter(prefix="/api/v1/stats", tags=["stats"])
+
+
+@router.get("", response_model=StatsOut)
+async def severity_stats(
+    target: str | None = None,
+    days: int = Query(default=30, ge=1, le=366),
+    bucket: str = Query(default="day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_db),
+    _: str = Depends(verify_api_key),
+) -> StatsOut:
+    """Severity histograms per target and period, from the finding counts of completed scans."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    series = await scan_service.scan_stats(db, since=since, bucket=bucket, target=target)
+    return StatsOut(since=since, bucket=bucket, series=series)
@@ -1,8 +1,8 @@
 import asyncio
 import json
 import logging
+import random
 import re
-import time
 import uuid
 from typing import AsyncIterator
 
@@ -17,6 +17,9 @@ _JSON_BLOCK_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
 _RAW_JSON_RE = re.compile(r"(\{[^{}]*\"findings\"\s*:\s*\[.*?\].*?\})", re.DOTALL)
 _ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
 
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 8.0
+
 
 class Agent0Client:
     """Async HTTP client for Agent0's REST API."""
@@ -35,70 +38,78 @@ class Agent0Client:
         if context_id:
             payload["context_id"] = context_id
 
-        def _send() -> dict:
-            max_attempts = 3
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    with httpx.Client(timeout=timeout) as client:
-                        response = client.post(
-                            f"{self._base}/api_message",
-                            json=payload,
-                            headers={**self._headers, "Connection": "close"},
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        if "response" in data and "message" not in data:
-                            data["message"] = data["response"]
-                        return data
-                except httpx.HTTPError as exc:
-                    transient = exc.__class__.__name__ in {
-                        "RemoteProtocolError",
-                        "ConnectError",
-                        "ReadTimeout",
-                    }
-                    if not transient:
-                        cause = getattr(exc, "__cause__", None)
-                        logger.error(
-                            "Agent0 /api_message request failed: %s",
-                            exc,
-                            exc_info=True,
-                        )
-                        print(
-                            f"Agent0 /api_message request failed: {exc!r}; cause={cause!r}"
-                        )
-                        raise
-
-                    if attempt >= max_attempts:
-                        cause = getattr(exc, "__cause__", None)
-                        logger.error(
-                            "Agent0 /api_message request failed after retries: %s",
-                            exc,
-                            exc_info=True,
-                        )
-                        print(
-                            f"Agent0 /api_message request failed: {exc!r}; cause={cause!r}"
-                        )
-                        raise
-                    time.sleep(1.0 * attempt)
-
-            raise RuntimeError("Agent0 request retry loop exited unexpectedly")
-
-        return await asyncio.to_thread(_send)
+        max_attempts = 3
+        for attempt in range(1, max_attempts + 1):
+            try:
+                # a scan holds its call for minutes, it must not take the slots of the polls
+                async with _scan_calls():
+                    response = await get_http_client().post(
+                        f"{self._base}/api_message",
+                        json=payload,
+                        headers=self._headers,
+                        timeout=timeout,
+                    )
+                response.raise_for_status()
+                data = response.json()
+                if "response" in data and "message" not in data:
+                    data["message"] = data["response"]
+                return data
+            except httpx.HTTPError as exc:
+                transient = exc.__class__.__name__ in {
+                    "RemoteProtocolError",
+                    "ConnectError",
+                    "ReadTimeout",
+                    "PoolTimeout",
+                }
+                if not transient:
+                    logger.error(
+                        "Agent0 /api_message request failed: %r; cause=%r",
+                        exc,
+                        exc.__cause__,
+                        exc_info=True,
+                    )
+                    raise
+
+                if attempt >= max_attempts:
+                    logger.error(
+                        "Agent0 /api_message request failed after retries: %r; cause=%r",
+                        exc,
+                        exc.__cause__,
+                        exc_info=True,
+                    )
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+
+        raise RuntimeError("Agent0 request retry loop exited unexpectedly")
 
     async def get_log(self, context_id: str, start: int = 0) -> dict:
         """Fetch log items from Agent0 for a given context_id starting at offset."""
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(
+            async with _in_flight():
+                response = await get_http_client().get(
                     f"{self._base}/api_log_get",
                     params={"context_id": context_id, "start": start},
                     headers=self._headers,
                 )
-                response.raise_for_status()
-                return response.json()
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError:
             return {"items": []}
 
+    async def get_inventory(self, context_id: str) -> list[dict]:
+        """Hosts, ports and services found by the nmap_scan tool in a context."""
+        try:
+            async with _in_flight():
+                response = await get_http_client().get(
+                    f"{self._base}/api_scan_inventory",
+                    params={"context_id": context_id},
+                    headers=self._headers,
+                )
+            response.raise_for_status()
+            return response.json().get("hosts", [])
+        except httpx.HTTPError:
+            return []
+
     async def stream_log(
         self, context_id: str, poll_interval: float = 1.0
     ) -> AsyncIterator[str]:
@@ -176,12 +187,68 @@ class Agent0Client:
 
     async def check_health(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.get(f"{self._base}/", headers=self._headers)
-                return r.status_code < 500
+            async with _in_flight():
+                r = await get_http_client().get(
+                    f"{self._base}/", headers=self._headers, timeout=5
+                )
+            return r.status_code < 500
         except httpx.HTTPError:
             return False
 
 
+_http_client: httpx.AsyncClient | None = None
+_in_flight_limit: asyncio.Semaphore | None = None
+_scan_calls_limit: asyncio.Semaphore | None = None
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """Creates the shared client, called from the API lifespan."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(
+                max_connections=settings.agent0_max_connections,
+                max_keepalive_connections=settings.agent0_max_keepalive_connections,
+                keepalive_expiry=30,
+            ),
+        )
+    return _http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for all Agent0 requests.
+    Created on first use when running outside the API lifespan (scripts, tests)."""
+    return open_http_client()
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _in_flight() -> asyncio.Semaphore:
+    """Bounds concurrent short requests to Agent0: log, inventory and health polls."""
+    global _in_flight_limit
+    if _in_flight_limit is None:
+        _in_flight_limit = asyncio.Semaphore(settings.agent0_max_in_flight)
+    return _in_flight_limit
+
+
+def _scan_calls() -> asyncio.Semaphore:
+    """Bounds concurrent /api_message calls, which last as long as the agent works on them."""
+    global _scan_calls_limit
+    if _scan_calls_limit is None:
+        _scan_calls_limit = asyncio.Semaphore(settings.agent0_max_scan_calls)
+    return _scan_calls_limit
+
+
+def _backoff(attempt: int) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
 def get_agent0_client() -> Agent0Client:
     return Agent0Client()
@@ -0,0 +1,147 @@
+import hashlib
+import re
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.db import Finding, scan_findings
+
+SEVERITY_RANK = {"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}
+SEVERITY_ALIASES = {"crit": "critical", "moderate": "medium", "informational": "info", "information": "info", "none": "info"}
+TITLE_MAX_LEN = 500
+TOOL_MAX_LEN = 100
+INSERT_BATCH = 1000  # rows per statement, far below the bind parameter limit
+
+_CVE = re.compile(r"CVE-\d{4}-\d{4,}", re.IGNORECASE)
+_PORT = re.compile(r":(\d{1,5})/(?:tcp|udp)\b|\bport (\d{1,5})\b", re.IGNORECASE)
+_TITLE_NOISE = re.compile(r"[^a-z0-9]+")
+# "on 10.0.0.5:2222/tcp", "at port 22", the host and port are fingerprinted separately
+_ENDPOINT = re.compile(
+    r"(?:\b(?:on|at)\s+)?(?:\[[0-9a-f:]+\]|[\w.-]+)?:\d{1,5}/(?:tcp|udp)\b|(?:\b(?:on|at)\s+)?\bport \d{1,5}\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_findings(findings_data: list, target: str) -> list[dict]:
+    """
+    Validated finding rows for one scan, one per fingerprint.
+    Columns are normalized in one pass each, duplicates keep the most severe row and list every tool.
+    """
+    items = [f for f in findings_data if isinstance(f, dict)]
+    titles = [str(f.get("title") or "Unknown finding")[:TITLE_MAX_LEN] for f in items]
+    cvss = [_cvss(f.get("cvss")) for f in items]
+    severities = [_severity(f.get("severity"), score) for f, score in zip(items, cvss)]
+    cves = [_cve(f.get("cve")) for f in items]
+    ports = [_port(f.get("port"), title) for f, title in zip(items, titles)]
+    host = target.strip().lower()
+
+    rows: dict[str, dict] = {}
+    for f, title, score, severity, cve, port in zip(items, titles, cvss, severities, cves, ports):
+        key = fingerprint(host, cve or normalize_title(strip_endpoint(title, host)), port)
+        tool = str(f["tool"])[:TOOL_MAX_LEN] if f.get("tool") else None
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                "fingerprint": key,
+                "severity": severity,
+                "title": title,
+                "tool": tool,
+                "cve": cve,
+                "cvss": score,
+                "remediation": f.get("remediation") or None,
+            }
+            continue
+        if tool and tool not in (row["tool"] or "").split(", "):
+            row["tool"] = (f"{row['tool']}, {tool}" if row["tool"] else tool)[:TOOL_MAX_LEN]
+        if (SEVERITY_RANK[severity], score or 0) > (SEVERITY_RANK[row["severity"]], row["cvss"] or 0):
+            row.update(severity=severity, title=title, cvss=score, remediation=f.get("remediation") or row["remediation"])
+    return list(rows.values())
+
+
+def fingerprint(target: str, subject: str, port: int | None) -> str:
+    return hashlib.sha256(f"{target}|{subject}|{port or ''}".encode()).hexdigest()
+
+
+def normalize_title(title: str) -> str:
+    return _TITLE_NOISE.sub(" ", title.lower()).strip()
+
+
+def strip_endpoint(title: str, host: str) -> str:
+    """Title without the host and port it names, so it matches the same finding reported without them."""
+    title = _ENDPOINT.sub(" ", title)
+    if host:
+        title = re.sub(rf"(?:\b(?:on|at)\s+)?(?<![\w.-]){re.escape(host)}(?![\w.-])", " ", title, flags=re.IGNORECASE)
+    return title
+
+
+async def store_findings(db: AsyncSession, scan_id: uuid.UUID, rows: list[dict]) -> None:
+    """
+    Insert rows from normalize_findings for one scan, INSERT ... ON CONFLICT on the fingerprint.
+    A finding seen before (an earlier scan of the same target) is updated in place, keeping created_at
+    of its first sighting, and every scan that reported it is linked in scan_findings.
+    Runs in the caller's transaction.
+    """
+    if not rows:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(rows), INSERT_BATCH):
+        values = [
+            {**row, "id": uuid.uuid4(), "scan_id": scan_id, "created_at": now, "last_seen": now}
+            for row in rows[start:start + INSERT_BATCH]
+        ]
+        statement = insert(Finding).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Finding.fingerprint],
+            set_={
+                column: statement.excluded[column]
+                for column in ("severity", "title", "tool", "cve", "cvss", "remediation", "last_seen")
+            },
+        ).returning(Finding.id)
+        finding_ids = (await db.execute(statement)).scalars().all()
+        await db.execute(
+            insert(scan_findings)
+            .values([{"scan_id": scan_id, "finding_id": finding_id} for finding_id in finding_ids])
+            .on_conflict_do_nothing()
+        )
+
+
+def _severity(value, cvss: float | None) -> str:
+    severity = str(value or "").strip().lower()
+    severity = SEVERITY_ALIASES.get(severity, severity)
+    if severity in SEVERITY_RANK:
+        return severity
+    if cvss is None:
+        return "info"
+    # CVSS v3 qualitative ratings
+    if cvss >= 9.0:
+        return "critical"
+    if cvss >= 7.0:
+        return "high"
+    if cvss >= 4.0:
+        return "medium"
+    return "low" if cvss > 0 else "info"
+
+
+def _cvss(value) -> float | None:
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if 0 <= score <= 10 else None
+
+
+def _cve(value) -> str | None:
+    match = _CVE.search(str(value)) if value else None
+    return match.group(0).upper() if match else None
+
+
+def _port(value, title: str) -> int | None:
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        match = _PORT.search(title)
+        port = int(match.group(1) or match.group(2)) if match else 0
+    return port if 0 < port < 65536 else None
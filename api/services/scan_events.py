@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import AsyncIterator
+
+from api.core.database import AsyncSessionLocal
+from api.services.agent0_client import Agent0Client
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed"}
+LOG_POLL_INTERVAL = 1.0
+# status is re-read on notify(); this is only a fallback for scans run by another process
+STATUS_RECHECK_INTERVAL = 15.0
+MAX_BUFFERED_EVENTS = 5000
+
+
+class ScanChannel:
+    """Events of one scan, produced by a single tailing task and read by any
+    number of subscribers. Late subscribers get the buffered events first."""
+
+    def __init__(self, scan_id: uuid.UUID) -> None:
+        self.scan_id = scan_id
+        self.events: list[tuple[str, str]] = []
+        self.dropped = 0  # events removed from the front of the buffer
+        self.closed = False
+        self.subscribers = 0
+        self.transition = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: str, data: str) -> None:
+        async with self._changed:
+            self.events.append((event, data))
+            if len(self.events) > MAX_BUFFERED_EVENTS:
+                drop = len(self.events) - MAX_BUFFERED_EVENTS
+                del self.events[:drop]
+                self.dropped += drop
+            self._changed.notify_all()
+
+    async def close(self) -> None:
+        async with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    async def read(self) -> AsyncIterator[tuple[str, str]]:
+        position = self.dropped
+        while True:
+            async with self._changed:
+                while position >= self.dropped + len(self.events) and not self.closed:
+                    await self._changed.wait()
+                batch = self.events[max(position - self.dropped, 0):]
+                position = self.dropped + len(self.events)
+                closed = self.closed
+            for item in batch:
+                yield item
+            if closed:
+                return
+
+
+_channels: dict[uuid.UUID, ScanChannel] = {}
+
+
+async def subscribe(scan_id: uuid.UUID) -> AsyncIterator[tuple[str, str]]:
+    """Yields (event, data) for a scan: log lines, then complete or error."""
+    channel = _channels.get(scan_id)
+    if channel is None:
+        channel = _channels[scan_id] = ScanChannel(scan_id)
+        channel.task = asyncio.create_task(_tail(channel))
+
+    channel.subscribers += 1
+    try:
+        async for item in channel.read():
+            yield item
+    finally:
+        channel.subscribers -= 1
+        if channel.subscribers == 0 and not channel.closed:
+            # nobody is listening anymore, stop tailing
+            if channel.task:
+                channel.task.cancel()
+            _remove(channel)
+
+
+def notify(scan_id: uuid.UUID) -> None:
+    """Signals a status transition so the scan's stream re-reads its status row."""
+    channel = _channels.get(scan_id)
+    if channel:
+        channel.transition.set()
+
+
+def _remove(channel: ScanChannel) -> None:
+    if _channels.get(channel.scan_id) is channel:
+        del _channels[channel.scan_id]
+
+
+async def _tail(channel: ScanChannel) -> None:
+    agent0 = Agent0Client()
+    loop = asyncio.get_running_loop()
+    seen = 0
+    try:
+        while True:
+            channel.transition.clear()
+            state = await _load_state(channel.scan_id)
+            if state is None:
+                await channel.publish("error", "Scan not found")
+                return
+            status, context_id, error = state
+
+            # tail logs until the status changes
+            recheck_at = loop.time() + STATUS_RECHECK_INTERVAL
+            while True:
+                if context_id:
+                    seen = await _publish_logs(channel, agent0, context_id, seen)
+                if status in TERMINAL_STATUSES:
+                    break
+                remaining = recheck_at - loop.time()
+                if channel.transition.is_set() or remaining <= 0:
+                    break
+                timeout = min(LOG_POLL_INTERVAL, remaining) if context_id else remaining
+                try:
+                    await asyncio.wait_for(channel.transition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            if status == "completed":
+                await channel.publish("complete", await _complete_payload(channel.scan_id))
+                return
+            if status == "failed":
+                await channel.publish("error", error or "Scan failed")
+                return
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Scan event stream failed for %s", channel.scan_id)
+        await channel.publish("error", "Scan stream failed")
+    finally:
+        _remove(channel)
+        await channel.close()
+
+
+async def _publish_logs(
+    channel: ScanChannel, agent0: Agent0Client, context_id: str, seen: int
+) -> int:
+    log_data = await agent0.get_log(context_id, start=seen)
+    items = log_data.get("items", [])
+    for item in items:
+        line = item.get("content") or item.get("text") or ""
+        if line:
+            await channel.publish("log", line)
+    return seen + len(items)
+
+
+async def _load_state(scan_id: uuid.UUID) -> tuple[str, str | None, str | None] | None:
+    from api.services import scan_service
+
+    async with AsyncSessionLocal() as db:
+        return await scan_service.get_scan_state(db, scan_id)
+
+
+async def _complete_payload(scan_id: uuid.UUID) -> str:
+    from api.services import scan_service
+
+    async with AsyncSessionLocal() as db:
+        scan = await scan_service.get_scan(db, scan_id)
+    if not scan:
+        return json.dumps({"scan_id": str(scan_id), "findings": []})
+
+    # Send structured findings as the final event
+    findings_payload = [
+        {
+            "id": str(f.id),
+            "severity": f.severity,
+            "title": f.title,
+            "tool": f.tool,
+            "cve": f.cve,
+            "cvss": f.cvss,
+            "remediation": f.remediation,
+        }
+        for f in (scan.findings or [])
+    ]
+    return json.dumps({
+        "scan_id": str(scan.id),
+        "target": scan.target,
+        "summary": scan.summary,
+        "findings": findings_payload,
+    })
@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from api.core.config import get_settings
+from api.core.database import AsyncSessionLocal
+from api.models.db import ScanSession
+from api.services import scan_events, scan_service
+from api.services.agent0_client import Agent0Client
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("leased", "running")
+WAIT_METRICS_WINDOW = timedelta(hours=1)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease_until() -> datetime:
+    return _utcnow() + timedelta(seconds=settings.scan_lease_seconds)
+
+
+# ─── Queue operations (one transaction each) ─────────────────────────────────
+
+async def lease_next(db: AsyncSession, owner: str) -> ScanSession | None:
+    """
+    Lease the oldest pending scan whose target is below its concurrency limit.
+    Workers may pick scans of the same target at once (SKIP LOCKED only skips the
+    locked row), so the count is checked again under a per-target advisory lock.
+    """
+    active = aliased(ScanSession)
+    running_for_target = (
+        select(func.count())
+        .select_from(active)
+        .where(active.target == ScanSession.target, active.status.in_(ACTIVE_STATUSES))
+        .scalar_subquery()
+    )
+    postgres = db.get_bind().dialect.name == "postgresql"
+    full_targets: list[str] = []
+    while True:
+        query = select(ScanSession).where(
+            ScanSession.status == "pending",
+            running_for_target < settings.scan_per_target_limit,
+        )
+        if full_targets:
+            query = query.where(ScanSession.target.not_in(full_targets))
+        result = await db.execute(
+            query.order_by(ScanSession.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True, of=ScanSession)
+        )
+        scan = result.scalar_one_or_none()
+        if not scan:
+            # end the transaction, commit keeps loaded objects usable (expire_on_commit=False)
+            await db.commit()
+            return None
+
+        target = scan.target
+        if postgres:
+            # held until commit, a worker leasing the same target waits and then sees this lease
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(target))))
+        running = await db.scalar(
+            select(func.count())
+            .select_from(ScanSession)
+            .where(ScanSession.target == target, ScanSession.status.in_(ACTIVE_STATUSES))
+        )
+        if running < settings.scan_per_target_limit:
+            break
+        # another worker leased this target meanwhile, look for a scan of another one
+        await db.rollback()
+        full_targets.append(target)
+
+    scan.status = "leased"
+    scan.lease_owner = owner
+    scan.lease_expires_at = _lease_until()
+    scan.attempts = (scan.attempts or 0) + 1
+    await db.commit()
+    return scan
+
+
+async def heartbeat(db: AsyncSession, scan_id: uuid.UUID, owner: str) -> bool:
+    """Extend the lease, False when it was lost (expired and recovered elsewhere)."""
+    result = await db.execute(
+        update(ScanSession)
+        .where(
+            ScanSession.id == scan_id,
+            ScanSession.lease_owner == owner,
+            ScanSession.status.in_(ACTIVE_STATUSES),
+        )
+        .values(lease_expires_at=_lease_until())
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def release(db: AsyncSession, scan_id: uuid.UUID, owner: str) -> None:
+    await db.execute(
+        update(ScanSession)
+        .where(ScanSession.id == scan_id, ScanSession.lease_owner == owner)
+        .values(lease_owner=None, lease_expires_at=None)
+    )
+    await db.commit()
+
+
+async def recover_expired(db: AsyncSession) -> int:
+    """Requeue scans whose worker stopped renewing the lease, fail them after max attempts."""
+    result = await db.execute(
+        select(ScanSession)
+        .where(
+            ScanSession.status.in_(ACTIVE_STATUSES),
+            ScanSession.lease_expires_at < _utcnow(),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    expired = list(result.scalars().all())
+    for scan in expired:
+        logger.warning("Scan %s lost its worker (%s), recovering", scan.id, scan.lease_owner)
+        scan.lease_owner = None
+        scan.lease_expires_at = None
+        if (scan.attempts or 0) >= settings.scan_max_attempts:
+            scan.status = "failed"
+            scan.error = "Scan worker stopped responding"
+            scan.completed_at = _utcnow()
+        else:
+            scan.status = "pending"
+            scan.context_id = None
+
+    await db.commit()
+    for scan in expired:
+        scan_events.notify(scan.id)
+    return len(expired)
+
+
+async def queue_metrics(db: AsyncSession) -> dict:
+    """Queue depth per status, age of the oldest pending scan and recent wait times."""
+    now = _utcnow()
+    counts = dict(
+        (
+            await db.execute(
+                select(ScanSession.status, func.count())
+                .where(ScanSession.status.in_(("pending",) + ACTIVE_STATUSES))
+                .group_by(ScanSession.status)
+            )
+        ).all()
+    )
+    oldest = (
+        await db.execute(
+            select(func.min(ScanSession.created_at)).where(ScanSession.status == "pending")
+        )
+    ).scalar_one_or_none()
+
+    started = (
+        await db.execute(
+            select(ScanSession.created_at, ScanSession.started_at).where(
+                ScanSession.attempts > 0,
+                ScanSession.status != "pending",
+                ScanSession.started_at >= now - WAIT_METRICS_WINDOW,
+            )
+        )
+    ).all()
+    waits = [
+        max((_aware(started_at) - _aware(created_at)).total_seconds(), 0.0)
+        for created_at, started_at in started
+    ]
+
+    return {
+        "pending": counts.get("pending", 0),
+        "leased": counts.get("leased", 0),
+        "running": counts.get("running", 0),
+        "oldest_pending_seconds": (now - _aware(oldest)).total_seconds() if oldest else None,
+        "started_last_hour": len(waits),
+        "avg_wait_seconds": sum(waits) / len(waits) if waits else None,
+        "max_wait_seconds": max(waits) if waits else None,
+    }
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# ─── Worker pool ──────────────────────────────────────────────────────────────
+
+class ScanWorkerPool:
+    """Fixed number of workers leasing scans from the ScanSession table."""
+
+    def __init__(self, size: int | None = None) -> None:
+        self.size = size or settings.scan_workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.busy = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        async with AsyncSessionLocal() as db:
+            recovered = await recover_expired(db)
+        if recovered:
+            logger.info("Recovered %s scans from stopped workers", recovered)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.size)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self) -> None:
+        # running scans keep their lease until it expires, then they are requeued
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    scan = await lease_next(db, self.owner)
+                if scan is None:
+                    await self._idle()
+                    continue
+                await self._run(scan.id, scan.target, scan.scan_type)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scan worker failed")
+                await asyncio.sleep(settings.scan_queue_poll_seconds)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), settings.scan_queue_poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self, scan_id: uuid.UUID, target: str, scan_type: str) -> None:
+        self.busy += 1
+        run = asyncio.create_task(self._execute(scan_id, target, scan_type))
+        beat = asyncio.create_task(self._heartbeat(scan_id, run))
+        try:
+            # wait() does not raise when the heartbeat cancels the run
+            await asyncio.wait({run})
+        except asyncio.CancelledError:
+            run.cancel()
+            raise
+        finally:
+            beat.cancel()
+            self.busy -= 1
+
+        if run.cancelled():
+            logger.warning("Scan %s stopped, its lease was lost", scan_id)
+        elif run.exception():
+            logger.error("Background scan task failed for %s", scan_id, exc_info=run.exception())
+        async with AsyncSessionLocal() as db:
+            await release(db, scan_id, self.owner)
+        # a slot for this target is free again
+        self.wake()
+
+    async def _execute(self, scan_id: uuid.UUID, target: str, scan_type: str) -> None:
+        async with AsyncSessionLocal() as db:
+            agent0 = Agent0Client()
+            healthy = await agent0.check_health()
+            if not healthy:
+                logger.error("Agent0 unreachable before scan %s", scan_id)
+            await scan_service.run_scan(db, agent0, scan_id, target, scan_type)
+
+    async def _heartbeat(self, scan_id: uuid.UUID, run: asyncio.Task) -> None:
+        interval = settings.scan_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    lease_held = await heartbeat(db, scan_id, self.owner)
+            except Exception:
+                logger.exception("Heartbeat failed for scan %s", scan_id)
+                continue
+            if not lease_held:
+                # the scan was requeued and may already run elsewhere
+                logger.warning("Lease for scan %s was lost", scan_id)
+                run.cancel()
+                return
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(settings.scan_lease_seconds / 2)
+            try:
+                async with AsyncSessionLocal() as db:
+                    if await recover_expired(db):
+                        self.wake()
+            except Exception:
+                logger.exception("Scan lease recovery failed")
+
+
+pool: ScanWorkerPool | None = None
+
+
+async def start() -> None:
+    global pool
+    pool = ScanWorkerPool()
+    await pool.start()
+
+
+async def stop() -> None:
+    global pool
+    if pool:
+        await pool.stop()
+        pool = None
+
+
+def wake() -> None:
+    """Called after enqueuing so an idle worker picks the scan up immediately."""
+    if pool:
+        pool.wake()
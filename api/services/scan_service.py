@@ -1,17 +1,26 @@
+import asyncio
+import base64
 import json
+import logging
 import uuid
+from collections import Counter
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import delete, exists, func, literal_column, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from api.core.config import get_settings
-from api.models.db import Finding, ScanSession
+from api.models.db import Finding, ScanSession, scan_findings
+from api.services import finding_store, scan_events
 from api.services.agent0_client import Agent0Client
+from python.helpers import cve_index
 
-VALID_SEVERITIES = {"critical", "high", "medium", "low", "info"}
+SEVERITY_ORDER = ("critical", "high", "medium", "low", "info")
+STATS_BUCKETS = ("day", "week", "month")
+RAW_REPORT_MAX_LEN = 50_000
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 SCAN_STRATEGIES = {
     "quick": "Run one quick host/service discovery pass only.",
@@ -52,9 +61,10 @@ async def fail_stale_running_scans(db: AsyncSession) -> int:
 
 
 async def create_pending_scan(db: AsyncSession, target: str, scan_type: str) -> ScanSession:
-    """Create a scan record immediately and return it — scan runs in background."""
+    """Create a scan record immediately and return it — scan is picked up by the scan queue."""
     scan = ScanSession(
         target=target,
+        scan_type=scan_type,
         status="pending",
         started_at=_utcnow(),
     )
@@ -72,16 +82,18 @@ async def run_scan(
     scan_type: str = "full",
 ) -> None:
     """Background task: run the full scan and persist results.
-    Updates scan status throughout: pending → running → completed/failed.
+    Updates scan status throughout: pending → leased → running → completed/failed.
     """
     scan = await db.get(ScanSession, scan_id)
     if not scan:
         return
 
     try:
-        # Mark running
+        # Mark running, started_at minus created_at is the time spent queued
         scan.status = "running"
+        scan.started_at = _utcnow()
         await db.commit()
+        scan_events.notify(scan.id)
 
         # ── Call 1: run the audit and return structured JSON ────────────
         strategy = SCAN_STRATEGIES.get(scan_type, SCAN_STRATEGIES["full"])
@@ -89,14 +101,15 @@ async def run_scan(
             f"Target: {target}. Scan mode: {scan_type}. {strategy} "
             "Operate autonomously within authorized defensive assessment scope and complete all applicable phases before finishing. "
             "If the target uses localhost and the service appears unreachable, consider whether the runtime is inside Docker and whether an internal hostname such as http://dvwa or http://juice-shop:3000 is more appropriate. "
-            "For full scans, do not stop after partial output: run nmap, CVE enrichment for discovered services when available, "
-            "and web checks (nikto plus gobuster or dirb) when a web service is present. "
+            "For full scans, do not stop after partial output: run nmap with the nmap_scan tool, "
+            "then the scan_pipeline tool for CVE enrichment of discovered services and web checks (nikto plus gobuster or dirb) on web services. "
             "Do not perform credential attacks, exploitation, persistence, privilege escalation, or post-exploitation activity. "
             "If a tool fails, retry once with safer flags and continue remaining steps. "
             "Return ONLY one valid JSON object (no markdown, no extra text) with this schema: "
             '{"target":"string","scan_date":"ISO-8601","tools_used":["string"],'
             '"findings":[{"severity":"critical|high|medium|low|info","title":"string",'
-            '"tool":"string|null","cve":"CVE-XXXX-XXXX|null","cvss":0-10|null,'
+            '"tool":"string|null","port":"number|null","service":"product name as reported by nmap|null",'
+            '"version":"string|null","cve":"CVE-XXXX-XXXX|null","cvss":0-10|null,'
             '"remediation":"string|null"}],"summary":"string"}'
         )
         result = await agent0.send_message(prompt, timeout=_scan_timeout(scan_type))
@@ -111,6 +124,7 @@ async def run_scan(
         # Persist context_id so SSE endpoint can stream logs
         scan.context_id = context_id
         await db.commit()
+        scan_events.notify(scan.id)
 
         # ── Parse JSON from first call, then fallback to second call ────
         findings_data: list[dict] = []
@@ -125,45 +139,100 @@ async def run_scan(
             tools_used = json_result.get("tools_used", [])
             summary = json_result.get("summary")
             findings_data = json_result.get("findings", [])
+        # only the stored part of the report is kept while findings are processed
+        raw_report = raw_report[:RAW_REPORT_MAX_LEN]
+
+        # hosts and services recorded by the nmap_scan tool, independent of the report text
+        inventory = await agent0.get_inventory(context_id) if context_id else []
+        if inventory and "nmap" not in tools_used:
+            tools_used.append("nmap")
+
+        try:
+            await asyncio.to_thread(_enrich_findings, findings_data, inventory)
+        except Exception:
+            logger.exception("CVE enrichment failed for scan %s", scan.id)
 
         # ── Persist findings ─────────────────────────────────────────────
-        for f in findings_data:
-            severity = f.get("severity", "info").lower()
-            if severity not in VALID_SEVERITIES:
-                severity = "info"
-
-            cvss_raw = f.get("cvss")
-            cvss = float(cvss_raw) if cvss_raw is not None else None
-
-            cve = f.get("cve") or None
-            if cve and not cve.upper().startswith("CVE-"):
-                cve = None
-
-            db.add(Finding(
-                scan_id=scan.id,
-                severity=severity,
-                title=str(f.get("title", "Unknown finding"))[:500],
-                tool=f.get("tool"),
-                cve=cve,
-                cvss=cvss,
-                remediation=f.get("remediation"),
-            ))
+        rows = finding_store.normalize_findings(findings_data, target)
+        await finding_store.store_findings(db, scan.id, rows)
+        _set_finding_counts(scan, [row["severity"] for row in rows])
 
         scan.status = "completed"
         scan.completed_at = _utcnow()
-        scan.raw_report = raw_report[:50_000]
+        scan.raw_report = raw_report
         scan.summary = summary
         scan.tools_used = json.dumps(tools_used) if tools_used else None
         await db.commit()
+        scan_events.notify(scan.id)
 
     except Exception as exc:
         scan.status = "failed"
         scan.error = str(exc)[:500]
         scan.completed_at = _utcnow()
         await db.commit()
+        scan_events.notify(scan.id)
         raise
 
 
+def _enrich_findings(findings_data: list[dict], inventory: list[dict] | None = None) -> None:
+    """
+    Fill in cve, cvss and severity of findings from the offline CVE index by their service and version,
+    and add a finding for the highest scored CVE of each open service in the nmap inventory.
+    """
+    index = cve_index.get_index(settings.cve_index_path, settings.cve_feeds_path or None)
+    if index is None:
+        return
+
+    pending = [
+        f for f in findings_data
+        if isinstance(f, dict) and not f.get("cve") and f.get("service") and f.get("version")
+    ]
+    results = index.lookup_many((str(f["service"]), str(f["version"])) for f in pending)
+    for finding, matches in zip(pending, results):
+        if matches:
+            # cvss and severity follow the CVE that was filled in
+            match = matches[0]
+            finding["cve"] = match.id
+            if match.cvss is not None:
+                finding["cvss"] = match.cvss
+                finding["severity"] = match.severity
+
+    known = {f.get("cve") for f in findings_data if isinstance(f, dict)}
+    for host in inventory or []:
+        for port in host.get("ports") or []:
+            service = port.get("service") or {}
+            if port.get("state") != "open" or not service.get("product") or not service.get("version"):
+                continue
+            matches = index.lookup(service["product"], service["version"])
+            if not matches or matches[0].id in known:
+                continue
+            match = matches[0]
+            known.add(match.id)
+            findings_data.append({
+                "port": port.get("port"),
+                "severity": match.severity,
+                "title": (
+                    f"{service['product']} {service['version']} on {host.get('address')}:"
+                    f"{port.get('port')}/{port.get('protocol')} is affected by {match.id}: {match.summary}"
+                ),
+                "tool": "nmap",
+                "cve": match.id,
+                "cvss": match.cvss,
+                "remediation": f"Upgrade {service['product']} to a release that fixes {match.id}.",
+            })
+
+
+def _set_finding_counts(scan: ScanSession, severities: list[str]) -> None:
+    counts = Counter(severities)
+    scan.finding_count = len(severities)
+    for severity in SEVERITY_ORDER:
+        setattr(scan, f"{severity}_count", counts[severity])
+
+
+def severity_counts(scan: ScanSession) -> dict[str, int]:
+    return {severity: getattr(scan, f"{severity}_count") or 0 for severity in SEVERITY_ORDER}
+
+
 async def get_scan(db: AsyncSession, scan_id: uuid.UUID) -> ScanSession | None:
     result = await db.execute(
         select(ScanSession)
@@ -173,21 +242,119 @@ async def get_scan(db: AsyncSession, scan_id: uuid.UUID) -> ScanSession | None:
     return result.scalar_one_or_none()
 
 
-async def list_scans(db: AsyncSession, offset: int = 0, limit: int = 20) -> list[ScanSession]:
+async def get_scan_state(
+    db: AsyncSession, scan_id: uuid.UUID
+) -> tuple[str, str | None, str | None] | None:
+    """Status, context_id and error of a scan without loading its findings."""
     result = await db.execute(
-        select(ScanSession)
-        .order_by(ScanSession.created_at.desc())
-        .options(selectinload(ScanSession.findings))
-        .offset(offset)
-        .limit(limit)
+        select(ScanSession.status, ScanSession.context_id, ScanSession.error)
+        .where(ScanSession.id == scan_id)
     )
+    row = result.one_or_none()
+    return tuple(row) if row else None
+
+
+async def list_scans(
+    db: AsyncSession,
+    offset: int = 0,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> list[ScanSession]:
+    """
+    Newest scans first, without their findings.
+    With a cursor from encode_cursor, the page starts after that scan (keyset on created_at, id),
+    offset is only kept for older clients.
+    """
+    query = select(ScanSession).order_by(ScanSession.created_at.desc(), ScanSession.id.desc())
+    if cursor:
+        query = query.where(tuple_(ScanSession.created_at, ScanSession.id) < decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
+    result = await db.execute(query.limit(limit))
     return list(result.scalars().all())
 
 
+def encode_cursor(scan: ScanSession) -> str:
+    value = f"{scan.created_at.isoformat()}|{scan.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for cursors not made by encode_cursor."""
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, scan_id = value.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(scan_id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def scan_stats(
+    db: AsyncSession,
+    since: datetime,
+    bucket: str = "day",
+    target: str | None = None,
+) -> list[dict]:
+    """Severity histogram of completed scans per target and period, summed from the scan counts."""
+    period = _period(db, bucket)
+    query = (
+        select(
+            ScanSession.target,
+            period.label("period"),
+            func.count().label("scans"),
+            func.sum(ScanSession.finding_count).label("findings"),
+            *(func.sum(getattr(ScanSession, f"{s}_count")).label(s) for s in SEVERITY_ORDER),
+        )
+        .where(ScanSession.status == "completed", ScanSession.created_at >= since)
+        .group_by(ScanSession.target, period)
+        .order_by(ScanSession.target, period)
+    )
+    if target:
+        query = query.where(ScanSession.target == target)
+    rows = (await db.execute(query)).mappings().all()
+    return [
+        {
+            "target": row["target"],
+            "period": _period_start(row["period"]),
+            "scans": row["scans"],
+            "findings": row["findings"] or 0,
+            "severity_counts": {s: row[s] or 0 for s in SEVERITY_ORDER},
+        }
+        for row in rows
+    ]
+
+
+def _period(db: AsyncSession, bucket: str):
+    if bucket not in STATS_BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket}, use one of {', '.join(STATS_BUCKETS)}")
+    if db.get_bind().dialect.name == "postgresql":
+        # inlined, a bound unit would make the grouped expression differ from the selected one
+        return func.date_trunc(literal_column(f"'{bucket}'"), ScanSession.created_at)
+    # sqlite, weeks start on monday like date_trunc
+    if bucket == "week":
+        return func.date(ScanSession.created_at, "-6 days", "weekday 1")
+    return func.date(ScanSession.created_at, "start of month" if bucket == "month" else "start of day")
+
+
+def _period_start(value: datetime | str) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
 async def delete_scan(db: AsyncSession, scan_id: uuid.UUID) -> bool:
     scan = await db.get(ScanSession, scan_id)
     if not scan:
         return False
+    # findings no other scan reported go with the scan, the others stay linked to their scans
+    links = scan_findings.c
+    await db.execute(
+        delete(Finding).where(
+            Finding.id.in_(select(links.finding_id).where(links.scan_id == scan_id)),
+            ~exists().where(links.finding_id == Finding.id, links.scan_id != scan_id),
+        )
+    )
+    await db.execute(delete(scan_findings).where(links.scan_id == scan_id))
     await db.delete(scan)
     await db.commit()
     return True
@@ -23,8 +23,8 @@ from python.helpers import dotenv
 from python.helpers import settings, dirty_json
 from python.helpers.dotenv import load_dotenv
 from python.helpers.providers import ModelType as ProviderModelType, get_provider_config
-from python.helpers.rate_limiter import RateLimiter
-from python.helpers.tokens import approximate_tokens
+from python.helpers.rate_limiter import RateLimiter, SharedRateLimiter
+from python.helpers.tokens import approximate_tokens, StreamTokenCounter
 from python.helpers import dirty_json, browser_use_monkeypatch
 
 from langchain_core.language_models.chat_models import SimpleChatModel
@@ -218,7 +218,17 @@ def get_rate_limiter(
     provider: str, name: str, requests: int, input: int, output: int
 ) -> RateLimiter:
     key = f"{provider}\\{name}"
-    rate_limiters[key] = limiter = rate_limiters.get(key, RateLimiter(seconds=60))
+    limiter = rate_limiters.get(key)
+    if limiter is None:
+        # RATE_LIMIT_MODE: "window" (default) or "token_bucket"
+        # RATE_LIMIT_DB: sqlite file to share limits between processes
+        mode = (dotenv.get_dotenv_value("RATE_LIMIT_MODE", "") or "window").strip().lower()
+        shared_db = dotenv.get_dotenv_value("RATE_LIMIT_DB", "")
+        if shared_db:
+            limiter = SharedRateLimiter(key, shared_db, seconds=60, mode=mode)
+        else:
+            limiter = RateLimiter(seconds=60, mode=mode)
+        rate_limiters[key] = limiter
     limiter.limits["requests"] = requests or 0
     limiter.limits["input"] = input or 0
     limiter.limits["output"] = output or 0
@@ -517,6 +527,9 @@ class LiteLLMChatWrapper(SimpleChatModel):
                 )
 
                 if stream:
+                    # deltas are estimated once each, exact count is done at stream end
+                    output_tokens = StreamTokenCounter()
+
                     # iterate over chunks
                     async for chunk in _completion:  # type: ignore
                         got_any_chunk = True
@@ -526,28 +539,29 @@ class LiteLLMChatWrapper(SimpleChatModel):
 
                         # collect reasoning delta and call callbacks
                         if output["reasoning_delta"]:
+                            delta_tokens = output_tokens.add(output["reasoning_delta"])
                             if reasoning_callback:
                                 await reasoning_callback(output["reasoning_delta"], result.reasoning)
                             if tokens_callback:
-                                await tokens_callback(
-                                    output["reasoning_delta"],
-                                    approximate_tokens(output["reasoning_delta"]),
-                                )
+                                await tokens_callback(output["reasoning_delta"], delta_tokens)
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                                limiter.add(output=delta_tokens)
                         # collect response delta and call callbacks
                         if output["response_delta"]:
+                            delta_tokens = output_tokens.add(output["response_delta"])
                             if response_callback:
                                 await response_callback(output["response_delta"], result.response)
                             if tokens_callback:
-                                await tokens_callback(
-                                    output["response_delta"],
-                                    approximate_tokens(output["response_delta"]),
-                                )
+                                await tokens_callback(output["response_delta"], delta_tokens)
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["response_delta"]))
+                                limiter.add(output=delta_tokens)
+
+                    # settle the estimates with the exact output token count
+                    correction = output_tokens.finalize()
+                    if limiter and correction:
+                        limiter.add(output=correction)
 
                 # non-stream response
                 else:
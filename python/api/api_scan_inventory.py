@@ -0,0 +1,38 @@
+from agent import AgentContext
+from python.helpers.api import ApiHandler, Request, Response
+from python.helpers.nmap_xml import INVENTORY_KEY
+
+
+class ApiScanInventory(ApiHandler):
+    @classmethod
+    def get_methods(cls) -> list[str]:
+        return ["GET", "POST"]
+
+    @classmethod
+    def requires_auth(cls) -> bool:
+        return False  # No web auth required
+
+    @classmethod
+    def requires_csrf(cls) -> bool:
+        return False  # No CSRF required
+
+    @classmethod
+    def requires_api_key(cls) -> bool:
+        return True  # Require API key
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        if request.method == "GET":
+            context_id = request.args.get("context_id", "")
+        else:
+            context_id = input.get("context_id", "")
+
+        if not context_id:
+            return Response('{"error": "context_id is required"}', status=400, mimetype="application/json")
+
+        context = AgentContext.use(context_id)
+        if not context:
+            return Response('{"error": "Context not found"}', status=404, mimetype="application/json")
+
+        # hosts from nmap_scan runs of this chat
+        inventory = context.get_data(INVENTORY_KEY) or {}
+        return {"context_id": context_id, "hosts": list(inventory.values())}
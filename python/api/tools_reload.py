@@ -0,0 +1,16 @@
+from python.helpers.api import ApiHandler, Request, Response
+from python.helpers import tool_registry
+
+
+class ToolsReload(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # optional tool name, all tools are reloaded when omitted
+        name = input.get("name") or None
+        stats = tool_registry.get_stats()
+        tool_registry.reload(name)
+
+        return {
+            "ok": True,
+            "message": f"Tool '{name}' reloaded" if name else "Tools reloaded",
+            "stats": stats,
+        }
@@ -5,6 +5,9 @@ from python.helpers.secrets import get_secrets_manager
 
 class MaskResponseStreamChunk(Extension):
 
+    # called per streamed chunk, keeps no state on self
+    reusable = True
+
     async def execute(self, **kwargs):
         # Get stream data and agent from kwargs
         stream_data = kwargs.get("stream_data")
@@ -13,12 +16,12 @@ class MaskResponseStreamChunk(Extension):
             return
 
         try:
-            secrets_mgr = get_secrets_manager(self.agent.context)
-
-            # Initialize filter if not exists
+            # Initialize filter if not exists, or when a new stream starts
+            # (a stream interrupted before its end extension leaves the old one behind)
             filter_key = "_resp_stream_filter"
             filter_instance = agent.get_data(filter_key)
-            if not filter_instance:
+            if not filter_instance or stream_data["chunk"] == stream_data["full"]:
+                secrets_mgr = get_secrets_manager(self.agent.context)
                 filter_instance = secrets_mgr.create_streaming_filter()
                 agent.set_data(filter_key, filter_instance)
 
@@ -28,8 +31,9 @@ class MaskResponseStreamChunk(Extension):
             # Update the stream data with processed chunk
             stream_data["chunk"] = processed_chunk
 
-            # Also mask the full text for consistency
-            stream_data["full"] = secrets_mgr.mask_values(stream_data["full"])
+            # The full text is everything the filter emitted so far, already masked,
+            # text that may still be the start of a secret follows with the next chunk
+            stream_data["full"] = filter_instance.output
 
             # Print the processed chunk (this is where printing should happen)
             if processed_chunk:
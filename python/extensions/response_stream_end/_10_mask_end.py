@@ -20,6 +20,8 @@ class MaskResponseStreamEnd(Extension):
                 if tail:
                     from python.helpers.print_style import PrintStyle
                     PrintStyle().stream(tail)
+                    # the held back tail is not in the streamed full text yet
+                    await agent.handle_response_stream(filter_instance.output)
 
                 # Clean up the filter
                 agent.set_data(filter_key, None)
@@ -3,7 +3,7 @@ from python.helpers.extension import Extension
 from python.helpers.mcp_handler import MCPConfig
 from agent import Agent, LoopData
 from python.helpers.settings import get_settings
-from python.helpers import projects, skills
+from python.helpers import projects, skills, system_prompt_cache
 
 
 class SystemPrompt(Extension):
@@ -14,25 +14,33 @@ class SystemPrompt(Extension):
         loop_data: LoopData = LoopData(),
         **kwargs: Any
     ):
-        # append main system prompt and tools
-        main = get_main_prompt(self.agent)
-        tools = get_tools_prompt(self.agent)
-        mcp_tools = get_mcp_tools_prompt(self.agent)
-        skills = get_skills_prompt(self.agent)
-        secrets_prompt = get_secrets_prompt(self.agent)
-        project_prompt = get_project_prompt(self.agent)
-
-        system_prompt.append(main)
-        system_prompt.append(tools)
-        if mcp_tools:
-            system_prompt.append(mcp_tools)
-        if skills:
-            system_prompt.append(skills)
-        if secrets_prompt:
-            system_prompt.append(secrets_prompt)
-        if project_prompt:
-            system_prompt.append(project_prompt)
-       
+        # append main system prompt and tools, rebuilt only when their inputs change
+        cached = system_prompt_cache.get_prompt(
+            self.agent, lambda: build_system_prompt(self.agent)
+        )
+        system_prompt.extend(cached.parts)
+        loop_data.params_temporary["system_prompt_hash"] = cached.hash
+
+
+def build_system_prompt(agent: Agent) -> list[str]:
+    main = get_main_prompt(agent)
+    tools = get_tools_prompt(agent)
+    mcp_tools = get_mcp_tools_prompt(agent)
+    skills = get_skills_prompt(agent)
+    secrets_prompt = get_secrets_prompt(agent)
+    project_prompt = get_project_prompt(agent)
+
+    parts = [main, tools]
+    if mcp_tools:
+        parts.append(mcp_tools)
+    if skills:
+        parts.append(skills)
+    if secrets_prompt:
+        parts.append(secrets_prompt)
+    if project_prompt:
+        parts.append(project_prompt)
+    return parts
+
 
 def get_main_prompt(agent: Agent):
     return agent.read_prompt("agent.system.main.md")
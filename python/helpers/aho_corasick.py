@@ -0,0 +1,133 @@
+import re
+from collections import deque
+from typing import Callable, Iterable
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher compiled into a deterministic automaton.
+
+    scan() walks the text once regardless of the number of patterns and can be
+    resumed from a previous state, so chunked input (streams) is matched without
+    rescanning what was already seen. find_all() and replace() work on complete
+    strings.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: list[str] = sorted({p for p in patterns if p})
+        # state 0 is the root
+        self.delta: list[dict[str, int]] = [{}]
+        self.depth: list[int] = [0]
+        # lengths of all patterns ending in each state, longest first
+        self.out: list[tuple[int, ...]] = [()]
+        self._build()
+
+        first_chars = {p[0] for p in self.patterns}
+        self._first_re = (
+            re.compile("[" + "".join(re.escape(c) for c in sorted(first_chars)) + "]")
+            if first_chars
+            else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def _build(self):
+        goto = self.delta
+        terminal: set[int] = set()
+        for pattern in self.patterns:
+            state = 0
+            for char in pattern:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    self.depth.append(self.depth[state] + 1)
+                    self.out.append(())
+                    goto[state][char] = nxt
+                state = nxt
+            terminal.add(state)
+
+        # breadth-first: failure links, outputs and full transitions (dfa)
+        fail = [0] * len(goto)
+        alphabet = {c for p in self.patterns for c in p}
+        queue: deque[int] = deque()
+        for char, child in goto[0].items():
+            queue.append(child)
+            self.out[child] = (1,) if child in terminal else ()
+        while queue:
+            state = queue.popleft()
+            for char, child in list(goto[state].items()):
+                queue.append(child)
+                fail_state = fail[state]
+                while fail_state and char not in goto[fail_state]:
+                    fail_state = fail[fail_state]
+                target = goto[fail_state].get(char, 0)
+                fail[child] = target if target != child else 0
+                own = (self.depth[child],) if child in terminal else ()
+                self.out[child] = own + self.out[fail[child]]
+            # missing transitions follow the failure link, already complete for it
+            fallback = goto[fail[state]]
+            for char in alphabet:
+                if char not in goto[state] and char in fallback:
+                    goto[state][char] = fallback[char]
+
+    def scan(
+        self, text: str, state: int = 0, offset: int = 0
+    ) -> tuple[list[tuple[int, int]], int]:
+        """Find all (start, end) matches in text, continuing from state.
+        Positions are shifted by offset. Returns the matches and the final state."""
+        matches: list[tuple[int, int]] = []
+        if not self.patterns:
+            return matches, 0
+
+        delta = self.delta
+        out = self.out
+        first_re = self._first_re
+        i = 0
+        n = len(text)
+        while i < n:
+            if state == 0:
+                # nothing partially matched, jump to the next possible pattern start
+                found = first_re.search(text, i)  # type: ignore[union-attr]
+                if not found:
+                    break
+                i = found.start()
+            state = delta[state].get(text[i], 0)
+            i += 1
+            if out[state]:
+                end = offset + i
+                for length in out[state]:
+                    matches.append((end - length, end))
+        return matches, state
+
+    def find_all(self, text: str) -> list[tuple[int, int]]:
+        """Find all (start, end) matches in a complete text, one pass of scan()."""
+        return self.scan(text)[0]
+
+    def replace(self, text: str, replacement: Callable[[str], str]) -> str:
+        """Replace leftmost-longest, non-overlapping matches."""
+        if not text or not self.patterns:
+            return text
+        matches = self.find_all(text)
+        if not matches:
+            return text
+        return replace_matches(text, matches, replacement)
+
+
+def replace_matches(
+    text: str,
+    matches: list[tuple[int, int]],
+    replacement: Callable[[str], str],
+    offset: int = 0,
+) -> str:
+    """Apply leftmost-longest, non-overlapping matches to text starting at offset."""
+    parts: list[str] = []
+    cursor = offset
+    for start, end in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if start < cursor:
+            continue
+        parts.append(text[cursor - offset : start - offset])
+        parts.append(replacement(text[start - offset : end - offset]))
+        cursor = end
+    parts.append(text[cursor - offset :])
+    return "".join(parts)
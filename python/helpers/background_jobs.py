@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import shlex
+import time
+from contextlib import suppress
+from typing import Iterable, Literal
+
+import psutil
+
+from python.helpers import runtime, tty_session
+from python.helpers.terminal_output import TerminalOutput
+
+MAX_RUNNING_JOBS = 8
+MAX_FINISHED_JOBS = 20  # older finished jobs are dropped with their output files
+EXIT_DRAIN_TIMEOUT = 1  # seconds to read remaining output after the process exits
+TAIL_LINES = 20
+
+WaitMode = Literal["any", "all"]
+
+
+class BackgroundJob:
+    """
+    One command running detached in its own terminal.
+    Output is cleaned like terminal sessions output and spooled to output.spill_path.
+    Completion is signalled by the process exit, nothing polls the terminal.
+    """
+
+    def __init__(self, id: int, command: str, cwd: str | None = None):
+        self.id = id
+        self.command = command
+        self.cwd = cwd
+        self.output = TerminalOutput(spool=True)
+        self.started = time.time()
+        self.finished: float | None = None
+        self.returncode: int | None = None
+        self.killed = False
+        self.closed = False
+        self._session: tty_session.TTYSession | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    async def start(self):
+        self._session = tty_session.TTYSession(_shell_command(self.command), cwd=self.cwd)
+        await self._session.start()
+        self._task = asyncio.create_task(self._run(self._session))
+
+    def kill(self):
+        if not self.running or not self._session:
+            return
+        self.killed = True
+        # the shell and everything it started, scanners often fork workers
+        try:
+            children = psutil.Process(self._session.pid).children(recursive=True)
+        except (psutil.NoSuchProcess, TypeError):
+            children = []
+        self._session.kill()
+        for child in children:
+            with suppress(psutil.NoSuchProcess):
+                child.kill()
+
+    def close(self):
+        """Kill the job and delete its output, now or as soon as the process has exited."""
+        self.kill()
+        self.closed = True
+        if not self.running:
+            self.output.close()
+
+    def describe(self, lines: int = TAIL_LINES) -> str:
+        if self.running:
+            status = f"running for {self.seconds:.0f}s"
+        elif self.killed:
+            status = f"killed after {self.seconds:.0f}s"
+        else:
+            status = f"exited with code {self.returncode} after {self.seconds:.0f}s"
+        text = [f"job {self.id} {status}: {self.command}"]
+        tail = self.output.tail(lines) if lines > 0 else []
+        if self.output.line_count > len(tail):
+            text.append(f"last {len(tail)} of {self.output.line_count} lines, full output in {self.output.spill_path}")
+        text.extend(tail if any(line.strip() for line in tail) else ["(no output yet)" if self.running else "(no output)"])
+        return "\n".join(text)
+
+    async def _run(self, session: tty_session.TTYSession):
+        pump = asyncio.create_task(self._pump(session))
+        try:
+            self.returncode = await session.wait()
+            # the rest of the output arrives with EOF, unless a child still holds the terminal
+            await asyncio.wait({pump}, timeout=EXIT_DRAIN_TIMEOUT)
+        finally:
+            pump.cancel()
+            self.output.finish()
+            self.finished = time.time()
+            if self.closed:
+                self.output.close()
+
+    async def _pump(self, session: tty_session.TTYSession):
+        async for chunk in session.read_until_eof():
+            self.output.append(chunk)
+
+
+class BackgroundJobs:
+    """Background jobs of one agent, ids are not reused."""
+
+    def __init__(self):
+        self.jobs: dict[int, BackgroundJob] = {}
+        self.last_id = 0
+
+    def running(self) -> list[BackgroundJob]:
+        return [job for job in self.jobs.values() if job.running]
+
+    def get(self, ids: Iterable[int] = ()) -> list[BackgroundJob]:
+        ids = list(ids)
+        if not ids:
+            return list(self.jobs.values())
+        missing = [str(i) for i in ids if i not in self.jobs]
+        if missing:
+            raise KeyError(f"No background job {', '.join(missing)}")
+        return [self.jobs[i] for i in ids]
+
+    async def start(self, command: str, cwd: str | None = None) -> BackgroundJob:
+        if len(self.running()) >= MAX_RUNNING_JOBS:
+            raise RuntimeError(f"{MAX_RUNNING_JOBS} background jobs are already running, wait for or kill one first")
+        self.last_id += 1
+        job = BackgroundJob(self.last_id, command, cwd)
+        await job.start()
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def kill_all(self):
+        for job in self.running():
+            job.kill()
+
+    def close(self):
+        """Kill all jobs and delete their output, for terminal and chat resets."""
+        self.kill_all()
+        for job in self.jobs.values():
+            job.close()
+        self.jobs.clear()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if not job.running]
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            job.output.close()
+            del self.jobs[job.id]
+
+
+async def wait_jobs(jobs: list[BackgroundJob], timeout: float, mode: WaitMode = "any") -> bool:
+    """Wait until any or all of the jobs finished, True if they did within timeout."""
+    if mode == "any" and any(not job.running for job in jobs):
+        return True
+    tasks = [job._task for job in jobs if job.running and job._task]
+    if not tasks:
+        return True
+    await asyncio.wait(
+        tasks,
+        timeout=max(0, timeout),
+        return_when=asyncio.FIRST_COMPLETED if mode == "any" else asyncio.ALL_COMPLETED,
+    )
+    done = [not job.running for job in jobs]
+    return any(done) if mode == "any" else all(done)
+
+
+def _shell_command(command: str) -> str:
+    if runtime.is_windows():
+        return f"powershell.exe -Command {command}"
+    return f"{runtime.get_terminal_executable()} -c {shlex.quote(command)}"
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import gzip
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+# NVD 2.0 JSON feeds (nvdcve-2.0-*.json or .json.gz) and the index built from them
+FEEDS_FOLDER = "usr/cve/feeds"
+INDEX_FILE = "usr/cve/cve.idx"
+SUMMARY_MAX_LEN = 200
+LOOKUP_CACHE_SIZE = 4096
+
+# nmap service names that differ from the CPE product, as (vendor, product)
+PRODUCT_ALIASES: dict[str, tuple[str | None, str]] = {
+    "apache httpd": ("apache", "http_server"),
+    "apache tomcat": ("apache", "tomcat"),
+    "apache tomcat/coyote jsp engine": ("apache", "tomcat"),
+    "openssh": ("openbsd", "openssh"),
+    "microsoft iis httpd": ("microsoft", "internet_information_services"),
+    "microsoft-iis": ("microsoft", "internet_information_services"),
+    "isc bind": ("isc", "bind"),
+    "mysql": (None, "mysql"),
+    "mariadb": ("mariadb", "mariadb"),
+    "postgresql db": ("postgresql", "postgresql"),
+    "vsftpd": ("beasts", "vsftpd"),
+    "proftpd": ("proftpd", "proftpd"),
+    "samba smbd": ("samba", "samba"),
+    "exim smtpd": ("exim", "exim"),
+    "postfix smtpd": ("postfix", "postfix"),
+    "node.js": ("nodejs", "node.js"),
+    "php": ("php", "php"),
+}
+
+_MAGIC = b"SCVEIDX1"
+_HEADER = struct.Struct("<8s6I")  # magic, cves, products, ranges, products_off, ranges_off, strings_off
+_CVE = struct.Struct("<IHHIH")  # id, cvss * 10, summary
+_PRODUCT = struct.Struct("<IHIII")  # name, first range, exact versions, all ranges
+_RANGE = struct.Struct("<IHIHIHBI")  # vendor, start key, end key, flags, cve
+_START_INCLUDED = 1
+_END_INCLUDED = 2
+_NO_CVSS = 0xFFFF
+
+_CPE_SEPARATOR = re.compile(r"(?<!\\):")
+_VERSION_TOKEN = re.compile(r"\d+|[a-z]+")
+_PRE_RELEASE = {"alpha", "a", "beta", "b", "rc", "pre", "preview", "dev"}
+
+
+@dataclass(frozen=True)
+class CveMatch:
+    id: str
+    cvss: float | None
+    summary: str
+
+    @property
+    def severity(self) -> str:
+        if self.cvss is None:
+            return "info"
+        if self.cvss >= 9.0:
+            return "critical"
+        if self.cvss >= 7.0:
+            return "high"
+        if self.cvss >= 4.0:
+            return "medium"
+        return "low" if self.cvss > 0 else "info"
+
+
+class CveIndex:
+    """
+    Read-only view of an index file written by build_index.
+    The file is memory-mapped, opening it does not read the records.
+    Products are binary searched by name, each product has its exact versions
+    sorted for a binary search followed by the version ranges that are checked one by one.
+    Versions are stored as byte strings that sort like the versions they encode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.cve_count, self.product_count, self.range_count, self._products_off, self._ranges_off, self._strings_off = (
+            _HEADER.unpack_from(self._mm, 0)
+        )
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a CVE index file: {path}")
+        self._lookup_cached = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup)
+
+    def close(self):
+        self._mm.close()
+
+    def lookup(self, product: str, version: str, vendor: str | None = None) -> tuple[CveMatch, ...]:
+        """CVEs affecting a product version, highest CVSS first. Accepts nmap service names and CPE products."""
+        alias_vendor, product = normalize_product(product)
+        version = normalize_version(version)
+        if not product or not version:
+            return ()
+        return self._lookup_cached(product, version, (vendor or alias_vendor or "").lower() or None)
+
+    def lookup_many(self, queries: Iterable[tuple[str, str]]) -> list[tuple[CveMatch, ...]]:
+        return [self.lookup(product, version) for product, version in queries]
+
+    def lookup_cpe(self, cpe: str) -> tuple[CveMatch, ...]:
+        """CVEs for a CPE 2.2 (cpe:/a:vendor:product:version) or 2.3 name, as reported by nmap -sV."""
+        parsed = parse_cpe(cpe)
+        if not parsed or not parsed[2]:
+            return ()
+        vendor, product, version = parsed
+        return self.lookup(product, version, vendor)
+
+    def _lookup(self, product: str, version: str, vendor: str | None) -> tuple[CveMatch, ...]:
+        found = self._find_product(product.encode())
+        if found is None:
+            return ()
+        first, exact, total = found
+        key = version_key(version)
+        vendor_name = vendor.encode() if vendor else None
+        cves: set[int] = set()
+
+        # exact versions, lower bound of the key
+        lo, hi = first, first + exact
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._range(mid)[1] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < first + exact:
+            range_vendor, start, _, _, cve = self._range(lo)
+            if start != key:
+                break
+            if vendor_name is None or range_vendor == vendor_name:
+                cves.add(cve)
+            lo += 1
+
+        for index in range(first + exact, first + total):
+            range_vendor, start, end, flags, cve = self._range(index)
+            if vendor_name is not None and range_vendor != vendor_name:
+                continue
+            if start and (key < start or (key == start and not flags & _START_INCLUDED)):
+                continue
+            if end and (key > end or (key == end and not flags & _END_INCLUDED)):
+                continue
+            cves.add(cve)
+
+        matches = [self._cve(cve) for cve in cves]
+        matches.sort(key=lambda m: (-(m.cvss if m.cvss is not None else -1), m.id))
+        return tuple(matches)
+
+    def _find_product(self, name: bytes) -> tuple[int, int, int] | None:
+        lo, hi = 0, self.product_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name_off, name_len, first, exact, total = _PRODUCT.unpack_from(
+                self._mm, self._products_off + mid * _PRODUCT.size
+            )
+            current = self._string(name_off, name_len)
+            if current == name:
+                return first, exact, total
+            if current < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _range(self, index: int) -> tuple[bytes, bytes, bytes, int, int]:
+        vendor_off, vendor_len, start_off, start_len, end_off, end_len, flags, cve = _RANGE.unpack_from(
+            self._mm, self._ranges_off + index * _RANGE.size
+        )
+        return (
+            self._string(vendor_off, vendor_len),
+            self._string(start_off, start_len),
+            self._string(end_off, end_len),
+            flags,
+            cve,
+        )
+
+    def _cve(self, index: int) -> CveMatch:
+        id_off, id_len, cvss, summary_off, summary_len = _CVE.unpack_from(
+            self._mm, _HEADER.size + index * _CVE.size
+        )
+        return CveMatch(
+            id=self._string(id_off, id_len).decode(),
+            cvss=None if cvss == _NO_CVSS else cvss / 10,
+            summary=self._string(summary_off, summary_len).decode(errors="replace"),
+        )
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self._strings_off + offset
+        return self._mm[start : start + length]
+
+
+def version_key(version: str) -> bytes:
+    """Byte string that sorts like the version: 1.9 < 1.10, 2.0rc1 < 2.0 < 2.0p1 < 2.0.1."""
+    key = bytearray()
+    for token in _VERSION_TOKEN.findall(version.lower()):
+        if token.isdigit():
+            digits = token.lstrip("0") or "0"
+            key += b"\x04" + bytes([min(len(digits), 255)]) + digits.encode()
+        else:
+            key += (b"\x01" if token in _PRE_RELEASE else b"\x03") + token.encode() + b"\x00"
+    key += b"\x02"
+    return bytes(key)
+
+
+def normalize_product(name: str) -> tuple[str | None, str]:
+    name = " ".join(name.lower().split())
+    if name in PRODUCT_ALIASES:
+        return PRODUCT_ALIASES[name]
+    return None, re.sub(r"[\s\-]+", "_", name)
+
+
+def normalize_version(version: str) -> str:
+    # nmap adds distribution info after the version: "7.4p1 Debian 10+deb9u7"
+    parts = version.strip().split()
+    return parts[0].lower() if parts else ""
+
+
+def parse_cpe(cpe: str) -> tuple[str, str, str] | None:
+    """(vendor, product, version) of a CPE 2.2 or 2.3 name, version includes the update field."""
+    if cpe.startswith("cpe:2.3:"):
+        parts = _CPE_SEPARATOR.split(cpe)[3:7]
+    elif cpe.startswith("cpe:/"):
+        parts = cpe[5:].split(":")[1:5]
+    else:
+        return None
+    parts = [part.replace("\\", "").lower() for part in parts] + [""] * (4 - len(parts))
+    vendor, product, version, update = parts
+    if not product:
+        return None
+    if version in ("*", "-"):
+        version = ""
+    elif update and update not in ("*", "-"):
+        version += update
+    return vendor, product, version
+
+
+def build_index(feed_paths: Iterable[str], index_path: str) -> int:
+    """Build an index file from NVD 2.0 JSON feeds, later feeds replace earlier records of a CVE. Returns the CVE count."""
+    records: dict[str, tuple[int, str, list[tuple[str, str, bytes, bytes, int]]]] = {}
+    for path in feed_paths:
+        for vulnerability in _read_feed(path):
+            record = _parse_cve(vulnerability.get("cve") or {})
+            if record:
+                records[record[0]] = record[1:]
+
+    strings = bytearray()
+    string_offsets: dict[bytes, int] = {}
+
+    def add_string(value: bytes) -> tuple[int, int]:
+        if value not in string_offsets:
+            string_offsets[value] = len(strings)
+            strings.extend(value)
+        return string_offsets[value], len(value)
+
+    cve_table = bytearray()
+    products: dict[str, list[tuple[str, bytes, bytes, int, int]]] = {}
+    for number, (cve_id, (cvss, summary, ranges)) in enumerate(sorted(records.items())):
+        cve_table += _CVE.pack(
+            *add_string(cve_id.encode()), cvss, *add_string(summary.encode()[:SUMMARY_MAX_LEN])
+        )
+        for vendor, product, start, end, flags in ranges:
+            products.setdefault(product, []).append((vendor, start, end, flags, number))
+
+    product_table = bytearray()
+    range_table = bytearray()
+    range_count = 0
+    for product in sorted(products, key=str.encode):
+        entries = sorted(set(products[product]))
+        exact = [e for e in entries if e[1] == e[2] and e[1] and e[3] == _START_INCLUDED | _END_INCLUDED]
+        exact.sort(key=lambda e: e[1])
+        other = [e for e in entries if not (e[1] == e[2] and e[1] and e[3] == _START_INCLUDED | _END_INCLUDED)]
+        product_table += _PRODUCT.pack(*add_string(product.encode()), range_count, len(exact), len(entries))
+        for vendor, start, end, flags, number in exact + other:
+            range_table += _RANGE.pack(
+                *add_string(vendor.encode()), *add_string(start), *add_string(end), flags, number
+            )
+        range_count += len(entries)
+
+    products_off = _HEADER.size + len(cve_table)
+    ranges_off = products_off + len(product_table)
+    strings_off = ranges_off + len(range_table)
+    header = _HEADER.pack(
+        _MAGIC, len(records), len(products), range_count, products_off, ranges_off, strings_off
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        for part in (header, cve_table, product_table, range_table, strings):
+            file.write(part)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+_indexes: dict[str, tuple[tuple[int, int], CveIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(index_path: str = INDEX_FILE, feeds_folder: str | None = FEEDS_FOLDER) -> CveIndex | None:
+    """
+    Shared index for the path, rebuilt from feeds_folder when a feed is newer than the index.
+    Returns None when there is neither an index nor any feed.
+    """
+    with _indexes_lock:
+        feeds = list_feeds(feeds_folder) if feeds_folder else []
+        stamp = _stamp(index_path)
+        if feeds and (stamp is None or max(os.path.getmtime(f) for f in feeds) > os.path.getmtime(index_path)):
+            build_index(feeds, index_path)
+            stamp = _stamp(index_path)
+        if stamp is None:
+            return None
+        cached = _indexes.get(index_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        # a replaced index is left to the garbage collector, other threads may still read it
+        index = CveIndex(index_path)
+        _indexes[index_path] = (stamp, index)
+        return index
+
+
+def list_feeds(folder: str) -> list[str]:
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if name.endswith((".json", ".json.gz"))
+    )
+
+
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_feed(path: str) -> Iterator[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        data = json.load(file)
+    yield from data.get("vulnerabilities") or []
+
+
+def _parse_cve(cve: dict):
+    cve_id = cve.get("id")
+    if not cve_id:
+        return None
+    summary = next(
+        (d.get("value", "") for d in cve.get("descriptions") or [] if d.get("lang") == "en"), ""
+    )
+    ranges = []
+    for configuration in cve.get("configurations") or []:
+        for node in configuration.get("nodes") or []:
+            if node.get("negate"):
+                continue
+            for match in node.get("cpeMatch") or []:
+                if match.get("vulnerable"):
+                    parsed = _parse_cpe_match(match)
+                    if parsed:
+                        ranges.append(parsed)
+    return cve_id, _parse_cvss(cve.get("metrics") or {}), " ".join(summary.split()), ranges
+
+
+def _parse_cpe_match(match: dict) -> tuple[str, str, bytes, bytes, int] | None:
+    parsed = parse_cpe(match.get("criteria", ""))
+    if not parsed:
+        return None
+    vendor, product, version = parsed
+    start = match.get("versionStartIncluding") or match.get("versionStartExcluding")
+    end = match.get("versionEndIncluding") or match.get("versionEndExcluding")
+    if start or end:
+        flags = (_START_INCLUDED if match.get("versionStartIncluding") else 0) | (
+            _END_INCLUDED if match.get("versionEndIncluding") else 0
+        )
+        return (
+            vendor, product,
+            version_key(start) if start else b"",
+            version_key(end) if end else b"",
+            flags,
+        )
+    criteria_version = _CPE_SEPARATOR.split(match.get("criteria", ""))[5:6]
+    if criteria_version == ["-"]:
+        return None  # not applicable, the CPE has no versions
+    if not version:
+        return vendor, product, b"", b"", 0  # all versions
+    key = version_key(version)
+    return vendor, product, key, key, _START_INCLUDED | _END_INCLUDED
+
+
+def _parse_cvss(metrics: dict) -> int:
+    for name in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV40", "cvssMetricV2"):
+        entries = metrics.get(name) or []
+        entries = sorted(entries, key=lambda e: e.get("type") != "Primary")
+        for entry in entries:
+            score = (entry.get("cvssData") or {}).get("baseScore")
+            if score is not None:
+                return int(round(float(score) * 10))
+    return _NO_CVSS
@@ -1,4 +1,5 @@
 import json
+import re
 
 def try_parse(json_string: str):
     try:
@@ -25,6 +26,13 @@ class DirtyJson:
         self.current_char = None
         self.result = None
         self.stack = []
+        # incremental (feed) state
+        self._frames: list[_Frame] = []
+        self._token: _Token | None = None
+        self._started = False
+        self._done = False
+        self._fed = 0
+        self._fed_tail = ""
 
     @staticmethod
     def parse_string(json_string):
@@ -51,12 +59,279 @@ class DirtyJson:
         self._parse()
         return self.result
 
-    def feed(self, chunk):
-        self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
-        return self.result
+    def feed(self, chunk: str):
+        """Parse the next chunk of a streamed document, resuming where the
+        previous call stopped. Returns a snapshot of the value parsed so far,
+        including the partial value currently being read."""
+        self._fed += len(chunk)
+        self._fed_tail = (self._fed_tail + chunk)[-_FEED_TAIL:]
+        # keep only the unconsumed remainder, consumed text is never revisited
+        self.json_string = self.json_string[self.index :] + chunk
+        self.index = 0
+        self._feed_parse()
+        return self._snapshot()
+
+    def feed_full(self, text: str):
+        """Feed the whole accumulated text of a stream, only the part not seen
+        yet is parsed. Starts over if text does not continue what was fed."""
+        if not self._continues(text):
+            self._reset()
+        return self.feed(text[self._fed :])
+
+    def _continues(self, text: str) -> bool:
+        if len(text) < self._fed:
+            return False
+        return text.startswith(self._fed_tail, self._fed - len(self._fed_tail))
+
+    def _feed_parse(self):
+        s = self.json_string
+        i = self.index
+        n = len(s)
+        while i < n and not self._done:
+            if self._token is not None:
+                i = self._feed_token(s, i)
+                if self._token is not None:
+                    break  # token needs more input
+                continue
+
+            if not self._started:
+                # same start rule as get_start_pos, skip leading prose
+                match = _START_RE.search(s, i)
+                if not match:
+                    i = n
+                    break
+                i = match.start()
+                self._started = True
+
+            match = _WS_RE.match(s, i)
+            if match:
+                i = match.end()
+                continue
+
+            c = s[i]
+            if c == "/":
+                if i + 1 >= n:
+                    break  # need to see whether a comment starts
+                if s[i + 1] in "/*":
+                    self._token = _Token("comment", s[i + 1])
+                    i += 2
+                    continue
+
+            frame = self._frames[-1] if self._frames else None
+            state = frame.state if frame else _VALUE
+            new_i = self._feed_structural(s, i, frame, state)
+            if new_i < 0:
+                break  # lookahead needs more input
+            i = new_i
+        self.index = i
+
+    def _feed_structural(self, s: str, i: int, frame, state: int) -> int:
+        c = s[i]
+        if frame is not None and frame.is_object:
+            if state == _KEY:
+                if c == "}":
+                    return self._feed_close(s, i)
+                if c == ",":
+                    return i + 1
+                if c in "\"'":
+                    self._token = _Token("key", c)
+                    return i + 1
+                self._token = _Token("key_unquoted")
+                return i
+            if state == _COLON:
+                frame.state = _VALUE
+                return i + 1 if c == ":" else i
+            if state == _NEXT:
+                if c == "}":
+                    return self._feed_close(s, i)
+                frame.state = _KEY
+                return i + 1 if c == "," else i
+            # _VALUE
+            if c == ",":
+                self._feed_value(None)
+                frame.state = _KEY
+                return i + 1
+            if c == "}":
+                self._feed_value(None)
+                return self._feed_close(s, i)
+        elif frame is not None:
+            if c == "]":
+                return self._feed_close(s, i)
+            if c == ",":
+                frame.state = _VALUE
+                return i + 1
+            if state == _NEXT:
+                frame.state = _VALUE
+
+        # start of a value
+        if c == "{":
+            if i + 1 >= len(s):
+                return -1
+            double = s[i + 1] == "{"
+            self._feed_open({}, double)
+            return i + 2 if double else i + 1
+        if c == "[":
+            self._feed_open([], False)
+            return i + 1
+        if c in "\"'`":
+            # only wait for more input while the quote may still become a triple quote
+            if i + 2 >= len(s) and s[i + 1 :] in ("", c):
+                return -1
+            if i + 2 < len(s) and s[i + 1] == c and s[i + 2] == c:
+                self._token = _Token("multiline", c)
+                return i + 3
+            self._token = _Token("string", c)
+            return i + 1
+        if c.isdigit() or c in "-+":
+            self._token = _Token("number")
+            return i
+        self._token = _Token("unquoted")
+        return i
+
+    def _feed_token(self, s: str, i: int) -> int:
+        token = self._token
+        assert token is not None
+        n = len(s)
+        kind = token.kind
+
+        if kind == "comment":
+            end = s.find("\n" if token.quote == "/" else "*/", i)
+            if end < 0:
+                # a trailing "*" may start the closing "*/"
+                return n if token.quote == "/" else max(i, n - 1)
+            self._token = None
+            return end + (1 if token.quote == "/" else 2)
+
+        if kind in ("string", "key"):
+            pattern = _STRING_STOP[token.quote]
+            while i < n:
+                match = pattern.search(s, i)
+                end = match.start() if match else n
+                if end > i:
+                    token.parts.append(s[i:end])
+                i = end
+                if i >= n:
+                    return i
+                if s[i] == token.quote:
+                    self._feed_token_done(token.text())
+                    return i + 1
+                # escape sequence
+                if i + 1 >= n:
+                    return i
+                esc = s[i + 1]
+                if esc in _ESCAPES:
+                    token.parts.append(_ESCAPES[esc])
+                    i += 2
+                elif esc == "u":
+                    digits = ""
+                    j = i + 2
+                    while len(digits) < 4 and j < n and s[j].isalnum():
+                        digits += s[j]
+                        j += 1
+                    if len(digits) < 4 and j >= n:
+                        return i  # wait for the remaining digits
+                    if len(digits) < 4:
+                        # not a full escape, keep it literally and end the string
+                        token.parts.append("\\u" + digits)
+                        self._feed_token_done(token.text())
+                        return j
+                    try:
+                        token.parts.append(chr(int(digits, 16)))
+                    except ValueError:
+                        token.parts.append("\\u" + digits)
+                    i = j
+                else:
+                    i += 2  # unknown escapes are dropped, same as parse()
+            return i
+
+        if kind == "multiline":
+            end = s.find(token.quote * 3, i)
+            if end < 0:
+                # keep the last two chars, they may start the closing quotes
+                keep = max(i, n - 2)
+                if keep > i:
+                    token.parts.append(s[i:keep])
+                return keep
+            token.parts.append(s[i:end])
+            self._feed_token_done(token.text().strip())
+            return end + 3
+
+        pattern = _TOKEN_STOP[kind]
+        match = pattern.search(s, i)
+        end = match.start() if match else n
+        token.parts.append(s[i:end])
+        if end < n:
+            self._feed_token_done(token.value())
+        return end
+
+    def _feed_token_done(self, value):
+        token = self._token
+        self._token = None
+        frame = self._frames[-1] if self._frames else None
+        if token is not None and token.kind in ("key", "key_unquoted"):
+            assert frame is not None
+            frame.key = value
+            frame.state = _COLON
+            return
+        self._feed_value(value)
+
+    def _feed_value(self, value):
+        if not self._frames:
+            self.result = value
+            self._done = True
+            return
+        frame = self._frames[-1]
+        if frame.is_object:
+            frame.container[frame.key] = value
+        else:
+            frame.container.append(value)
+        frame.state = _NEXT
+
+    def _feed_open(self, container, double: bool):
+        self._feed_value(container)
+        self._done = False
+        self._frames.append(_Frame(container, double))
+
+    def _feed_close(self, s: str, i: int) -> int:
+        frame = self._frames[-1]
+        if frame.double:
+            if i + 1 >= len(s):
+                return -1
+            if s[i + 1] == "}":
+                i += 1
+        self._frames.pop()
+        if not self._frames:
+            self._done = True
+        return i + 1
+
+    def _snapshot(self):
+        token = self._token
+        partial = _MISSING
+        if token is not None and token.kind not in ("comment", "key", "key_unquoted"):
+            partial = token.value(partial=True)
+
+        if not self._frames:
+            return self.result if partial is _MISSING else partial
+
+        # copy only the containers still being built, closed ones are shared
+        child = _MISSING
+        for frame in reversed(self._frames):
+            if frame.is_object:
+                copy = dict(frame.container)
+                if child is not _MISSING:
+                    copy[frame.key] = child
+                elif token is not None and token.kind in ("key", "key_unquoted"):
+                    copy[token.text()] = None
+                elif frame.state in (_COLON, _VALUE):
+                    copy[frame.key] = None if partial is _MISSING else partial
+            else:
+                copy = list(frame.container)
+                if child is not _MISSING:
+                    copy[-1] = child
+                elif partial is not _MISSING:
+                    copy.append(partial)
+            child = copy
+        return child
 
     def _advance(self, count=1):
         self.index += count
@@ -333,3 +608,72 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+# incremental parser states
+_VALUE, _KEY, _COLON, _NEXT = range(4)
+_MISSING = object()
+_FEED_TAIL = 64
+
+_START_RE = re.compile(r'[{\["]')
+_WS_RE = re.compile(r"\s+")
+_STRING_STOP = {q: re.compile(r"[\\" + q + "]") for q in ("\"", "'", "`")}
+_TOKEN_STOP = {
+    "number": re.compile(r"[^0-9+\-.eE]"),
+    "unquoted": re.compile(r"[:,}\]]"),
+    "key_unquoted": re.compile(r"[\s:,}\]]"),
+}
+_ESCAPES = {
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+_LITERALS = {"true": True, "false": False, "null": None, "undefined": None}
+
+
+class _Frame:
+    __slots__ = ("container", "is_object", "double", "key", "state")
+
+    def __init__(self, container, double: bool):
+        self.container = container
+        self.is_object = isinstance(container, dict)
+        self.double = double
+        self.key = None
+        self.state = _KEY if self.is_object else _VALUE
+
+
+class _Token:
+    __slots__ = ("kind", "quote", "parts")
+
+    def __init__(self, kind: str, quote: str = ""):
+        self.kind = kind
+        self.quote = quote
+        self.parts: list[str] = []
+
+    def text(self) -> str:
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+    def value(self, partial: bool = False):
+        text = self.text()
+        if self.kind == "number":
+            try:
+                return int(text)
+            except ValueError:
+                try:
+                    return float(text)
+                except ValueError:
+                    return None if partial else text
+        if self.kind == "unquoted":
+            text = text.strip()
+            return _LITERALS.get(text.lower(), text)
+        if self.kind == "multiline":
+            return text.strip()
+        return text
@@ -1,4 +1,8 @@
 from abc import abstractmethod
+import os
+import threading
+import time
+import weakref
 from typing import Any
 from python.helpers import extract_tools, files
 from typing import TYPE_CHECKING
@@ -10,11 +14,18 @@ if TYPE_CHECKING:
 DEFAULT_EXTENSIONS_FOLDER = "python/extensions"
 USER_EXTENSIONS_FOLDER = "usr/extensions"
 
+# how often extension folders are checked for changes, in seconds
+CHANGE_CHECK_INTERVAL = 1.0
+
 _cache: dict[str, list[type["Extension"]]] = {}
 
 
 class Extension:
 
+    # reuse one instance per agent instead of creating one per call,
+    # only for extensions that keep no per-call state on self
+    reusable: bool = False
+
     def __init__(self, agent: "Agent|None", **kwargs):
         self.agent: "Agent" = agent  # type: ignore < here we ignore the type check as there are currently no extensions without an agent
         self.kwargs = kwargs
@@ -24,11 +35,94 @@ class Extension:
         pass
 
 
+class _DispatchTable:
+    """Ordered extension classes per extension point for one profile and project."""
+
+    def __init__(self, roots: list[str]):
+        self.roots = roots
+        self.stamp = _folders_stamp(roots)
+        self.checked = time.monotonic()
+        self.points: dict[str, list[type[Extension]]] = {}
+
+
+# (profile, project) -> dispatch table
+_tables: dict[tuple[str, str], _DispatchTable] = {}
+# agent -> reusable extension instances
+_instances: "weakref.WeakKeyDictionary[Agent, dict[type[Extension], Extension]]" = (
+    weakref.WeakKeyDictionary()
+)
+# "extension_point/file" -> {"calls", "total_ms", "max_ms"}
+_timings: dict[str, dict[str, float]] = {}
+_lock = threading.RLock()
+
+
 async def call_extensions(
     extension_point: str, agent: "Agent|None" = None, **kwargs
 ) -> Any:
+    classes = _get_classes(extension_point, agent)
+    if not classes:
+        return
+
+    # execute unique extensions
+    for cls in classes:
+        start = time.perf_counter()
+        await _get_instance(cls, agent).execute(**kwargs)
+        _record_timing(extension_point, cls, time.perf_counter() - start)
+
+
+def get_timings() -> dict[str, dict[str, float]]:
+    """Per extension ("extension_point/file"): number of calls, total and max time in ms."""
+    with _lock:
+        return {name: dict(timing) for name, timing in _timings.items()}
+
+
+def clear_cache():
+    """Drops loaded extension classes, dispatch tables and reused instances."""
+    with _lock:
+        _cache.clear()
+        _tables.clear()
+        _instances.clear()
+
+
+def _get_classes(extension_point: str, agent: "Agent|None") -> list[type[Extension]]:
+    table = _get_table(agent)
+    classes = table.points.get(extension_point)
+    if classes is None:
+        classes = _resolve_classes(extension_point, agent)
+        with _lock:
+            table.points[extension_point] = classes
+    return classes
+
+
+def _get_table(agent: "Agent|None") -> _DispatchTable:
     from python.helpers import projects, subagents
 
+    profile = (agent.config.profile or "") if agent else ""
+    project = (projects.get_context_project_name(agent.context) or "") if agent else ""
+    key = (profile, project)
+
+    with _lock:
+        table = _tables.get(key)
+        if table:
+            now = time.monotonic()
+            if now - table.checked < CHANGE_CHECK_INTERVAL:
+                return table
+            table.checked = now
+            if _folders_stamp(table.roots) == table.stamp:
+                return table
+            # extension files changed, reload everything from disk
+            clear_cache()
+
+        roots = subagents.get_paths(
+            agent, "extensions", must_exist_completely=False, default_root="python"
+        )
+        table = _tables[key] = _DispatchTable(roots)
+        return table
+
+
+def _resolve_classes(extension_point: str, agent: "Agent|None") -> list[type[Extension]]:
+    from python.helpers import subagents
+
     # search for extension folders in all agent's paths
     paths = subagents.get_paths(agent, "extensions", extension_point, default_root="python")
     all_exts = [cls for path in paths for cls in _get_extensions(path)]
@@ -39,13 +133,55 @@ async def call_extensions(
         file = _get_file_from_module(cls.__module__)
         if file not in unique:
             unique[file] = cls
-    classes = sorted(
+    return sorted(
         unique.values(), key=lambda cls: _get_file_from_module(cls.__module__)
     )
 
-    # execute unique extensions
-    for cls in classes:
-        await cls(agent=agent).execute(**kwargs)
+
+def _get_instance(cls: type[Extension], agent: "Agent|None") -> Extension:
+    if not cls.reusable or agent is None:
+        return cls(agent=agent)
+    with _lock:
+        instances = _instances.setdefault(agent, {})
+        instance = instances.get(cls)
+        if instance is None:
+            instance = instances[cls] = cls(agent=agent)
+        return instance
+
+
+def _record_timing(extension_point: str, cls: type[Extension], seconds: float):
+    ms = seconds * 1000
+    name = f"{extension_point}/{_get_file_from_module(cls.__module__)}"
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+        timing["calls"] += 1
+        timing["total_ms"] += ms
+        if ms > timing["max_ms"]:
+            timing["max_ms"] = ms
+
+
+def _folders_stamp(roots: list[str]) -> tuple[int, float]:
+    """Number of entries and latest mtime of all extension folders and files under roots."""
+    count = 0
+    latest = 0.0
+    stack = list(roots)
+    while stack:
+        folder = stack.pop()
+        try:
+            latest = max(latest, os.stat(folder).st_mtime)
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if entry.name != "__pycache__":
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".py"):
+                        count += 1
+                        latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            continue
+    return count, latest
 
 
 def _get_file_from_module(module_name: str) -> str:
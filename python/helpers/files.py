@@ -15,7 +15,19 @@ import importlib.util
 import inspect
 import glob
 import mimetypes
+import time
 from simpleeval import simple_eval
+from python.helpers import prompt_template
+
+# how long resolved prompt paths are trusted before the directories are probed again, in seconds
+PATH_CHECK_INTERVAL = 1.0
+
+# (filename, directories) -> (absolute path or None, resolved at)
+_paths: dict[tuple[str, tuple[str, ...]], tuple[str | None, float]] = {}
+# (absolute path, kind, encoding) -> (mtime, size, parsed content)
+_templates: dict[tuple[str, str, str], tuple[int, int, Any]] = {}
+# plugin file -> (mtime, VariablesPlugin classes)
+_plugin_classes: dict[str, tuple[int, list[type["VariablesPlugin"]]]] = {}
 
 
 class VariablesPlugin(ABC):
@@ -33,22 +45,13 @@ def load_plugin_variables(
     if backup_dirs is None:
         backup_dirs = []
 
-    try:
-        # Create filename and directories list
-        plugin_filename = basename(file, ".md") + ".py"
-        directories = [dirname(file)] + backup_dirs
-        plugin_file = find_file_in_dirs(plugin_filename, directories)
-    except FileNotFoundError:
-        plugin_file = None
-
-    if plugin_file and exists(plugin_file):
+    # Create filename and directories list
+    plugin_filename = basename(file, ".md") + ".py"
+    directories = [dirname(file)] + backup_dirs
+    plugin_file = _find_cached(plugin_filename, directories)
 
-        from python.helpers import extract_tools
-
-        classes = extract_tools.load_classes_from_file(
-            plugin_file, VariablesPlugin, one_per_file=False
-        )
-        for cls in classes:
+    if plugin_file:
+        for cls in _get_plugin_classes(plugin_file):
             return cls().get_variables(file, backup_dirs, **kwargs)  # type: ignore < abstract class here is ok, it is always a subclass
 
         # load python code and extract variables variables from it
@@ -90,13 +93,9 @@ def parse_file(
     # Find the file in the directories
     absolute_path = find_file_in_dirs(_filename, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Read and parse the file content, cached until the file changes
+    is_json, content, nodes = _get_template(absolute_path, "parse", _encoding)
 
-    is_json = is_full_json_template(content)
-    content = remove_code_fences(content)
     variables = load_plugin_variables(absolute_path, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
     if is_json:
@@ -105,6 +104,15 @@ def parse_file(
         # obj = replace_placeholders_dict(obj, **variables)
         return obj
     else:
+        try:
+            return prompt_template.render(
+                # here we use kwargs for includes, the plugin variables are not inherited
+                nodes,
+                variables,
+                lambda path: read_prompt_file(path, _directories, **kwargs),
+            )
+        except prompt_template.UnresolvedTags:
+            pass
         content = replace_placeholders_text(content, **variables)
         # Process include statements
         content = process_includes(
@@ -131,21 +139,26 @@ def read_prompt_file(
     # Find the file in the directories
     absolute_path = find_file_in_dirs(_file, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Read and compile the file content, cached until the file changes
+    content, nodes = _get_template(absolute_path, "prompt", _encoding)
 
     variables = load_plugin_variables(_file, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
 
-    # evaluate conditions
-    content = evaluate_text_conditions(content, **variables)
+    # evaluate conditions, replace placeholders and process includes in one pass
+    try:
+        return prompt_template.render(
+            # here we use kwargs for includes, the plugin variables are not inherited
+            nodes,
+            variables,
+            lambda path: read_prompt_file(path, _directories, **kwargs),
+        )
+    except prompt_template.UnresolvedTags:
+        pass
 
-    # Replace placeholders with values from kwargs
+    # a value contains {{...}} itself, keep the sequential passes for it
+    content = evaluate_text_conditions(content, **variables)
     content = replace_placeholders_text(content, **variables)
-
-    # Process include statements
     content = process_includes(
         # here we use kwargs, the plugin variables are not inherited
         content,
@@ -156,10 +169,57 @@ def read_prompt_file(
     return content
 
 
+def _get_template(absolute_path: str, kind: Literal["prompt", "parse"], encoding: str):
+    stat = os.stat(absolute_path)
+    key = (absolute_path, kind, encoding)
+    cached = _templates.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    # Read the file content
+    with open(absolute_path, "r", encoding=encoding) as f:
+        content = f.read()
+
+    if kind == "prompt":
+        parsed: Any = (content, prompt_template.compile_template(content))
+    else:
+        is_json = is_full_json_template(content)
+        content = remove_code_fences(content)
+        nodes = None if is_json else prompt_template.compile_template(content, conditions=False)
+        parsed = (is_json, content, nodes)
+
+    _templates[key] = (stat.st_mtime_ns, stat.st_size, parsed)
+    return parsed
+
+
+def _get_plugin_classes(plugin_file: str) -> list[type[VariablesPlugin]]:
+    try:
+        mtime = os.stat(plugin_file).st_mtime_ns
+    except OSError:
+        return []
+    cached = _plugin_classes.get(plugin_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    from python.helpers import extract_tools
+
+    classes = extract_tools.load_classes_from_file(
+        plugin_file, VariablesPlugin, one_per_file=False
+    )
+    _plugin_classes[plugin_file] = (mtime, classes)
+    return classes
+
+
+def clear_prompt_cache():
+    _paths.clear()
+    _templates.clear()
+    _plugin_classes.clear()
+
+
 def evaluate_text_conditions(_content: str, **kwargs):
     # search for {{if ...}} ... {{endif}} blocks and evaluate conditions with nesting support
-    if_pattern = re.compile(r"{{\s*if\s+(.*?)}}", flags=re.DOTALL)
-    token_pattern = re.compile(r"{{\s*(if\b.*?|endif)\s*}}", flags=re.DOTALL)
+    if_pattern = prompt_template.IF_PATTERN
+    token_pattern = prompt_template.CONDITION_TOKEN_PATTERN
 
     def _process(text: str) -> str:
         m_if = if_pattern.search(text)
@@ -316,7 +376,7 @@ def replace_placeholders_dict(_content: dict, **kwargs):
 
 def process_includes(_content: str, _directories: list[str], **kwargs):
     # Regex to find {{ include 'path' }} or {{include'path'}}
-    include_pattern = re.compile(r"{{\s*include\s*['\"](.*?)['\"]\s*}}")
+    include_pattern = prompt_template.INCLUDE_PATTERN
 
     def replace_include(match):
         include_path = match.group(1)
@@ -339,17 +399,36 @@ def find_file_in_dirs(_filename: str, _directories: list[str]):
     This function searches for a filename in a list of directories in order.
     Returns the absolute path of the first found file.
     """
+    full_path = _find_cached(_filename, _directories)
+    if full_path:
+        return full_path
+
+    # If the file is not found, raise FileNotFoundError
+    raise FileNotFoundError(
+        f"File '{_filename}' not found in any of the provided directories."
+    )
+
+
+def _find_cached(_filename: str, _directories: list[str]) -> str | None:
+    key = (_filename, tuple(_directories))
+    now = time.monotonic()
+    cached = _paths.get(key)
+    if cached and now - cached[1] < PATH_CHECK_INTERVAL and (
+        cached[0] is None or os.path.exists(cached[0])
+    ):
+        return cached[0]
+
+    found = None
     # Loop through the directories in order
     for directory in _directories:
         # Create full path
         full_path = get_abs_path(directory, _filename)
         if exists(full_path):
-            return full_path
+            found = full_path
+            break
 
-    # If the file is not found, raise FileNotFoundError
-    raise FileNotFoundError(
-        f"File '{_filename}' not found in any of the provided directories."
-    )
+    _paths[key] = (found, now)
+    return found
 
 
 def get_unique_filenames_in_dirs(dir_paths: list[str], pattern: str = "*", type: Literal["file", "dir", "any"] = "file"):
@@ -92,7 +92,7 @@ class Message(Record):
 
     def calculate_tokens(self):
         text = self.output_text()
-        return tokens.approximate_tokens(text)
+        return tokens.approximate_tokens_cached(text)
 
     def set_summary(self, summary: str):
         self.summary = summary
@@ -136,7 +136,7 @@ class Topic(Record):
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return tokens.approximate_tokens_cached(self.summary)
         else:
             return sum(msg.get_tokens() for msg in self.messages)
 
@@ -193,6 +193,7 @@ class Topic(Record):
                 )
                 msg.set_summary(_json_dumps(trunc))
 
+            self.history.revision += 1
             return True
         return False
 
@@ -217,6 +218,7 @@ class Topic(Record):
         )
         sum_msg = Message(False, sum_msg_content)
         self.messages[1 : cnt_to_sum + 1] = [sum_msg]
+        self.history.revision += 1
         return True
 
     async def summarize_messages(self, messages: list[Message]):
@@ -254,7 +256,7 @@ class Bulk(Record):
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return tokens.approximate_tokens_cached(self.summary)
         else:
             return sum([r.get_tokens() for r in self.records])
 
@@ -300,6 +302,8 @@ class History(Record):
         from agent import Agent
 
         self.counter = 0
+        # bumped after existing records change, appending messages leaves it as is
+        self.revision = 0
         self.bulks: list[Bulk] = []
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
@@ -336,6 +340,7 @@ class History(Record):
         if self.current.messages:
             self.topics.append(self.current)
             self.current = Topic(history=self)
+            self.revision += 1
 
     def output(self) -> list[OutputMessage]:
         result: list[OutputMessage] = []
@@ -437,6 +442,7 @@ class History(Record):
             await bulk.summarize()
             self.bulks.append(bulk)
             self.topics[:count] = []
+            self.revision += 1
             return True
         return False
 
@@ -446,6 +452,7 @@ class History(Record):
         # remove oldest bulk if necessary
         if not compressed:
             self.bulks.pop(0)
+            self.revision += 1
             return True
         return compressed
 
@@ -461,6 +468,7 @@ class History(Record):
             ]
         )
         self.bulks = bulks
+        self.revision += 1
         return True
 
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
@@ -7,7 +7,7 @@ from python.helpers import errors
 from python.helpers import runtime
 
 
-SLEEP_TIME = 60
+SLEEP_TIME = 60  # longest sleep, changes by other instances are picked up after it
 
 keep_running = True
 pause_time = 0
@@ -29,9 +29,12 @@ async def run_loop():
         if keep_running:
             try:
                 await scheduler_tick()
+                # sleeps until the next task is due, wakes up early when tasks change
+                await TaskScheduler.get().wait_for_due(SLEEP_TIME)
+                continue
             except Exception as e:
                 PrintStyle().error(errors.format_error(e))
-        await asyncio.sleep(SLEEP_TIME)  # TODO! - if we lower it under 1min, it can run a 5min job multiple times in it's target minute
+        await asyncio.sleep(SLEEP_TIME)
 
 
 async def scheduler_tick():
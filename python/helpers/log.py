@@ -7,7 +7,7 @@ from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Literal, Optional, TYPE_CHECKING, TypeVar, cast
 
-from python.helpers.secrets import get_secrets_manager
+from python.helpers.secrets import get_secrets_manager, MASK_MIN_LENGTH
 from python.helpers.strings import truncate_text_by_ratio
 
 
@@ -68,6 +68,8 @@ RESPONSE_CONTENT_MAX_LEN: int = 250_000
 KEY_MAX_LEN: int = 60
 VALUE_MAX_LEN: int = 5000
 PROGRESS_MAX_LEN: int = 120
+# max number of items tracked in the update journal, older entries are compacted
+JOURNAL_RETENTION: int = 1000
 
 
 def _truncate_heading(text: str | None) -> str:
@@ -211,11 +213,15 @@ class LogItem:
 
 class Log:
 
-    def __init__(self):
+    def __init__(self, journal_retention: int = JOURNAL_RETENTION):
         self._lock = threading.RLock()
         self.context: "AgentContext|None" = None  # set from outside
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
+        # update journal: item no -> version of its latest update, oldest first
+        self.version: int = 0
+        self.journal_retention = journal_retention
+        self._journal: OrderedDict[int, int] = OrderedDict()
+        self._journal_floor: int = 0  # versions up to this one were compacted
         self.logs: list[LogItem] = []
         self.progress: str = ""
         self.progress_no: int = 0
@@ -331,7 +337,7 @@ class Log:
                     item.kvps = OrderedDict()
                 item.kvps.update(kwargs_out)
 
-            self.updates.append(item.no)
+            self._record_update(item.no)
 
             if item.heading and item.update_progress != "none":
                 if item.no >= self.progress_no:
@@ -385,27 +391,40 @@ class Log:
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
-    def output(self, start=None, end=None):
+    def _record_update(self, no: int):
+        # caller holds the lock
+        self.version += 1
+        self._journal[no] = self.version
+        self._journal.move_to_end(no)
+        while len(self._journal) > self.journal_retention:
+            _, version = self._journal.popitem(last=False)
+            self._journal_floor = version
+
+    def output(self, start=None):
+        """Output items changed after version start, in item order."""
         with self._lock:
             if start is None:
                 start = 0
-            if end is None:
-                end = len(self.updates)
-            updates = self.updates[start:end]
+            if start < self._journal_floor:
+                # changes since start were compacted, send everything
+                changed = range(len(self.logs))
+            else:
+                changed = []
+                for no, version in reversed(self._journal.items()):
+                    if version <= start:
+                        break
+                    changed.append(no)
+                changed.sort()
             logs = list(self.logs)
 
-        out = []
-        seen = set()
-        for update in updates:
-            if update not in seen and update < len(logs):
-                out.append(logs[update].output())
-                seen.add(update)
-        return out
+        return [logs[no].output() for no in changed if no < len(logs)]
 
     def reset(self):
         with self._lock:
             self.guid = str(uuid.uuid4())
-            self.updates = []
+            self.version = 0
+            self._journal = OrderedDict()
+            self._journal_floor = 0
             self.logs = []
         self.set_initial_progress()
 
@@ -422,14 +441,22 @@ class Log:
             # if self_id != current_id:
             #     print(f"Context ID mismatch: {self_id} != {current_id}")
 
-            if isinstance(obj, str):
-                return cast(Any, secrets_mgr.mask_values(obj))
-            elif isinstance(obj, dict):
-                return {k: self._mask_recursive(v) for k, v in obj.items()}  # type: ignore
-            elif isinstance(obj, list):
-                return [self._mask_recursive(item) for item in obj]  # type: ignore
-            else:
+            # resolve the manager and its compiled matcher once for the whole object
+            matcher, _ = secrets_mgr.get_matcher(MASK_MIN_LENGTH)
+            if not matcher:
                 return obj
+            return _mask_with(secrets_mgr, obj)
         except Exception:
             # If masking fails, return original object
             return obj
+
+
+def _mask_with(secrets_mgr, obj: T) -> T:
+    if isinstance(obj, str):
+        return cast(Any, secrets_mgr.mask_values(obj))
+    elif isinstance(obj, dict):
+        return {k: _mask_with(secrets_mgr, v) for k, v in obj.items()}  # type: ignore
+    elif isinstance(obj, list):
+        return [_mask_with(secrets_mgr, item) for item in obj]  # type: ignore
+    else:
+        return obj
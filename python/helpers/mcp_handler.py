@@ -40,6 +40,7 @@ from anyio.streams.memory import (
 
 from pydantic import BaseModel, Field, Discriminator, Tag, PrivateAttr
 from python.helpers import dirty_json
+from python.helpers.mcp_session_pool import MCPSessionPool
 from python.helpers.print_style import PrintStyle
 from python.helpers.tool import Tool, Response
 
@@ -81,6 +82,19 @@ def _is_streaming_http_type(server_type: str) -> bool:
     return server_type.lower() in ["http-stream", "streaming-http", "streamable-http", "http-streaming"]
 
 
+# incremented when servers or their tools change, lets dependent caches detect it
+_config_version = 0
+
+
+def get_config_version() -> int:
+    return _config_version
+
+
+def _bump_config_version():
+    global _config_version
+    _config_version += 1
+
+
 def initialize_mcp(mcp_servers_config: str):
     if not MCPConfig.get_instance().is_initialized():
         try:
@@ -260,8 +274,17 @@ class MCPServerRemote(BaseModel):
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # the lock is not held while awaiting, calls run concurrently on pooled sessions
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self.__lock:
+            return self.__client.get_metrics()  # type: ignore
+
+    def close(self):
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerRemote":
         with self.__lock:
@@ -338,8 +361,17 @@ class MCPServerLocal(BaseModel):
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # the lock is not held while awaiting, calls run concurrently on pooled sessions
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self.__lock:
+            return self.__client.get_metrics()  # type: ignore
+
+    def close(self):
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerLocal":
         with self.__lock:
@@ -489,6 +521,7 @@ class MCPConfig(BaseModel):
             #         )
 
             cls.__initialized = True
+            _bump_config_version()
             return instance
 
     @classmethod
@@ -516,6 +549,10 @@ class MCPConfig(BaseModel):
     def __init__(self, servers_list: List[Dict[str, Any]]):
         from collections.abc import Mapping, Iterable
 
+        # sessions of the servers being replaced are not reused
+        for server in self.__dict__.get("servers", []):
+            server.close()
+
         # # DEBUG: Print the received servers_list
         # if servers_list:
         #     PrintStyle(background_color="blue", font_color="white", padding=True).print(
@@ -700,6 +737,7 @@ class MCPConfig(BaseModel):
                         "name": server.name,
                         "description": server.description,
                         "tools": tools,
+                        "metrics": server.get_metrics(),
                     }
             return {}
 
@@ -799,8 +837,10 @@ class MCPConfig(BaseModel):
         with self.__lock:
             for server in self.servers:
                 if server.name == server_name_part and server.has_tool(tool_name_part):
-                    return await server.call_tool(tool_name_part, input_data)
-            raise ValueError(f"Tool {tool_name} not found")
+                    break
+            else:
+                raise ValueError(f"Tool {tool_name} not found")
+        return await server.call_tool(tool_name_part, input_data)
 
 
 T = TypeVar("T")
@@ -809,7 +849,7 @@ T = TypeVar("T")
 class MCPClientBase(ABC):
     # server: Union[MCPServerLocal, MCPServerRemote] # Defined in __init__
     # tools: List[dict[str, Any]] # Defined in __init__
-    # No self.session, self.exit_stack, self.stdio, self.write as persistent instance fields
+    # Sessions live in self.pool, created on first use
 
     __lock: ClassVar[threading.Lock] = threading.Lock()
 
@@ -819,6 +859,7 @@ class MCPClientBase(ABC):
         self.error: str = ""
         self.log: List[str] = []
         self.log_file: Optional[TextIO] = None
+        self.pool: Optional[MCPSessionPool] = None
 
     # Protected method
     @abstractmethod
@@ -831,68 +872,63 @@ class MCPClientBase(ABC):
         """Create stdio/write streams using the provided exit_stack."""
         ...
 
+    def _get_pool(self) -> MCPSessionPool:
+        with self.__lock:
+            if self.pool is None:
+                self.pool = MCPSessionPool(self.server.name, self._open_session)
+            return self.pool
+
+    async def _open_session(self, exit_stack: AsyncExitStack) -> ClientSession:
+        """Open a transport and an initialized session, closed by the exit_stack."""
+        set = settings.get_settings()
+        stdio, write = await self._create_stdio_transport(exit_stack)
+        session = await exit_stack.enter_async_context(
+            ClientSession(
+                stdio,  # type: ignore
+                write,  # type: ignore
+                read_timeout_seconds=timedelta(
+                    seconds=self.server.init_timeout
+                    or set["mcp_client_init_timeout"]
+                    or 60
+                ),
+            )
+        )
+        await session.initialize()
+        return session
+
     async def _execute_with_session(
         self,
         coro_func: Callable[[ClientSession], Awaitable[T]],
-        read_timeout_seconds=60,
     ) -> T:
         """
-        Manages the lifecycle of an MCP session for a single operation.
-        Creates a temporary session, executes coro_func with it, and ensures cleanup.
+        Executes coro_func with a pooled session of this server.
+        Sessions are opened on demand and reused by later operations.
         """
         operation_name = coro_func.__name__  # For logging
-        # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Creating new session for operation '{operation_name}'...")
-        # Store the original exception outside the async block
-        original_exception = None
         try:
-            async with AsyncExitStack() as temp_stack:
-                try:
-
-                    stdio, write = await self._create_stdio_transport(temp_stack)
-                    # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name} - {operation_name}): Transport created. Initializing session...")
-                    session = await temp_stack.enter_async_context(
-                        ClientSession(
-                            stdio,  # type: ignore
-                            write,  # type: ignore
-                            read_timeout_seconds=timedelta(
-                                seconds=read_timeout_seconds
-                            ),
-                        )
-                    )
-                    await session.initialize()
-
-                    result = await coro_func(session)
-
-                    return result
-                except Exception as e:
-                    # Store the original exception and raise a dummy exception
-                    excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
-                    if excs:
-                        original_exception = excs[0]
-                    else:
-                        original_exception = e
-                    # Create a dummy exception to break out of the async block
-                    raise RuntimeError("Dummy exception to break out of async block")
+            return await self._get_pool().run(coro_func)
         except Exception as e:
-            # Check if this is our dummy exception
-            if original_exception is not None:
-                e = original_exception
-            # We have the original exception stored
+            excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
+            if excs:
+                e = excs[0]
             PrintStyle(
                 background_color="#AA4455", font_color="white", padding=False
             ).print(
                 f"MCPClientBase ({self.server.name} - {operation_name}): Error during operation: {type(e).__name__}: {e}"
             )
-            raise e  # Re-raise the original exception
-        # finally:
-        #     PrintStyle(font_color="cyan").print(
-        #         f"MCPClientBase ({self.server.name} - {operation_name}): Session and transport will be closed by AsyncExitStack."
-        #     )
-        # This line should ideally be unreachable if the try/except/finally logic within the 'async with' is exhaustive.
-        # Adding it to satisfy linters that might not fully trace the raise/return paths through async context managers.
-        raise RuntimeError(
-            f"MCPClientBase ({self.server.name} - {operation_name}): _execute_with_session exited 'async with' block unexpectedly."
-        )
+            raise e
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Call latency and session setup metrics of the pooled sessions."""
+        with self.__lock:
+            pool = self.pool
+        return pool.output() if pool else {}
+
+    def close(self):
+        with self.__lock:
+            pool, self.pool = self.pool, None
+        if pool:
+            pool.close()
 
     async def update_tools(self) -> "MCPClientBase":
         # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Starting 'update_tools' operation...")
@@ -908,17 +944,13 @@ class MCPClientBase(ABC):
                     }
                     for tool in response.tools
                 ]
+            _bump_config_version()
             PrintStyle(font_color="green").print(
                 f"MCPClientBase ({self.server.name}): Tools updated. Found {len(self.tools)} tools."
             )
 
         try:
-            set = settings.get_settings()
-            await self._execute_with_session(
-                list_tools_op,
-                read_timeout_seconds=self.server.init_timeout
-                or set["mcp_client_init_timeout"],
-            )
+            await self._execute_with_session(list_tools_op)
         except Exception as e:
             # e = eg.exceptions[0]
             error_text = errors.format_error(e, 0, 0)
@@ -931,6 +963,7 @@ class MCPClientBase(ABC):
             with self.__lock:
                 self.tools = []  # Ensure tools are cleared on failure
                 self.error = f"Failed to initialize. {error_text[:200]}{'...' if len(error_text) > 200 else ''}"  # store error from tools fetch
+            _bump_config_version()
         return self
 
     def has_tool(self, tool_name: str) -> bool:
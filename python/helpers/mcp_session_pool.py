@@ -0,0 +1,248 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+import anyio
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from python.helpers.defer import EventLoopThread
+from python.helpers.print_style import PrintStyle
+
+T = TypeVar("T")
+
+# all pooled sessions live on one loop, anyio transports must be closed by the task that opened them
+POOL_THREAD = "MCPSessions"
+POOL_SIZE = 4  # sessions per server, more concurrent calls wait for a free one
+IDLE_TIMEOUT = 300.0  # seconds an unused session is kept open
+HEALTH_CHECK_AFTER = 30.0  # idle seconds after which a session is pinged before reuse
+HEALTH_CHECK_TIMEOUT = 5.0
+
+SessionFactory = Callable[[AsyncExitStack], Awaitable[ClientSession]]
+
+
+@dataclass
+class SessionMetrics:
+    calls: int = 0
+    errors: int = 0
+    call_seconds: float = 0.0
+    max_call_seconds: float = 0.0
+    sessions_opened: int = 0
+    setup_seconds: float = 0.0
+    reconnects: int = 0  # sessions dropped after a failed health check or transport error
+    evictions: int = 0  # sessions closed after IDLE_TIMEOUT
+
+    def output(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "avg_call_ms": self.call_seconds * 1000 / max(self.calls, 1),
+            "avg_setup_ms": self.setup_seconds * 1000 / max(self.sessions_opened, 1),
+        }
+
+
+class _PooledSession:
+    def __init__(self):
+        self.session: ClientSession | None = None
+        self.task: asyncio.Task | None = None
+        self.closing = asyncio.Event()
+        self.in_use = True
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    def is_alive(self) -> bool:
+        return (
+            self.task is not None
+            and not self.task.done()
+            and not self.closing.is_set()
+            and not self.broken
+        )
+
+
+class MCPSessionPool:
+    """Long-lived MCP client sessions of one server, shared by its tool calls."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: SessionFactory,
+        size: int = POOL_SIZE,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.metrics = SessionMetrics()
+        self._sessions: list[_PooledSession] = []
+        self._changed = asyncio.Condition()
+        self._reaper: asyncio.Task | None = None
+        self._closed = False
+
+    async def run(self, operation: Callable[[ClientSession], Awaitable[T]]) -> T:
+        """Run operation with a pooled session. Can be awaited from any event loop."""
+        future = EventLoopThread(POOL_THREAD).run_coroutine(self._run(operation))
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Close idle sessions now and sessions in use when their operation ends."""
+        self._closed = True
+        if self._sessions:
+            EventLoopThread(POOL_THREAD).run_coroutine(self._close())
+
+    def output(self) -> dict[str, Any]:
+        return {
+            **self.metrics.output(),
+            "open_sessions": len(self._sessions),
+            "sessions_in_use": sum(1 for s in self._sessions if s.in_use),
+        }
+
+    async def _run(self, operation: Callable[[ClientSession], Awaitable[T]]) -> T:
+        for attempt in range(2):
+            entry = await self._acquire()
+            start = time.perf_counter()
+            try:
+                return await operation(entry.session)  # type: ignore[arg-type]
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                # the request could not be sent, safe to repeat on a new session
+                entry.broken = True
+                if attempt:
+                    self.metrics.errors += 1
+                    raise
+            except McpError as e:
+                self.metrics.errors += 1
+                entry.broken = e.error.code == CONNECTION_CLOSED
+                raise
+            except Exception as e:
+                self.metrics.errors += 1
+                entry.broken = isinstance(e, (anyio.EndOfStream, anyio.BrokenResourceError))
+                raise
+            except BaseException:
+                # a cancelled request leaves the session in an unknown state
+                self.metrics.errors += 1
+                entry.broken = True
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self.metrics.calls += 1
+                self.metrics.call_seconds += elapsed
+                self.metrics.max_call_seconds = max(self.metrics.max_call_seconds, elapsed)
+                await self._release(entry)
+        raise RuntimeError("unreachable")
+
+    async def _acquire(self) -> _PooledSession:
+        while True:
+            entry = await self._reserve()
+            if entry.session is None:
+                try:
+                    await self._open(entry)
+                except BaseException:
+                    entry.broken = True
+                    await self._release(entry)
+                    raise
+                return entry
+            idle = time.monotonic() - entry.last_used
+            if idle < HEALTH_CHECK_AFTER or await self._ping(entry):
+                return entry
+            entry.broken = True
+            await self._release(entry)
+
+    async def _reserve(self) -> _PooledSession:
+        async with self._changed:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"MCP session pool of '{self.name}' is closed")
+                for entry in list(self._sessions):
+                    if not entry.in_use and not entry.is_alive():
+                        self._remove(entry)
+                idle = [s for s in self._sessions if not s.in_use]
+                if idle:
+                    # most recently used first, so the others can reach the idle timeout
+                    entry = max(idle, key=lambda s: s.last_used)
+                    entry.in_use = True
+                    return entry
+                if len(self._sessions) < self.size:
+                    entry = _PooledSession()
+                    self._sessions.append(entry)
+                    if self._reaper is None:
+                        self._reaper = asyncio.create_task(self._reap())
+                    return entry
+                await self._changed.wait()
+
+    async def _release(self, entry: _PooledSession):
+        async with self._changed:
+            entry.in_use = False
+            entry.last_used = time.monotonic()
+            if self._closed or not entry.is_alive():
+                self._remove(entry)
+            self._changed.notify()
+
+    def _remove(self, entry: _PooledSession):
+        if entry in self._sessions:
+            self._sessions.remove(entry)
+            if entry.session is not None and entry.broken:
+                self.metrics.reconnects += 1
+        entry.closing.set()
+
+    async def _open(self, entry: _PooledSession):
+        ready = asyncio.get_running_loop().create_future()
+        entry.task = asyncio.create_task(self._hold(entry, ready))
+        await ready
+
+    async def _hold(self, entry: _PooledSession, ready: asyncio.Future):
+        # owns the transport and session, entered and exited in this task
+        start = time.perf_counter()
+        try:
+            async with AsyncExitStack() as stack:
+                entry.session = await self.factory(stack)
+                self.metrics.sessions_opened += 1
+                self.metrics.setup_seconds += time.perf_counter() - start
+                if not ready.done():
+                    ready.set_result(None)
+                await entry.closing.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+        except BaseException as e:
+            excs = getattr(e, "exceptions", None)  # ExceptionGroup from anyio task groups
+            error = excs[0] if excs else e
+            if not ready.done():
+                ready.set_exception(error)
+            elif not entry.closing.is_set():
+                PrintStyle(font_color="orange").print(
+                    f"MCPSessionPool ({self.name}): Session closed: {type(error).__name__}: {error}"
+                )
+        finally:
+            entry.broken = True
+
+    async def _ping(self, entry: _PooledSession) -> bool:
+        try:
+            await asyncio.wait_for(
+                entry.session.send_ping(),  # type: ignore[union-attr]
+                timeout=HEALTH_CHECK_TIMEOUT,
+            )
+            return True
+        except Exception:
+            return False
+
+    async def _reap(self):
+        try:
+            while self._sessions:
+                await asyncio.sleep(min(self.idle_timeout, HEALTH_CHECK_AFTER))
+                async with self._changed:
+                    now = time.monotonic()
+                    for entry in list(self._sessions):
+                        if not entry.in_use and now - entry.last_used >= self.idle_timeout:
+                            self._remove(entry)
+                            self.metrics.evictions += 1
+        finally:
+            self._reaper = None
+
+    async def _close(self):
+        async with self._changed:
+            for entry in list(self._sessions):
+                if not entry.in_use:
+                    self._remove(entry)
+            self._changed.notify_all()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shlex
+import tempfile
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any, Iterable, Iterator
+
+NMAP_TIMEOUT = 900  # seconds, a killed scan still returns the hosts finished so far
+INVENTORY_KEY = "scan_inventory"  # context data, persisted with the chat
+SCRIPT_OUTPUT_MAX_LEN = 100  # per script line in the summary
+ERROR_MAX_LEN = 2000
+
+
+@dataclass
+class NmapScript:
+    id: str
+    output: str
+
+
+@dataclass
+class NmapService:
+    name: str = ""
+    product: str = ""
+    version: str = ""
+    extrainfo: str = ""
+    tunnel: str = ""
+    cpes: list[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        return " ".join(p for p in (self.product, self.version, f"({self.extrainfo})" if self.extrainfo else "") if p)
+
+
+@dataclass
+class NmapPort:
+    protocol: str
+    port: int
+    state: str
+    reason: str = ""
+    service: NmapService | None = None
+    scripts: list[NmapScript] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NmapPort":
+        service = data.get("service")
+        return cls(
+            protocol=data["protocol"],
+            port=int(data["port"]),
+            state=data.get("state", ""),
+            reason=data.get("reason", ""),
+            service=NmapService(**service) if service else None,
+            scripts=[NmapScript(**s) for s in data.get("scripts") or []],
+        )
+
+
+@dataclass
+class NmapHost:
+    address: str
+    status: str = "up"
+    hostnames: list[str] = field(default_factory=list)
+    mac: str = ""
+    os: str = ""
+    ports: list[NmapPort] = field(default_factory=list)
+    closed_ports: int = 0  # from <extraports>, nmap does not list them one by one
+    scripts: list[NmapScript] = field(default_factory=list)
+
+    def open_ports(self) -> list[NmapPort]:
+        return [p for p in self.ports if p.state == "open"]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NmapHost":
+        return cls(
+            address=data["address"],
+            status=data.get("status", "up"),
+            hostnames=list(data.get("hostnames") or []),
+            mac=data.get("mac", ""),
+            os=data.get("os", ""),
+            ports=[NmapPort.from_dict(p) for p in data.get("ports") or []],
+            closed_ports=int(data.get("closed_ports", 0)),
+            scripts=[NmapScript(**s) for s in data.get("scripts") or []],
+        )
+
+
+def iter_hosts(source: str | IO[bytes], include_down: bool = False) -> Iterator[NmapHost]:
+    """
+    Hosts of an nmap XML report, parsed one <host> at a time.
+    Finished hosts are removed from the tree, memory stays bounded for large sweeps.
+    A truncated report (killed scan) ends after its last complete host.
+    """
+    root = None
+    try:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event != "end" or elem.tag != "host":
+                continue
+            host = _parse_host(elem)
+            root.clear()
+            if host and (include_down or host.status == "up"):
+                yield host
+    except ET.ParseError:
+        if root is None:
+            raise
+
+
+async def run_nmap(targets: list[str], options: list[str], timeout: float = NMAP_TIMEOUT) -> dict[str, Any]:
+    """
+    Run nmap with XML output and return the parsed hosts as dicts.
+    Called through runtime.call_development_function, so it runs next to the code execution shell.
+    """
+    fd, xml_path = tempfile.mkstemp(prefix="nmap-", suffix=".xml")
+    os.close(fd)
+    command = ["nmap", *options, "-oX", xml_path, *targets]
+    timed_out = False
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            process.kill()
+            _, stderr = await process.communicate()
+        hosts = [h.to_dict() for h in iter_hosts(xml_path)] if os.path.getsize(xml_path) else []
+        return {
+            "command": shlex.join(["nmap", *options, *targets]),
+            "returncode": process.returncode,
+            "timed_out": timed_out,
+            "error": stderr.decode(errors="replace").strip()[-ERROR_MAX_LEN:],
+            "hosts": hosts,
+        }
+    finally:
+        os.remove(xml_path)
+
+
+def merge_inventory(inventory: dict | None, hosts: Iterable[NmapHost]) -> dict[str, dict]:
+    """Inventory keyed by address, ports of a new scan replace the same ports of earlier scans."""
+    merged = dict(inventory or {})
+    for host in hosts:
+        previous = merged.get(host.address)
+        data = host.to_dict()
+        if previous:
+            ports = {(p["protocol"], p["port"]): p for p in previous.get("ports") or []}
+            ports.update({(p["protocol"], p["port"]): p for p in data["ports"]})
+            data["ports"] = sorted(ports.values(), key=lambda p: (p["protocol"], p["port"]))
+            data["hostnames"] = data["hostnames"] or previous.get("hostnames") or []
+            data["os"] = data["os"] or previous.get("os", "")
+        merged[host.address] = data
+    return merged
+
+
+def summarize(hosts: Iterable[NmapHost]) -> str:
+    """Compact table of open ports per host with the first line of each script output."""
+    sections = []
+    for host in hosts:
+        names = f" ({', '.join(host.hostnames)})" if host.hostnames else ""
+        lines = [f"host {host.address}{names}" + (f" os: {host.os}" if host.os else "")]
+        open_ports = host.open_ports()
+        hidden = len(host.ports) - len(open_ports) + host.closed_ports
+        if open_ports:
+            lines.append("PORT\tSTATE\tSERVICE\tVERSION")
+            for port in open_ports:
+                service = port.service or NmapService()
+                name = f"{service.tunnel}/{service.name}" if service.tunnel else service.name
+                lines.append(f"{port.port}/{port.protocol}\t{port.state}\t{name or '?'}\t{service.describe()}")
+                lines.extend(_script_lines(port.scripts))
+        else:
+            lines.append("no open ports")
+        if hidden:
+            lines.append(f"{hidden} closed or filtered ports not shown")
+        lines.extend(_script_lines(host.scripts))
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections) if sections else "no hosts up"
+
+
+def _script_lines(scripts: list[NmapScript]) -> list[str]:
+    lines = []
+    for script in scripts:
+        output = next((line.strip() for line in script.output.splitlines() if line.strip()), "")
+        if len(output) > SCRIPT_OUTPUT_MAX_LEN:
+            output = output[:SCRIPT_OUTPUT_MAX_LEN] + "..."
+        lines.append(f"  {script.id}: {output}")
+    return lines
+
+
+def _parse_host(elem: ET.Element) -> NmapHost | None:
+    address = ""
+    mac = ""
+    for addr in elem.iter("address"):
+        if addr.get("addrtype") == "mac":
+            mac = addr.get("addr", "")
+        elif not address:
+            address = addr.get("addr", "")
+    if not address:
+        return None
+
+    status = elem.find("status")
+    os_match = elem.find("os/osmatch")
+    host = NmapHost(
+        address=address,
+        status=status.get("state", "") if status is not None else "",
+        hostnames=[h.get("name", "") for h in elem.iter("hostname") if h.get("name")],
+        mac=mac,
+        os=os_match.get("name", "") if os_match is not None else "",
+        scripts=_parse_scripts(elem.find("hostscript")),
+    )
+
+    ports = elem.find("ports")
+    if ports is not None:
+        for extra in ports.iter("extraports"):
+            host.closed_ports += int(extra.get("count", 0))
+        for port in ports.iter("port"):
+            state = port.find("state")
+            service = port.find("service")
+            host.ports.append(NmapPort(
+                protocol=port.get("protocol", ""),
+                port=int(port.get("portid", 0)),
+                state=state.get("state", "") if state is not None else "",
+                reason=state.get("reason", "") if state is not None else "",
+                service=NmapService(
+                    name=service.get("name", ""),
+                    product=service.get("product", ""),
+                    version=service.get("version", ""),
+                    extrainfo=service.get("extrainfo", ""),
+                    tunnel=service.get("tunnel", ""),
+                    cpes=[c.text for c in service.iter("cpe") if c.text],
+                ) if service is not None else None,
+                scripts=_parse_scripts(port),
+            ))
+    return host
+
+
+def _parse_scripts(elem: ET.Element | None) -> list[NmapScript]:
+    if elem is None:
+        return []
+    return [
+        NmapScript(id=s.get("id", ""), output=s.get("output", "").strip())
+        for s in elem.findall("script")
+    ]
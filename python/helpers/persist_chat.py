@@ -1,17 +1,61 @@
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
+import os
+import threading
+import time
 import uuid
+import psutil
 from agent import Agent, AgentConfig, AgentContext, AgentContextType
 from python.helpers import files, history
 import json
 from initialize import initialize_agent
 
 from python.helpers.log import Log, LogItem
+from python.helpers.print_style import PrintStyle
+from python.helpers.strings import sanitize_string
 
 CHATS_FOLDER = "usr/chats"
 LOG_SIZE = 1000
 CHAT_FILE_NAME = "chat.json"
+JOURNAL_FILE_NAME = "chat.journal.jsonl"
+# chat list metadata, read at startup instead of the whole chat
+META_FILE_NAME = "chat.meta.json"
+LOAD_WORKERS = 8
+# the journal is compacted into chat.json once it grows larger than the snapshot,
+# but not before it reaches this size
+JOURNAL_MIN_COMPACT_BYTES = 256 * 1024
+
+
+@dataclass
+class _AgentCursor:
+    agent: Agent
+    history: history.History
+    revision: int
+    current: history.Topic
+    messages: int  # messages of the current topic already persisted
+    data: str
+
+
+@dataclass
+class _ChatJournal:
+    snapshot_id: str
+    agents: list[_AgentCursor]
+    log_guid: str
+    log_version: int
+    log_offset: int  # live number of the first log item in the snapshot
+    snapshot_bytes: int
+    journal_bytes: int = 0
+
+
+_journals: dict[str, _ChatJournal] = {}
+_journals_lock = threading.RLock()
+# metadata of chats restored at startup and not opened yet, by context id
+_unloaded: dict[str, dict[str, Any]] = {}
+# chats whose files failed to load when opened, they are never saved over
+_unreadable: set[str] = set()
 
 
 def get_chat_folder_path(ctxid: str):
@@ -35,11 +79,20 @@ def save_tmp_chat(context: AgentContext):
     if context.type == AgentContextType.BACKGROUND:
         return
 
-    path = _get_chat_file_path(context.id)
-    files.make_dirs(path)
-    data = _serialize_context(context)
-    js = _safe_json_serialize(data, ensure_ascii=False)
-    files.write_file(path, js)
+    with _journals_lock:
+        if context.id in _unreadable:
+            return
+        if not context.loaded and _save_unloaded(context):
+            return
+        journal = _journals.get(context.id)
+        if journal and journal.journal_bytes <= max(
+            journal.snapshot_bytes, JOURNAL_MIN_COMPACT_BYTES
+        ):
+            entry = _journal_entry(context, journal)
+            if entry is not None:
+                _append_journal(context, journal, *entry)
+                return
+        _write_snapshot(context)
 
 
 def save_tmp_chats():
@@ -52,29 +105,372 @@ def save_tmp_chats():
 
 
 def load_tmp_chats():
-    """Load all contexts from the chats folder"""
+    """Load all contexts from the chats folder.
+    Chats with current metadata are registered without their agents and log,
+    those are loaded when the chat is first accessed."""
+    start = time.perf_counter()
     _convert_v080_chats()
     folders = files.list_files(CHATS_FOLDER, "*")
-    json_files = []
-    for folder_name in folders:
-        json_files.append(_get_chat_file_path(folder_name))
 
+    # metadata reads and json parsing of chats without metadata run in parallel
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        results = list(pool.map(_read_chat_meta, folders))
+
+    config = initialize_agent()
     ctxids = []
-    for file in json_files:
+    lazy = 0
+    for folder, (meta, data, error) in zip(folders, results):
+        if error:
+            print(f"Error loading chat {_get_chat_file_path(folder)}: {error}")
+            continue
         try:
-            js = files.read_file(file)
-            data = json.loads(js)
-            ctx = _deserialize_context(data)
+            if meta:
+                ctx = _lazy_context(meta, config)
+                lazy += 1
+            else:
+                ctx = _deserialize_context(data)
+                # writes the metadata, the next start loads this chat lazily
+                save_tmp_chat(ctx)
             ctxids.append(ctx.id)
         except Exception as e:
-            print(f"Error loading chat {file}: {e}")
+            print(f"Error loading chat {_get_chat_file_path(folder)}: {e}")
+
+    rss = psutil.Process().memory_info().rss / (1024 * 1024)
+    PrintStyle().print(
+        f"Loaded {len(ctxids)} chats ({lazy} on first access) in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms, RSS {rss:.0f} MB"
+    )
     return ctxids
 
 
+def _read_chat_meta(folder: str):
+    """(meta, None, None) when the metadata file matches the chat files,
+    otherwise (None, data, None) with the full chat, or (None, None, error)."""
+    try:
+        meta_path = _get_meta_file_path(folder)
+        if os.path.exists(meta_path):
+            meta = json.loads(files.read_file(meta_path))
+            if _meta_is_current(folder, meta):
+                return meta, None, None
+
+        # no or outdated metadata (older chats, crash between writes), read the chat
+        data = _read_chat_file(_get_chat_file_path(folder))
+        return None, data, None
+    except Exception as e:
+        return None, None, e
+
+
+def _meta_is_current(ctxid: str, meta: dict[str, Any]) -> bool:
+    try:
+        journal_size = os.path.getsize(_get_journal_file_path(ctxid))
+    except OSError:
+        journal_size = 0
+    return (
+        meta.get("id") == ctxid
+        and bool(meta.get("snapshot_id"))
+        and meta.get("snapshot_bytes") == os.path.getsize(_get_chat_file_path(ctxid))
+        and meta.get("journal_bytes") == journal_size
+    )
+
+
+def _lazy_context(meta: dict[str, Any], config: AgentConfig) -> AgentContext:
+    _unloaded[meta["id"]] = meta
+    return AgentContext(
+        config=config,
+        id=meta["id"],
+        name=meta.get("name", None),
+        created_at=datetime.fromisoformat(meta["created_at"]),
+        type=AgentContextType(meta.get("type", AgentContextType.USER.value)),
+        last_message=datetime.fromisoformat(meta["last_message"]),
+        paused=False,
+        data=meta.get("data", {}),
+        output_data=meta.get("output_data", {}),
+        loader=_load_context,
+        log_output={
+            "log_guid": meta["log"]["guid"],
+            "log_version": meta["log"]["length"],
+            "log_length": meta["log"]["length"],
+        },
+    )
+
+
+def _load_context(context: AgentContext):
+    """Loader of lazy contexts, restores agents and log from the chat files.
+    A chat that cannot be read opens empty and read-only, its files are kept as they are."""
+    with _journals_lock:
+        _unloaded.pop(context.id, None)
+    path = _get_chat_file_path(context.id)
+    try:
+        data = _read_chat_file(path)
+        # name, data and other metadata stay as they are in memory, they may have changed
+        context.log = _deserialize_log(data.get("log") or {})
+        context.log.context = context
+        agent0 = _deserialize_agents(data.get("agents", []), context.config, context)
+    except Exception as e:
+        print(f"Error loading chat {path}: {e}")
+        with _journals_lock:
+            _unreadable.add(context.id)
+        context.log = Log()
+        context.log.context = context
+        context.agent0 = Agent(0, context.config, context)
+        context.streaming_agent = None
+        context.log.log(
+            type="error",
+            heading="Chat could not be loaded",
+            content=f"{path}: {e}\nChanges to this chat are not saved.",
+        )
+        return
+
+    streaming_agent = agent0
+    while streaming_agent and streaming_agent.number != data.get("streaming_agent", 0):
+        streaming_agent = streaming_agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+
+    context.agent0 = agent0
+    context.streaming_agent = streaming_agent
+
+
+def _save_unloaded(context: AgentContext) -> bool:
+    """Journal metadata changes of an unopened chat without loading it."""
+    meta = _unloaded.get(context.id)
+    if not meta:
+        return False
+
+    entry_meta = _serialize_context_meta(context, meta.get("streaming_agent", 0))
+    entry = {"snapshot": meta["snapshot_id"], "context": entry_meta}
+    meta.update(entry_meta)
+    meta["journal_bytes"] += _append_line(
+        _get_journal_file_path(context.id),
+        _safe_json_serialize(entry, ensure_ascii=False),
+    )
+    _write_atomic(_get_meta_file_path(context.id), json.dumps(meta), sync=False)
+    return True
+
+
 def _get_chat_file_path(ctxid: str):
     return files.get_abs_path(CHATS_FOLDER, ctxid, CHAT_FILE_NAME)
 
 
+def _get_journal_file_path(ctxid: str):
+    return files.get_abs_path(CHATS_FOLDER, ctxid, JOURNAL_FILE_NAME)
+
+
+def _get_meta_file_path(ctxid: str):
+    return files.get_abs_path(CHATS_FOLDER, ctxid, META_FILE_NAME)
+
+
+def _write_snapshot(context: AgentContext):
+    """Write the whole context to chat.json and start an empty journal for it."""
+    cursors: list[_AgentCursor] = []
+    log = context.log
+    with log._lock:
+        log_guid = log.guid
+        log_version = log.version
+        data = _serialize_context(context, cursors)
+    data["snapshot_id"] = str(uuid.uuid4())
+
+    js = _safe_json_serialize(data, ensure_ascii=False)
+    path = _get_chat_file_path(context.id)
+    snapshot_bytes = _write_atomic(path, js)
+    # entries of the previous snapshot are ignored from now on, drop them
+    _write_atomic(_get_journal_file_path(context.id), "")
+
+    journal = _ChatJournal(
+        snapshot_id=data["snapshot_id"],
+        agents=cursors,
+        log_guid=log_guid,
+        log_version=log_version,
+        log_offset=data["log"]["offset"],
+        snapshot_bytes=snapshot_bytes,
+    )
+    _journals[context.id] = journal
+    _write_meta(context, journal)
+
+
+def _write_meta(context: AgentContext, journal: _ChatJournal):
+    # derived data, a missing or outdated file only means a full read at startup
+    meta = {
+        "id": context.id,
+        "created_at": (
+            context.created_at.isoformat()
+            if context.created_at
+            else datetime.fromtimestamp(0).isoformat()
+        ),
+        **_serialize_context_meta(context),
+        # items the restored log will have, it starts at the snapshot offset
+        "log": {
+            "guid": journal.log_guid,
+            "length": len(context.log.logs) - journal.log_offset,
+        },
+        "snapshot_id": journal.snapshot_id,
+        "snapshot_bytes": journal.snapshot_bytes,
+        "journal_bytes": journal.journal_bytes,
+    }
+    js = _safe_json_serialize(meta, ensure_ascii=False)
+    _write_atomic(_get_meta_file_path(context.id), js, sync=False)
+
+
+def _journal_entry(context: AgentContext, journal: _ChatJournal):
+    """Changes since the last save as a journal entry, None when only a snapshot can hold them."""
+    agents = []
+    cursors = []
+    agent = context.agent0
+    while agent:
+        agents.append(agent)
+        agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+    if len(agents) != len(journal.agents):
+        return None
+
+    entry_agents = []
+    for agent, cursor in zip(agents, journal.agents):
+        hist = agent.history
+        revision = hist.revision
+        current = hist.current
+        if (
+            agent is not cursor.agent
+            or hist is not cursor.history
+            or revision != cursor.revision
+            or current is not cursor.current
+            or len(current.messages) < cursor.messages
+        ):
+            return None  # history was restructured (new topic, compression, reset)
+        new_messages = current.messages[cursor.messages :]
+        if hist.revision != revision:
+            return None
+
+        entry_agent: dict[str, Any] = {
+            "number": agent.number,
+            "counter": hist.counter,
+            "messages": [msg.to_dict() for msg in new_messages],
+        }
+        data = _safe_json_serialize(_agent_data(agent), ensure_ascii=False)
+        if data != cursor.data:
+            entry_agent["data"] = json.loads(data)
+        if new_messages or "data" in entry_agent:
+            entry_agents.append(entry_agent)
+        cursors.append(
+            _AgentCursor(
+                agent=agent,
+                history=hist,
+                revision=revision,
+                current=current,
+                messages=cursor.messages + len(new_messages),
+                data=data,
+            )
+        )
+
+    log = context.log
+    with log._lock:
+        if log.guid != journal.log_guid:
+            return None  # log was reset
+        log_version = log.version
+        items = [
+            item
+            for item in log.output(start=journal.log_version)
+            if item["no"] >= journal.log_offset
+        ]
+        progress, progress_no = log.progress, log.progress_no
+
+    entry = {
+        "snapshot": journal.snapshot_id,
+        "context": _serialize_context_meta(context),
+        "agents": entry_agents,
+        "log": {"items": items, "progress": progress, "progress_no": progress_no},
+    }
+    return entry, cursors, log_version
+
+
+def _append_journal(
+    context: AgentContext,
+    journal: _ChatJournal,
+    entry: dict,
+    cursors: list[_AgentCursor],
+    log_version: int,
+):
+    journal.journal_bytes += _append_line(
+        _get_journal_file_path(context.id),
+        _safe_json_serialize(entry, ensure_ascii=False),
+    )
+    journal.agents = cursors
+    journal.log_version = log_version
+    _write_meta(context, journal)
+
+
+def _append_line(path: str, line: str) -> int:
+    content = sanitize_string(line + "\n", "utf-8").encode("utf-8")
+    # one line per save, a torn last line after a crash is skipped on load
+    with open(path, "ab") as f:
+        f.write(content)
+        f.flush()
+    return len(content)
+
+
+def _write_atomic(path: str, content: str, sync: bool = True) -> int:
+    data = sanitize_string(content, "utf-8").encode("utf-8")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _read_chat_file(path: str) -> dict[str, Any]:
+    """Read chat.json and replay the journal entries written after it."""
+    data = json.loads(files.read_file(path))
+    journal_path = os.path.join(os.path.dirname(path), JOURNAL_FILE_NAME)
+    if data.get("snapshot_id") and os.path.exists(journal_path):
+        with open(journal_path, "r", encoding="utf-8") as f:
+            _replay_journal(data, f)
+    return data
+
+
+def _replay_journal(data: dict[str, Any], lines):
+    log = data.setdefault("log", {})
+    log_items = log.setdefault("logs", [])
+    log_offset = log.get("offset", 0)
+    agents = {agent["number"]: agent for agent in data.get("agents", [])}
+    histories: dict[int, dict[str, Any]] = {}
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break  # torn write at the end of the journal
+        if entry.get("snapshot") != data["snapshot_id"]:
+            continue
+
+        data.update(entry.get("context", {}))
+        for entry_agent in entry.get("agents", []):
+            agent = agents.get(entry_agent["number"])
+            if agent is None:
+                continue
+            if "data" in entry_agent:
+                agent["data"] = entry_agent["data"]
+            if entry_agent.get("messages"):
+                number = entry_agent["number"]
+                if number not in histories:
+                    histories[number] = json.loads(agent["history"])
+                hist = histories[number]
+                hist["counter"] = entry_agent.get("counter", hist.get("counter", 0))
+                hist["current"]["messages"].extend(entry_agent["messages"])
+
+        entry_log = entry.get("log", {})
+        for item in entry_log.get("items", []):
+            index = item["no"] - log_offset
+            if index < len(log_items):
+                log_items[index] = item
+            else:
+                log_items.append(item)
+        log["progress"] = entry_log.get("progress", log.get("progress", ""))
+        log["progress_no"] = entry_log.get("progress_no", log.get("progress_no", 0))
+
+    for number, hist in histories.items():
+        agents[number]["history"] = json.dumps(hist, ensure_ascii=False)
+
+
 def _convert_v080_chats():
     json_files = files.list_files(CHATS_FOLDER, "*.json")
     for file in json_files:
@@ -105,6 +501,10 @@ def export_json_chat(context: AgentContext):
 
 def remove_chat(ctxid):
     """Remove a chat or task context"""
+    with _journals_lock:
+        _journals.pop(ctxid, None)
+        _unloaded.pop(ctxid, None)
+        _unreadable.discard(ctxid)
     path = get_chat_folder_path(ctxid)
     files.delete_dir(path)
 
@@ -115,51 +515,77 @@ def remove_msg_files(ctxid):
     files.delete_dir(path)
 
 
-def _serialize_context(context: AgentContext):
+def _serialize_context(context: AgentContext, cursors: list[_AgentCursor] | None = None):
     # serialize agents
     agents = []
     agent = context.agent0
     while agent:
-        agents.append(_serialize_agent(agent))
+        agents.append(_serialize_agent(agent, cursors))
         agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
 
-
-    data = {k: v for k, v in context.data.items() if not k.startswith("_")}
-    output_data = {k: v for k, v in context.output_data.items() if not k.startswith("_")}
-
     return {
         "id": context.id,
-        "name": context.name,
         "created_at": (
             context.created_at.isoformat()
             if context.created_at
             else datetime.fromtimestamp(0).isoformat()
         ),
+        **_serialize_context_meta(context),
+        "agents": agents,
+        "log": _serialize_log(context.log),
+    }
+
+
+def _serialize_context_meta(context: AgentContext, streaming_agent: int | None = None):
+    # the part of the context that is rewritten in every journal entry
+    data = {k: v for k, v in context.data.items() if not k.startswith("_")}
+    output_data = {k: v for k, v in context.output_data.items() if not k.startswith("_")}
+
+    return {
+        "name": context.name,
         "type": context.type.value,
         "last_message": (
             context.last_message.isoformat()
             if context.last_message
             else datetime.fromtimestamp(0).isoformat()
         ),
-        "agents": agents,
         "streaming_agent": (
-            context.streaming_agent.number if context.streaming_agent else 0
+            streaming_agent
+            if streaming_agent is not None
+            else context.streaming_agent.number if context.streaming_agent else 0
         ),
-        "log": _serialize_log(context.log),
         "data": data,
         "output_data": output_data,
     }
 
 
-def _serialize_agent(agent: Agent):
-    data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
+def _agent_data(agent: Agent):
+    return {k: v for k, v in agent.data.items() if not k.startswith("_")}
+
 
-    history = agent.history.serialize()
+def _serialize_agent(agent: Agent, cursors: list[_AgentCursor] | None = None):
+    data = _agent_data(agent)
+
+    hist = agent.history
+    revision = hist.revision
+    current = hist.current
+    history_dict = hist.to_dict()
+    if cursors is not None:
+        cursors.append(
+            _AgentCursor(
+                agent=agent,
+                history=hist,
+                revision=revision,
+                current=current,
+                messages=len(history_dict["current"]["messages"]),
+                data=_safe_json_serialize(data, ensure_ascii=False),
+            )
+        )
 
     return {
         "number": agent.number,
         "data": data,
-        "history": history,
+        "history": history._json_dumps(history_dict),
     }
 
 
@@ -167,6 +593,7 @@ def _serialize_log(log: Log):
     # Guard against concurrent log mutations while serializing.
     with log._lock:
         logs = [item.output() for item in log.logs[-LOG_SIZE:]]  # serialize LogItem objects
+        offset = max(len(log.logs) - LOG_SIZE, 0)
         guid = log.guid
         progress = log.progress
         progress_no = log.progress_no
@@ -175,6 +602,7 @@ def _serialize_log(log: Log):
         "logs": logs,
         "progress": progress,
         "progress_no": progress_no,
+        "offset": offset,
     }
 
 
@@ -282,9 +710,12 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
                 id=item_data.get("id"),
             )
         )
-        log.updates.append(i)
         i += 1
 
+    with log._lock:
+        for no in range(len(log.logs)):
+            log._record_update(no)
+
     return log
 
 
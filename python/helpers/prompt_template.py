@@ -0,0 +1,155 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Union
+
+from simpleeval import simple_eval
+
+IF_PATTERN = re.compile(r"{{\s*if\s+(.*?)}}", flags=re.DOTALL)
+CONDITION_TOKEN_PATTERN = re.compile(r"{{\s*(if\b.*?|endif)\s*}}", flags=re.DOTALL)
+INCLUDE_PATTERN = re.compile(r"{{\s*include\s*['\"](.*?)['\"]\s*}}")
+TAG_PATTERN = re.compile(r"{{([^{}]*)}}")
+
+
+class UnresolvedTags(Exception):
+    """A substituted value contains template tags, the text needs the sequential passes."""
+
+
+@dataclass(slots=True)
+class Text:
+    value: str
+
+
+@dataclass(slots=True)
+class Placeholder:
+    name: str
+    source: str
+
+
+@dataclass(slots=True)
+class Include:
+    path: str
+    source: str
+
+
+@dataclass(slots=True)
+class Condition:
+    expression: str
+    body: list["Node"]
+    # text from the if tag to the end of its scope, kept as is when the expression fails
+    rest: str
+    _rest_nodes: list["Node"] | None = field(default=None, repr=False)
+
+    def rest_nodes(self) -> list["Node"]:
+        if self._rest_nodes is None:
+            self._rest_nodes = compile_tags(self.rest)
+        return self._rest_nodes
+
+
+Node = Union[Text, Placeholder, Include, Condition]
+
+
+def compile_template(content: str, conditions: bool = True) -> list[Node]:
+    """Parses template text once into text, placeholder, include and condition nodes."""
+    return compile_conditions(content) if conditions else compile_tags(content)
+
+
+def compile_conditions(text: str) -> list[Node]:
+    # same block matching as files.evaluate_text_conditions
+    m_if = IF_PATTERN.search(text)
+    if not m_if:
+        return compile_tags(text)
+
+    depth = 1
+    pos = m_if.end()
+    while True:
+        m = CONDITION_TOKEN_PATTERN.search(text, pos)
+        if not m:
+            # unterminated if-block, the rest stays as it is
+            return compile_tags(text)
+        depth += 1 if m.group(1).startswith("if ") else -1
+        if depth == 0:
+            break
+        pos = m.end()
+
+    condition = Condition(
+        expression=m_if.group(1).strip(),
+        body=compile_conditions(text[m_if.end() : m.start()]),
+        rest=text[m_if.start() :],
+    )
+    return [
+        *compile_tags(text[: m_if.start()]),
+        condition,
+        *compile_conditions(text[m.end() :]),
+    ]
+
+
+def compile_tags(text: str) -> list[Node]:
+    nodes: list[Node] = []
+    pos = 0
+    for m in TAG_PATTERN.finditer(text):
+        if m.start() > pos:
+            nodes.append(Text(text[pos : m.start()]))
+        source = m.group(0)
+        include = INCLUDE_PATTERN.fullmatch(source)
+        if include and not os.path.isabs(include.group(1)):
+            nodes.append(Include(include.group(1), source))
+        else:
+            nodes.append(Placeholder(m.group(1), source))
+        pos = m.end()
+    if pos < len(text):
+        nodes.append(Text(text[pos:]))
+    return _merge_text(nodes)
+
+
+def _merge_text(nodes: list[Node]) -> list[Node]:
+    merged: list[Node] = []
+    for node in nodes:
+        last = merged[-1] if merged else None
+        if isinstance(node, Text) and isinstance(last, Text):
+            last.value += node.value
+        else:
+            merged.append(node)
+    return merged
+
+
+def render(
+    nodes: list[Node], variables: dict[str, Any], include: Callable[[str], str]
+) -> str:
+    """Renders compiled nodes. Raises UnresolvedTags when a value would need another pass."""
+    parts: list[str] = []
+    _render(nodes, variables, include, parts)
+    return "".join(parts)
+
+
+def _render(
+    nodes: list[Node],
+    variables: dict[str, Any],
+    include: Callable[[str], str],
+    parts: list[str],
+) -> None:
+    for node in nodes:
+        if isinstance(node, Text):
+            parts.append(node.value)
+        elif isinstance(node, Placeholder):
+            if node.name in variables:
+                value = str(variables[node.name])
+                if "{{" in value:
+                    raise UnresolvedTags(node.name)
+                parts.append(value)
+            else:
+                parts.append(node.source)
+        elif isinstance(node, Include):
+            try:
+                parts.append(include(node.path))
+            except FileNotFoundError:
+                parts.append(node.source)
+        else:
+            try:
+                result = simple_eval(node.expression, names=variables)
+            except Exception:
+                # on evaluation error the rest of this scope is left unevaluated
+                _render(node.rest_nodes(), variables, include, parts)
+                return
+            if result:
+                _render(node.body, variables, include, parts)
@@ -1,49 +1,167 @@
 import asyncio
+import math
+import os
+import sqlite3
+import threading
 import time
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Literal, get_args
+
+Mode = Literal["window", "token_bucket"]
+
+DEFAULT_BUCKETS = 60
+CLEANUP_EVERY = 100  # shared window buckets are pruned every this many add() calls
+
+
+class WindowCounter:
+    """Sliding window total kept in a ring of time buckets with a running sum.
+    Adding and reading are O(1) amortized, expired buckets are dropped as time moves."""
+
+    def __init__(self, seconds: float, buckets: int = DEFAULT_BUCKETS):
+        self.seconds = seconds
+        self.buckets = max(1, buckets)
+        self.width = seconds / self.buckets
+        self.ring = [0.0] * self.buckets
+        self.head = 0  # absolute index of the newest bucket
+        self.sum = 0.0
+
+    def _advance(self, now: float):
+        current = int(now // self.width)
+        if current <= self.head:
+            return
+        if current - self.head >= self.buckets:
+            self.ring = [0.0] * self.buckets
+            self.sum = 0.0
+        else:
+            for index in range(self.head + 1, current + 1):
+                slot = index % self.buckets
+                self.sum -= self.ring[slot]
+                self.ring[slot] = 0.0
+        self.head = current
+
+    def add(self, value: float, now: float):
+        self._advance(now)
+        self.ring[self.head % self.buckets] += value
+        self.sum += value
+
+    def total(self, now: float) -> float:
+        self._advance(now)
+        return self.sum
+
+    def wait_time(self, limit: float, now: float) -> float:
+        """Seconds until the total drops to limit or below."""
+        self._advance(now)
+        excess = self.sum - limit
+        if excess <= 0:
+            return 0.0
+        # oldest buckets expire first
+        for age in range(self.buckets - 1, -1, -1):
+            index = self.head - age
+            excess -= self.ring[index % self.buckets]
+            if excess <= 0:
+                expires = (index + self.buckets) * self.width
+                return max(0.0, expires - now)
+        return self.seconds
+
+
+class TokenBucketCounter:
+    """Token bucket: usage drains at limit/seconds per second, so bursts up to
+    the limit pass and the sustained rate is capped."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.level = 0.0
+        self.updated = 0.0
+        self.rate_limit = 0.0  # limit the drain rate is derived from
+
+    def _drain(self, now: float):
+        if self.rate_limit > 0 and now > self.updated:
+            rate = self.rate_limit / self.seconds
+            self.level = max(0.0, self.level - rate * (now - self.updated))
+        self.updated = now
+
+    def add(self, value: float, now: float):
+        self._drain(now)
+        # corrections of earlier estimates may be negative
+        self.level = max(0.0, self.level + value)
+
+    def total(self, now: float) -> float:
+        self._drain(now)
+        return self.level
+
+    def wait_time(self, limit: float, now: float) -> float:
+        self.rate_limit = limit
+        self._drain(now)
+        excess = self.level - limit
+        if excess <= 0 or limit <= 0:
+            return 0.0
+        return excess / (limit / self.seconds)
 
 
 class RateLimiter:
-    def __init__(self, seconds: int = 60, **limits: int):
+    def __init__(
+        self,
+        seconds: int = 60,
+        mode: Mode = "window",
+        buckets: int = DEFAULT_BUCKETS,
+        **limits: int,
+    ):
+        if mode not in get_args(Mode):
+            raise ValueError(f"Unknown rate limit mode {mode!r}, expected one of {', '.join(get_args(Mode))}")
         self.timeframe = seconds
+        self.mode: Mode = mode
+        self.buckets = buckets
         self.limits = {key: value if isinstance(value, (int, float)) else 0 for key, value in (limits or {}).items()}
-        self.values = {key: [] for key in self.limits.keys()}
-        self._lock = asyncio.Lock()
+        self.counters: dict[str, WindowCounter | TokenBucketCounter] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, key: str):
+        counter = self.counters.get(key)
+        if counter is None:
+            if self.mode == "token_bucket":
+                counter = TokenBucketCounter(self.timeframe)
+            else:
+                counter = WindowCounter(self.timeframe, self.buckets)
+            self.counters[key] = counter
+        if isinstance(counter, TokenBucketCounter):
+            # limits may be changed after creation (models.get_rate_limiter)
+            counter.rate_limit = self.limits.get(key, 0)
+        return counter
 
     def add(self, **kwargs: int):
         now = time.time()
-        for key, value in kwargs.items():
-            if not key in self.values:
-                self.values[key] = []
-            self.values[key].append((now, value))
+        with self._lock:
+            for key, value in kwargs.items():
+                self._counter(key).add(value, now)
 
     async def cleanup(self):
-        async with self._lock:
-            now = time.time()
-            cutoff = now - self.timeframe
-            for key in self.values:
-                self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+        # expired usage is dropped as counters advance, nothing to rebuild
+        pass
 
     async def get_total(self, key: str) -> int:
-        async with self._lock:
-            if not key in self.values:
+        with self._lock:
+            if key not in self.counters:
                 return 0
-            return sum(value for _, value in self.values[key])
+            return math.ceil(self._counter(key).total(time.time()))
+
+    def _wait_time(self, key: str, limit: int) -> float:
+        with self._lock:
+            return self._counter(key).wait_time(limit, time.time())
 
     async def wait(
         self,
         callback: Callable[[str, str, int, int], Awaitable[bool]] | None = None,
     ):
         while True:
-            await self.cleanup()
             should_wait = False
+            delay = 0.0
 
             for key, limit in self.limits.items():
                 if limit <= 0:  # Skip if no limit set
                     continue
 
-                total = await self.get_total(key)
-                if total > limit:
+                delay = self._wait_time(key, limit)
+                if delay > 0:
+                    total = await self.get_total(key)
                     if callback:
                         msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
                         should_wait = not await callback(msg, key, total, limit)
@@ -54,4 +172,132 @@ class RateLimiter:
             if not should_wait:
                 break
 
-            await asyncio.sleep(1)
+            # sleep exactly until enough usage has expired, then check again
+            await asyncio.sleep(delay)
+
+
+class SharedRateLimiter(RateLimiter):
+    """Rate limiter whose usage is shared by all processes using the same SQLite file.
+    Usage is stored in the same time buckets (window) or level (token bucket) as
+    the in-memory counters, so each check reads a bounded number of rows."""
+
+    def __init__(
+        self,
+        name: str,
+        db_path: str,
+        seconds: int = 60,
+        mode: Mode = "window",
+        buckets: int = DEFAULT_BUCKETS,
+        **limits: int,
+    ):
+        super().__init__(seconds=seconds, mode=mode, buckets=buckets, **limits)
+        self.name = name
+        self.db_path = db_path
+        self.width = seconds / max(1, buckets)
+        # limiters on the same file share its connection, and so the lock that serializes its use
+        self._db, self._lock = _connect(db_path)
+        self._adds = 0
+
+    def add(self, **kwargs: int):
+        now = time.time()
+        with self._lock:
+            for key, value in kwargs.items():
+                if self.mode == "token_bucket":
+                    # drain and add in one statement, a read before the write would lose
+                    # usage added by other processes in between
+                    limit = self.limits.get(key, 0)
+                    self._db.execute(
+                        "INSERT INTO token_buckets (limiter, key, level, updated) VALUES (?, ?, max(0.0, ?), ?) "
+                        "ON CONFLICT (limiter, key) DO UPDATE SET "
+                        "level = max(0.0, max(0.0, level - ? * max(0.0, excluded.updated - updated)) + ?), "
+                        "updated = max(updated, excluded.updated)",
+                        (self.name, key, value, now, limit / self.timeframe if limit > 0 else 0.0, value),
+                    )
+                else:
+                    self._db.execute(
+                        "INSERT INTO window_buckets (limiter, key, bucket, value) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (limiter, key, bucket) DO UPDATE SET value = value + excluded.value",
+                        (self.name, key, int(now // self.width), value),
+                    )
+            self._adds += 1
+            if self._adds % CLEANUP_EVERY == 0:
+                self._cleanup(now)
+
+    async def cleanup(self):
+        with self._lock:
+            self._cleanup(time.time())
+
+    def _cleanup(self, now: float):
+        oldest = int(now // self.width) - self.buckets
+        self._db.execute(
+            "DELETE FROM window_buckets WHERE limiter = ? AND bucket <= ?",
+            (self.name, oldest),
+        )
+
+    async def get_total(self, key: str) -> int:
+        now = time.time()
+        with self._lock:
+            if self.mode == "token_bucket":
+                return math.ceil(self._bucket_level(key, now))
+            return math.ceil(sum(value for _, value in self._window_rows(key, now)))
+
+    def _window_rows(self, key: str, now: float) -> list[tuple[int, float]]:
+        current = int(now // self.width)
+        return self._db.execute(
+            "SELECT bucket, value FROM window_buckets WHERE limiter = ? AND key = ? AND bucket > ? ORDER BY bucket",
+            (self.name, key, current - self.buckets),
+        ).fetchall()
+
+    def _bucket_level(self, key: str, now: float) -> float:
+        row = self._db.execute(
+            "SELECT level, updated FROM token_buckets WHERE limiter = ? AND key = ?",
+            (self.name, key),
+        ).fetchone()
+        if not row:
+            return 0.0
+        level, updated = row
+        limit = self.limits.get(key, 0)
+        if limit > 0 and now > updated:
+            level = max(0.0, level - limit / self.timeframe * (now - updated))
+        return level
+
+    def _wait_time(self, key: str, limit: int) -> float:
+        now = time.time()
+        with self._lock:
+            if self.mode == "token_bucket":
+                excess = self._bucket_level(key, now) - limit
+                return max(0.0, excess / (limit / self.timeframe))
+            rows = self._window_rows(key, now)
+        excess = sum(value for _, value in rows) - limit
+        if excess <= 0:
+            return 0.0
+        for bucket, value in rows:
+            excess -= value
+            if excess <= 0:
+                return max(0.0, (bucket + self.buckets) * self.width - now)
+        return float(self.timeframe)
+
+
+_connections: dict[str, tuple[sqlite3.Connection, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+
+
+def _connect(db_path: str) -> tuple[sqlite3.Connection, threading.Lock]:
+    with _connections_lock:
+        if db_path not in _connections:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS window_buckets ("
+                "limiter TEXT NOT NULL, key TEXT NOT NULL, bucket INTEGER NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (limiter, key, bucket))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets ("
+                "limiter TEXT NOT NULL, key TEXT NOT NULL, level REAL NOT NULL, updated REAL NOT NULL, "
+                "PRIMARY KEY (limiter, key))"
+            )
+            _connections[db_path] = conn, threading.Lock()
+        return _connections[db_path]
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import re
+import shlex
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
+
+from python.helpers import cve_index, files, runtime, target_policy
+from python.helpers.nmap_xml import NmapHost, NmapPort
+
+MAX_CONCURRENT_STAGES = 4  # stages running at once in one pipeline, per-target limits are in target_policy
+STAGE_TIMEOUT = 600  # seconds per nikto or content enumeration run
+STAGES = ("nikto", "content", "cve")
+PIPELINE_KEY = "scan_pipeline"  # context data, last pipeline result of the chat
+WORDLIST = "/usr/share/wordlists/common.txt"
+OUTPUT_MAX_LEN = 1_000_000
+CVE_RESULTS = 5  # per service
+WEB_PORTS = {80, 443, 8000, 8008, 8080, 8443, 8888, 3000, 5000}
+TLS_PORTS = {443, 8443}
+
+# nikto lines that describe the run, not the target
+_NIKTO_INFO = (
+    "Target IP", "Target Hostname", "Target Port", "Start Time", "End Time",
+    "SSL Info", "Platform", "Scan terminated", "ERROR",
+)
+_GOBUSTER_LINE = re.compile(r"^(/\S*)\s+\(Status:\s*(\d+)\)")
+_DIRB_FILE = re.compile(r"^\+\s+(\S+)\s+\(CODE:(\d+)")
+_DIRB_DIRECTORY = re.compile(r"^==> DIRECTORY:\s+(\S+)")
+
+
+@dataclass
+class StageResult:
+    stage: str
+    target: str
+    status: str  # ok, failed, timeout, blocked
+    seconds: float = 0.0  # running time
+    waited: float = 0.0  # time queued for the global or target limits
+    command: str = ""
+    error: str = ""
+    findings: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class PipelineResult:
+    seconds: float
+    stages: list[StageResult]
+
+    def findings(self) -> list[dict[str, Any]]:
+        return [finding for stage in self.stages for finding in stage.findings]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"seconds": self.seconds, "stages": [asdict(s) for s in self.stages], "findings": self.findings()}
+
+    def summarize(self, max_findings: int = 50) -> str:
+        lines = [f"{len(self.stages)} stages in {self.seconds:.1f}s", "STAGE\tTARGET\tSTATUS\tTIME\tFINDINGS"]
+        for stage in self.stages:
+            status = f"{stage.status} ({stage.error})" if stage.error else stage.status
+            lines.append(f"{stage.stage}\t{stage.target}\t{status}\t{stage.seconds:.1f}s\t{len(stage.findings)}")
+        findings = self.findings()
+        if findings:
+            lines.append("")
+            for finding in findings[:max_findings]:
+                cve = f" {finding['cve']} CVSS {finding['cvss']}" if finding.get("cve") else ""
+                lines.append(f"[{finding['severity']}] {finding['target']}{cve}: {finding['title']}")
+            if len(findings) > max_findings:
+                lines.append(f"... {len(findings) - max_findings} more findings")
+        return "\n".join(lines)
+
+
+@dataclass
+class Stage:
+    name: str
+    host: str  # for target_policy limits
+    target: str
+    run: Callable[[], Awaitable[StageResult]]
+    offline: bool = False  # sends nothing to the host, so takes no target_policy slot
+
+
+class ScanPipeline:
+    """
+    Independent follow-up stages for the hosts of an nmap inventory:
+    nikto and content enumeration per web port, CVE lookup per versioned service.
+    Stages run concurrently up to max_concurrent, stages that scan a host also hold a
+    target_policy slot of it, CVE lookups only read the local index.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[NmapHost],
+        stages: Iterable[str] = STAGES,
+        max_concurrent: int = MAX_CONCURRENT_STAGES,
+        stage_timeout: float = STAGE_TIMEOUT,
+        wordlist: str = WORDLIST,
+    ):
+        self.hosts = list(hosts)
+        self.stages = set(stages)
+        self.max_concurrent = max_concurrent
+        self.stage_timeout = stage_timeout
+        self.wordlist = wordlist
+
+    def plan(self) -> list[Stage]:
+        planned = []
+        for host in self.hosts:
+            for port in host.open_ports():
+                url = web_url(host, port)
+                if url and "nikto" in self.stages:
+                    planned.append(Stage("nikto", host.address, url, lambda url=url: self._nikto(url)))
+                if url and "content" in self.stages:
+                    planned.append(Stage("content", host.address, url, lambda url=url: self._content(url)))
+                service = port.service
+                if service and service.product and service.version and "cve" in self.stages:
+                    target = f"{host.address}:{port.port}/{port.protocol}"
+                    planned.append(Stage(
+                        "cve", host.address, target,
+                        lambda t=target, s=service: self._cve(t, s.product, s.version),
+                        offline=True,
+                    ))
+        return planned
+
+    async def run(self, on_stage_done: Callable[[StageResult], Any] | None = None) -> PipelineResult:
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def run_stage(stage: Stage) -> StageResult:
+            queued = time.perf_counter()
+            try:
+                # target slot first, a stage waiting for its host does not hold a global slot
+                slot = contextlib.nullcontext() if stage.offline else target_policy.target_slot(stage.host)
+                async with slot, semaphore:
+                    started = time.perf_counter()
+                    result = await stage.run()
+                    result.seconds = time.perf_counter() - started
+                    result.waited = started - queued
+            except PermissionError as e:
+                result = StageResult(stage.name, stage.target, "blocked", error=str(e))
+            except Exception as e:
+                result = StageResult(stage.name, stage.target, "failed", error=f"{type(e).__name__}: {e}")
+            if on_stage_done:
+                on_stage_done(result)
+            return result
+
+        results = await asyncio.gather(*(run_stage(stage) for stage in self.plan()))
+        return PipelineResult(seconds=time.perf_counter() - start, stages=list(results))
+
+    async def _nikto(self, url: str) -> StageResult:
+        output = await runtime.call_development_function(
+            run_command,
+            [["nikto", "-h", url, "-nointeractive", "-maxtime", f"{int(self.stage_timeout)}s"]],
+            self.stage_timeout + 30,
+        )
+        result = _command_result("nikto", url, output)
+        result.findings = [
+            _finding(url, "nikto", "low", line) for line in parse_nikto(output["output"])
+        ]
+        return result
+
+    async def _content(self, url: str) -> StageResult:
+        output = await runtime.call_development_function(
+            run_command,
+            [
+                ["gobuster", "dir", "-u", url, "-w", self.wordlist, "-q", "-k", "--no-error"],
+                ["dirb", url, self.wordlist, "-S", "-r"],
+            ],
+            self.stage_timeout,
+        )
+        result = _command_result("content", url, output)
+        result.findings = [
+            _finding(url, output["command"].split(" ", 1)[0], "info", f"{path} (HTTP {status})")
+            for path, status in parse_content(output["output"])
+        ]
+        return result
+
+    async def _cve(self, target: str, product: str, version: str) -> StageResult:
+        index = await asyncio.to_thread(
+            cve_index.get_index,
+            files.get_abs_path(cve_index.INDEX_FILE),
+            files.get_abs_path(cve_index.FEEDS_FOLDER),
+        )
+        if index is None:
+            return StageResult("cve", target, "failed", error="no offline CVE index")
+        result = StageResult("cve", target, "ok")
+        for match in index.lookup(product, version)[:CVE_RESULTS]:
+            finding = _finding(target, "cve_lookup", match.severity, f"{product} {version}: {match.summary}")
+            finding.update(cve=match.id, cvss=match.cvss)
+            result.findings.append(finding)
+        return result
+
+
+async def run_command(commands: list[list[str]], timeout: float) -> dict[str, Any]:
+    """
+    Run the first command whose executable is installed and return its combined output.
+    Called through runtime.call_development_function, so it runs next to the code execution shell.
+    """
+    argv = next((c for c in commands if shutil.which(c[0])), None)
+    if argv is None:
+        names = " or ".join(c[0] for c in commands)
+        return {"command": names, "returncode": None, "timed_out": False, "output": "", "error": f"{names} not installed"}
+
+    process = await asyncio.create_subprocess_exec(
+        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+    )
+    timed_out = False
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        process.kill()
+        output, _ = await process.communicate()
+    return {
+        "command": shlex.join(argv),
+        "returncode": process.returncode,
+        "timed_out": timed_out,
+        "output": output.decode(errors="replace")[:OUTPUT_MAX_LEN],
+        "error": "",
+    }
+
+
+def web_url(host: NmapHost, port: NmapPort) -> str | None:
+    service = port.service
+    name = service.name if service else ""
+    if port.protocol != "tcp" or not ("http" in name or (not name and port.port in WEB_PORTS)):
+        return None
+    tls = (service and service.tunnel == "ssl") or name == "https" or port.port in TLS_PORTS
+    scheme = "https" if tls else "http"
+    default = 443 if tls else 80
+    # the name may be a PTR record pointing outside the lab, only use it when it is authorized itself,
+    # the target_policy slot is taken on the address
+    names = [name for name in host.hostnames if target_policy.is_authorized_target(name)[0]]
+    address = names[0] if names else host.address
+    return f"{scheme}://{address}" + ("" if port.port == default else f":{port.port}")
+
+
+def parse_nikto(output: str) -> list[str]:
+    items = []
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith("+ "):
+            continue
+        item = line[2:].strip()
+        if item and not item.startswith(_NIKTO_INFO) and not item.endswith("host(s) tested"):
+            items.append(item)
+    return items
+
+
+def parse_content(output: str) -> list[tuple[str, int]]:
+    """(path or url, status) found by gobuster -q or dirb."""
+    found = []
+    for line in output.splitlines():
+        line = line.strip()
+        if match := _GOBUSTER_LINE.match(line) or _DIRB_FILE.match(line):
+            found.append((match.group(1), int(match.group(2))))
+        elif match := _DIRB_DIRECTORY.match(line):
+            found.append((match.group(1), 200))
+    return found
+
+
+def _command_result(stage: str, target: str, output: dict[str, Any]) -> StageResult:
+    if output["error"]:
+        return StageResult(stage, target, "failed", command=output["command"], error=output["error"])
+    if output["timed_out"]:
+        return StageResult(stage, target, "timeout", command=output["command"])
+    return StageResult(stage, target, "ok", command=output["command"])
+
+
+def _finding(target: str, tool: str, severity: str, title: str) -> dict[str, Any]:
+    return {"target": target, "tool": tool, "severity": severity, "title": title, "cve": None, "cvss": None}
@@ -8,6 +8,7 @@ from typing import Dict, Optional, List, Literal, Set, Callable, Tuple, TYPE_CHE
 from dotenv.parser import parse_stream
 from python.helpers.errors import RepairableException
 from python.helpers import files
+from python.helpers.aho_corasick import AhoCorasick
 
 if TYPE_CHECKING:
     from agent import AgentContext
@@ -16,6 +17,7 @@ if TYPE_CHECKING:
 # New alias-based placeholder format §§secret(KEY)
 ALIAS_PATTERN = r"§§secret\(([A-Za-z_][A-Za-z0-9_]*)\)"
 DEFAULT_SECRETS_FILE = "usr/secrets.env"
+MASK_MIN_LENGTH = 4
 
 
 def alias_for_key(key: str, placeholder: str = "§§secret({key})") -> str:
@@ -39,12 +41,18 @@ class StreamingSecretsFilter:
     """Stateful streaming filter that masks secrets on the fly.
 
     - Replaces full secret values with placeholders §§secret(KEY) when detected.
-    - Holds the longest suffix of the current buffer that matches any secret prefix
-      (with minimum trigger length of 3) to avoid leaking partial secrets across chunks.
-    - On finalize(), any unresolved partial is masked with '***'.
+    - Keeps the matcher state between chunks, so every character is scanned once,
+      and holds back the suffix that may still be the start of a secret.
+    - On finalize(), any unresolved partial (min_trigger chars or more) is masked with '***'.
+    - output holds all masked text emitted so far, so the full stream is never masked again.
     """
 
-    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3):
+    def __init__(
+        self,
+        key_to_value: Dict[str, str],
+        min_trigger: int = 3,
+        matcher: Optional[AhoCorasick] = None,
+    ):
         self.min_trigger = max(1, int(min_trigger))
         # Map value -> key for placeholder construction
         self.value_to_key: Dict[str, str] = {
@@ -52,58 +60,56 @@ class StreamingSecretsFilter:
         }
         # Only keep non-empty values
         self.secret_values: List[str] = [v for v in self.value_to_key.keys() if v]
-        # Precompute all prefixes for quick suffix matching
-        self.prefixes: Set[str] = set()
-        for v in self.secret_values:
-            for i in range(self.min_trigger, len(v) + 1):
-                self.prefixes.add(v[:i])
-        self.max_len: int = max((len(v) for v in self.secret_values), default=0)
+        self.matcher = matcher or AhoCorasick(self.secret_values)
 
         # Internal buffer of pending text that is not safe to flush yet
         self.pending: str = ""
+        self._pending_start = 0  # stream position of pending[0]
+        self._position = 0  # stream position after the last processed char
+        self._state = 0
+        self._matches: List[Tuple[int, int]] = []
+        self.output: str = ""
+
+    def _alias(self, value: str) -> str:
+        key = self.value_to_key.get(value, "")
+        return alias_for_key(key) if key else value
+
+    def _flush(self, horizon: int) -> str:
+        """Emit pending text up to horizon, replacing matches that start before it.
+        Matches starting at horizon or later stay pending, they may still grow."""
+        ready = [m for m in self._matches if m[0] < horizon]
+        self._matches = [m for m in self._matches if m[0] >= horizon]
 
-    def _replace_full_values(self, text: str) -> str:
-        """Replace all full secret values with placeholders in the given text."""
-        # Sort by length desc to avoid partial overlaps
-        for val in sorted(self.secret_values, key=len, reverse=True):
-            if not val:
+        parts: List[str] = []
+        cursor = self._pending_start
+        for start, end in sorted(ready, key=lambda m: (m[0], -m[1])):
+            if start < cursor:
                 continue
-            key = self.value_to_key.get(val, "")
-            if key:
-                text = text.replace(val, alias_for_key(key))
-        return text
-
-    def _longest_suffix_prefix(self, text: str) -> int:
-        """Return length of longest suffix of text that is a known secret prefix.
-        Returns 0 if none found (or only shorter than min_trigger)."""
-        max_check = min(len(text), self.max_len)
-        for length in range(max_check, self.min_trigger - 1, -1):
-            suffix = text[-length:]
-            if suffix in self.prefixes:
-                return length
-        return 0
+            parts.append(self.pending[cursor - self._pending_start : start - self._pending_start])
+            parts.append(self._alias(self.pending[start - self._pending_start : end - self._pending_start]))
+            cursor = end
+
+        safe = max(cursor, horizon)
+        parts.append(self.pending[cursor - self._pending_start : safe - self._pending_start])
+        self.pending = self.pending[safe - self._pending_start :]
+        self._pending_start = safe
+        # matches overlapping an emitted replacement can no longer apply
+        self._matches = [m for m in self._matches if m[0] >= safe]
+        return "".join(parts)
 
     def process_chunk(self, chunk: str) -> str:
         if not chunk:
             return ""
 
+        matches, self._state = self.matcher.scan(chunk, self._state, self._position)
+        self._matches.extend(matches)
         self.pending += chunk
+        self._position += len(chunk)
 
-        # Replace any full secret occurrences first
-        self.pending = self._replace_full_values(self.pending)
-
-        # Determine the longest suffix that could still form a secret
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            # Flush everything except the hold suffix
-            emit = self.pending[:-hold_len]
-            self.pending = self.pending[-hold_len:]
-        else:
-            # Safe to flush everything
-            emit = self.pending
-            self.pending = ""
-
-        return emit
+        # Everything before the longest partial match is final
+        result = self._flush(self._position - self.matcher.depth[self._state])
+        self.output += result
+        return result
 
     def finalize(self) -> str:
         """Flush any remaining buffered text. If pending contains an unresolved partial
@@ -111,14 +117,18 @@ class StreamingSecretsFilter:
         if not self.pending:
             return ""
 
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            safe = self.pending[:-hold_len]
+        partial = self.matcher.depth[self._state]
+        if partial < self.min_trigger:
+            partial = 0
+        result = self._flush(self._position - partial)
+        if self.pending:
             # Mask unresolved partial
-            result = safe + "***"
-        else:
-            result = self.pending
+            result += "***"
         self.pending = ""
+        self._pending_start = self._position
+        self._state = 0
+        self._matches = []
+        self.output += result
         return result
 
 
@@ -127,6 +137,8 @@ class SecretsManager:
     MASK_VALUE = "***"
 
     _instances: Dict[Tuple[str, ...], "SecretsManager"] = {}
+    # incremented whenever saved secrets change, lets dependent caches detect it
+    version: int = 0
     _secrets_cache: Optional[Dict[str, str]] = None
     _last_raw_text: Optional[str] = None
 
@@ -146,6 +158,8 @@ class SecretsManager:
         self._raw_snapshots: Dict[str, str] = {}
         self._secrets_cache = None
         self._last_raw_text = None
+        # compiled matchers for the cached secrets, keyed by min value length
+        self._matchers: Dict[int, Tuple[AhoCorasick, Dict[str, str]]] = {}
 
     def read_secrets_raw(self) -> str:
         """Read raw secrets file content from local filesystem (same system)."""
@@ -254,9 +268,29 @@ class SecretsManager:
             key_formatter=alias_for_key,
         )
 
+    def get_matcher(self, min_length: int = 1) -> Tuple[AhoCorasick, Dict[str, str]]:
+        """Compiled matcher for secret values of at least min_length (stripped) and
+        a value -> key map. Built once per loaded secrets, dropped by clear_cache()."""
+        with self._lock:
+            compiled = self._matchers.get(min_length)
+            if compiled is None:
+                value_to_key: Dict[str, str] = {}
+                # longer values first, same precedence as sequential replacing
+                for key, value in sorted(
+                    self.load_secrets().items(), key=lambda x: len(x[1]), reverse=True
+                ):
+                    if value and len(value.strip()) >= min_length:
+                        value_to_key.setdefault(value, key)
+                compiled = (AhoCorasick(value_to_key.keys()), value_to_key)
+                self._matchers[min_length] = compiled
+            return compiled
+
     def create_streaming_filter(self) -> "StreamingSecretsFilter":
         """Create a streaming-aware secrets filter snapshotting current secret values."""
-        return StreamingSecretsFilter(self.load_secrets())
+        matcher, value_to_key = self.get_matcher()
+        return StreamingSecretsFilter(
+            {key: value for value, key in value_to_key.items()}, matcher=matcher
+        )
 
     def replace_placeholders(self, text: str) -> str:
         """Replace secret placeholders with actual values"""
@@ -296,23 +330,20 @@ class SecretsManager:
         return result
 
     def mask_values(
-        self, text: str, min_length: int = 4, placeholder: str = "§§secret({key})"
+        self, text: str, min_length: int = MASK_MIN_LENGTH, placeholder: str = "§§secret({key})"
     ) -> str:
         """Replace actual secret values with placeholders in text"""
         if not text:
             return text
 
-        secrets = self.load_secrets()
-        result = text
-
-        # Sort by length (longest first) to avoid partial replacements
-        for key, value in sorted(
-            secrets.items(), key=lambda x: len(x[1]), reverse=True
-        ):
-            if value and len(value.strip()) >= min_length:
-                result = result.replace(value, alias_for_key(key, placeholder))
+        matcher, value_to_key = self.get_matcher(min_length)
+        if not matcher:
+            return text
 
-        return result
+        # Single pass over the text, longest match wins on overlaps
+        return matcher.replace(
+            text, lambda value: alias_for_key(value_to_key[value], placeholder)
+        )
 
     def get_masked_secrets(self) -> str:
         """Get content with values masked for frontend display (preserves comments and unrecognized lines)"""
@@ -351,9 +382,11 @@ class SecretsManager:
             self._secrets_cache = None
             self._raw_snapshots = {}
             self._last_raw_text = None
+            self._matchers = {}
 
     @classmethod
     def _invalidate_all_caches(cls):
+        SecretsManager.version += 1
         for instance in cls._instances.values():
             instance.clear_cache()
 
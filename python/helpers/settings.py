@@ -4,6 +4,8 @@ import json
 import os
 import re
 import subprocess
+import threading
+from functools import cache
 from typing import Any, Literal, TypedDict, cast, TypeVar
 
 import models
@@ -11,7 +13,7 @@ from python.helpers import runtime, whisper, defer, git
 from . import files, dotenv
 from python.helpers.print_style import PrintStyle
 from python.helpers.providers import get_providers, FieldOption as ProvidersFO
-from python.helpers.secrets import get_default_secrets_manager
+from python.helpers.secrets import get_default_secrets_manager, DEFAULT_SECRETS_FILE
 from python.helpers import dirty_json
 from python.helpers.notification import NotificationManager, NotificationType, NotificationPriority
 
@@ -222,6 +224,11 @@ API_KEY_PLACEHOLDER = "************"
 
 SETTINGS_FILE = files.get_abs_path("usr/settings.json")
 _settings: Settings | None = None
+_settings_version = 0  # incremented when settings are saved, reloaded or their files change
+# normalized settings with sensitive values, rebuilt only when a source file changes
+_snapshot: Settings | None = None
+_snapshot_stamp: tuple | None = None
+_snapshot_lock = threading.RLock()
 _runtime_settings_snapshot: Settings | None = None
 
 OptionT = TypeVar("OptionT", bound=FieldOption)
@@ -353,32 +360,84 @@ def convert_in(settings: Settings) -> Settings:
 
 
 def get_settings() -> Settings:
-    global _settings
-    if not _settings:
-        _settings = _read_settings_file()
-    if not _settings:
-        _settings = get_default_settings()
-    norm = normalize_settings(_settings)
-    _load_sensitive_settings(norm)
-    return norm
+    return _copy_settings(_get_snapshot())
 
 
 def reload_settings() -> Settings:
-    global _settings
-    _settings = None
+    global _settings, _snapshot, _settings_version
+    with _snapshot_lock:
+        _settings = None
+        _snapshot = None
+        _settings_version += 1
     return get_settings()
 
 
+def get_settings_version() -> int:
+    """Changes whenever get_settings() would return different values, usable as a cache key."""
+    with _snapshot_lock:
+        _get_snapshot()
+        return _settings_version
+
+
+def _get_snapshot() -> Settings:
+    global _settings, _snapshot, _snapshot_stamp, _settings_version
+    with _snapshot_lock:
+        # stat before reading, a write in between is picked up by the next call
+        stamp = _get_source_stamp()
+        if _snapshot is not None and stamp == _snapshot_stamp:
+            return _snapshot
+        if _snapshot is not None:
+            # changed outside of set_settings
+            if stamp[1] != _snapshot_stamp[1]:  # type: ignore[index]
+                dotenv.load_dotenv()
+            _settings = None
+            _settings_version += 1
+        if not _settings:
+            _settings = _read_settings_file()
+        if not _settings:
+            _settings = get_default_settings()
+        norm = normalize_settings(_settings)
+        _load_sensitive_settings(norm)
+        _snapshot, _snapshot_stamp = norm, stamp
+        return _snapshot
+
+
+def _get_source_stamp() -> tuple:
+    stamp = []
+    for path in (
+        SETTINGS_FILE,
+        dotenv.get_dotenv_file_path(),
+        files.get_abs_path(DEFAULT_SECRETS_FILE),
+    ):
+        try:
+            stat = os.stat(path)
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _copy_settings(settings: Settings) -> Settings:
+    # callers modify the returned dict and its api_keys / *_kwargs dicts, keep the snapshot intact
+    return cast(Settings, {
+        key: value.copy() if isinstance(value, (dict, list)) else value
+        for key, value in settings.items()
+    })
+
+
 def set_runtime_settings_snapshot(settings: Settings) -> None:
     global _runtime_settings_snapshot
     _runtime_settings_snapshot = settings.copy()
 
 
 def set_settings(settings: Settings, apply: bool = True):
-    global _settings
-    previous = _settings
-    _settings = normalize_settings(settings)
-    _write_settings_file(_settings)
+    global _settings, _snapshot, _settings_version
+    with _snapshot_lock:
+        previous = _settings
+        _settings = normalize_settings(settings)
+        _settings_version += 1
+        _write_settings_file(_settings)
+        _snapshot = None
     if apply:
         _apply_settings(previous)
     return reload_settings()
@@ -611,6 +670,8 @@ def _apply_settings(previous: Settings | None):
         config = initialize_agent()
         for ctx in AgentContext.all():
             ctx.config = config  # reinitialize context config with new settings
+            if not ctx.loaded:
+                continue  # agents of unopened chats are created with ctx.config later
             # apply config to agents
             agent = ctx.agent0
             while agent:
@@ -811,6 +872,7 @@ def create_auth_token() -> str:
     return b64_token[:16]
 
 
+@cache
 def _get_version():
     return git.get_version()
 
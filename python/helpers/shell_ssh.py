@@ -1,10 +1,12 @@
 import asyncio
+import codecs
 import paramiko
 import time
 import re
 from typing import Tuple
 from python.helpers.log import Log
 from python.helpers.print_style import PrintStyle
+from python.helpers.terminal_output import TerminalOutput
 # from python.helpers.strings import calculate_valid_match_lengths
 
 
@@ -24,7 +26,8 @@ class SSHInteractiveSession:
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.shell = None
-        self.full_output = b""
+        self.output = TerminalOutput()
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         self.last_command = b""
         self.trimmed_command_length = 0  # Initialize trimmed_command_length
         self.cwd = cwd
@@ -88,6 +91,7 @@ class SSHInteractiveSession:
                     raise e
 
     async def close(self):
+        self.output.close()
         if self.shell:
             self.shell.close()
         if self.client:
@@ -96,7 +100,7 @@ class SSHInteractiveSession:
     async def send_command(self, command: str):
         if not self.shell:
             raise Exception("Shell not connected")
-        self.full_output = b""
+        self.output.reset()
         # if len(command) > 10: # if command is long, add end_comment to split output
         #     command = (command + " \\\n" +SSHInteractiveSession.end_comment + "\n")
         # else:
@@ -106,13 +110,13 @@ class SSHInteractiveSession:
         self.shell.send(self.last_command)
         
     async def read_output(
-        self, timeout: float = 0, reset_full_output: bool = False
+        self, timeout: float = 0, reset_full_output: bool = False, with_full_output: bool = True
     ) -> Tuple[str, str]:
         if not self.shell:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = b""
+            self.output.reset()
         partial_output = b""
         leftover = b""
         start_time = time.time()
@@ -152,15 +156,15 @@ class SSHInteractiveSession:
             #         self.trimmed_command_length += trim_com
 
             partial_output += data
-            self.full_output += data
             await asyncio.sleep(0.1)  # Prevent busy waiting
 
-        # Decode once at the end
-        decoded_partial_output = partial_output.decode("utf-8", errors="replace")
-        decoded_full_output = self.full_output.decode("utf-8", errors="replace")
+        # Decode once at the end, the decoder keeps an incomplete sequence for the next read
+        decoded_partial_output = self.decoder.decode(partial_output)
+        self.output.append(decoded_partial_output)
 
         decoded_partial_output = clean_string(decoded_partial_output)
-        decoded_full_output = clean_string(decoded_full_output)
+        # the full text is built only for callers that ask for it, others read self.output
+        decoded_full_output = self.output.text() if with_full_output else ""
 
         return decoded_full_output, decoded_partial_output
 
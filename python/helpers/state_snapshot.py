@@ -290,7 +290,7 @@ async def build_snapshot_from_request(*, request: StateRequestV1) -> SnapshotV1:
         "tasks": tasks,
         "logs": logs,
         "log_guid": active_context.log.guid if active_context else "",
-        "log_version": len(active_context.log.updates) if active_context else 0,
+        "log_version": active_context.log.version if active_context else 0,
         "log_progress": active_context.log.progress if active_context else 0,
         "log_progress_active": bool(active_context.log.progress_active) if active_context else False,
         "paused": active_context.paused if active_context else False,
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from python.helpers import files, projects, skills, subagents
+from python.helpers.settings import get_settings_version
+
+if TYPE_CHECKING:
+    from agent import Agent
+
+MAX_ENTRIES = 64
+
+
+@dataclass(frozen=True)
+class CachedPrompt:
+    parts: tuple[str, ...]
+    hash: str
+
+
+_cache: OrderedDict[tuple, CachedPrompt] = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_prompt(agent: "Agent", build: Callable[[], list[str]]) -> CachedPrompt:
+    """Returns the system prompt parts for the agent, built only when an input changed.
+    Unchanged inputs give the identical strings and hash, which keeps provider-side
+    prompt caching effective."""
+    key = get_key(agent)
+    with _lock:
+        cached = _cache.get(key)
+        if cached:
+            _cache.move_to_end(key)
+            return cached
+
+    parts = tuple(build())
+    digest = hashlib.sha256("\n\n".join(parts).encode("utf-8", errors="replace")).hexdigest()
+    cached = CachedPrompt(parts=parts, hash=digest)
+    with _lock:
+        _cache[key] = cached
+        if len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return cached
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def get_key(agent: "Agent") -> tuple:
+    """Everything the main system prompt depends on, files by count and latest mtime."""
+    from python.helpers.mcp_handler import get_config_version
+    from python.helpers.secrets import SecretsManager
+
+    project = projects.get_context_project_name(agent.context) or ""
+    project_folders: list[str] = []
+    if project:
+        project_folders = [
+            projects.get_project_meta_folder(project),
+            projects.get_project_meta_folder(project, projects.PROJECT_INSTRUCTIONS_DIR),
+        ]
+
+    return (
+        agent.config.profile or "",
+        project,
+        bool(agent.config.chat_model.vision),
+        get_settings_version(),
+        get_config_version(),
+        SecretsManager.version,
+        folders_stamp(subagents.get_paths(agent, "prompts")),
+        folders_stamp(skills.get_skill_roots(agent), depth=-1),
+        # agent profiles offered by the call_subordinate tool prompt
+        folders_stamp(
+            [
+                files.get_abs_path(subagents.DEFAULT_AGENTS_DIR),
+                files.get_abs_path(subagents.USER_AGENTS_DIR),
+            ],
+            depth=1,
+        ),
+        folders_stamp(project_folders),
+    )
+
+
+def folders_stamp(folders: list[str], depth: int = 0) -> tuple[int, float]:
+    """Number of entries and latest mtime in folders, down to depth levels (-1 for all)."""
+    count = 0
+    latest = 0.0
+    stack = [(folder, depth) for folder in folders]
+    while stack:
+        folder, level = stack.pop()
+        try:
+            latest = max(latest, os.stat(folder).st_mtime)
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    count += 1
+                    if entry.is_dir():
+                        if level != 0 and not entry.name.startswith((".", "__")):
+                            stack.append((entry.path, level - 1))
+                    else:
+                        latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            continue
+    return count, latest
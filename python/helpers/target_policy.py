@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import ipaddress
 import re
+import threading
+from typing import AsyncIterator
 from urllib.parse import urlparse
 
+from python.helpers.rate_limiter import RateLimiter
+
 
 AUTHORIZED_HOSTS = {
     "localhost",
@@ -18,6 +24,14 @@ AUTHORIZED_HOSTS = {
 
 AUTHORIZED_SUFFIXES = (".local", ".internal")
 
+# limits per target host for automated scan stages (scan_pipeline)
+TARGET_MAX_CONCURRENT_STAGES = 2
+TARGET_STAGES_PER_MINUTE = 10
+
+_target_slots: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+_target_limiters: dict[str, RateLimiter] = {}
+_targets_lock = threading.Lock()
+
 
 def _extract_host(value: str) -> str:
     candidate = value.strip().strip("'\"")
@@ -83,3 +97,40 @@ def validate_targets(values: list[str]) -> tuple[bool, str | None]:
         if not ok:
             return False, reason
     return True, None
+
+
+def blocked_scan_message(reason: str | None) -> str:
+    return (
+        "Sentra policy blocked this scan request. "
+        f"{reason} "
+        "This prototype only permits authorized local-lab targets such as localhost, private IPs, "
+        "`dvwa`, `juice-shop`, `sentra-demo-vulnerable`, and `sentra-demo-remediated`."
+    )
+
+
+@contextlib.asynccontextmanager
+async def target_slot(value: str) -> AsyncIterator[str]:
+    """
+    Hold one of the scan stage slots of the target host for the duration of the block.
+    Enforces TARGET_MAX_CONCURRENT_STAGES and TARGET_STAGES_PER_MINUTE per host,
+    raises PermissionError for targets outside the authorized scope.
+    """
+    ok, host = is_authorized_target(value)
+    if not ok:
+        raise PermissionError(host)
+
+    loop = asyncio.get_running_loop()
+    with _targets_lock:
+        slot = _target_slots.get(host)
+        if slot is None or slot[0] is not loop:
+            slot = (loop, asyncio.Semaphore(TARGET_MAX_CONCURRENT_STAGES))
+            _target_slots[host] = slot
+        limiter = _target_limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(seconds=60, mode="token_bucket", stages=TARGET_STAGES_PER_MINUTE)
+            _target_limiters[host] = limiter
+
+    async with slot[1]:
+        await limiter.wait()
+        limiter.add(stages=1)
+        yield host
@@ -1,5 +1,8 @@
 import asyncio
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+import heapq
+import json
 import os
 import random
 import threading
@@ -13,20 +16,29 @@ import nest_asyncio
 nest_asyncio.apply()
 
 from crontab import CronTab
-from pydantic import BaseModel, Field, PrivateAttr
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
 
 from agent import Agent, AgentContext, UserMessage
 from initialize import initialize_agent
 from python.helpers.persist_chat import save_tmp_chat
 from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
-from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
+from python.helpers.files import get_abs_path, make_dirs, read_file
 from python.helpers.localization import Localization
 from python.helpers import projects, guids
 import pytz
 from typing import Annotated
 
 SCHEDULER_FOLDER = "usr/scheduler"
+TASKS_FILE = "tasks.json"
+JOURNAL_FILE = "tasks.journal.jsonl"
+JOURNAL_MAX_ENTRIES = 200  # tasks.json is rewritten after this many journaled changes
+
+
+@lru_cache(maxsize=256)
+def get_crontab(expression: str) -> CronTab:
+    """Parsed crontab, shared by all tasks with the same schedule."""
+    return CronTab(crontab=expression)  # type: ignore
 
 # ----------------------
 # Task Models
@@ -53,9 +65,15 @@ class TaskSchedule(BaseModel):
     month: str
     weekday: str
     timezone: str = Field(default_factory=lambda: Localization.get().get_timezone())
+    # optional seconds field for sub-minute schedules, ex. */15
+    second: str = Field(default="0")
 
     def to_crontab(self) -> str:
-        return f"{self.minute} {self.hour} {self.day} {self.month} {self.weekday}"
+        crontab = f"{self.minute} {self.hour} {self.day} {self.month} {self.weekday}"
+        if self.second not in ("", "0"):
+            # seconds first, all years
+            crontab = f"{self.second} {crontab} *"
+        return crontab
 
 
 class TaskPlan(BaseModel):
@@ -184,6 +202,9 @@ class BaseTask(BaseModel):
     def get_next_run(self) -> datetime | None:
         return None
 
+    def get_next_run_after(self, after: datetime) -> datetime | None:
+        return None
+
     def is_dedicated(self) -> bool:
         return self.context_id == self.uuid
 
@@ -205,9 +226,8 @@ class BaseTask(BaseModel):
         )
 
     async def on_error(self, error: str):
-        # Update task state to ERROR and set last result
+        # Update task state to ERROR and set last result, persisted by update_task
         scheduler = TaskScheduler.get()
-        await scheduler.reload()  # Ensure we have the latest state
         updated_task = await scheduler.update_task(
             self.uuid,
             state=TaskState.ERROR,
@@ -218,12 +238,10 @@ class BaseTask(BaseModel):
             PrintStyle.error(
                 f"Failed to update task {self.uuid} state to ERROR after error: {error}"
             )
-        await scheduler.save()  # Force save after update
 
     async def on_success(self, result: str):
-        # Update task state to IDLE and set last result
+        # Update task state to IDLE and set last result, persisted by update_task
         scheduler = TaskScheduler.get()
-        await scheduler.reload()  # Ensure we have the latest state
         updated_task = await scheduler.update_task(
             self.uuid,
             state=TaskState.IDLE,
@@ -234,7 +252,6 @@ class BaseTask(BaseModel):
             PrintStyle.error(
                 f"Failed to update task {self.uuid} state to IDLE after success"
             )
-        await scheduler.save()  # Force save after update
 
 
 class AdHocTask(BaseTask):
@@ -341,7 +358,7 @@ class ScheduledTask(BaseTask):
 
     def check_schedule(self, frequency_seconds: float = 60.0) -> bool:
         with self._lock:
-            crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
+            crontab = get_crontab(self.schedule.to_crontab())
 
             # Get the timezone from the schedule or use UTC as fallback
             task_timezone = pytz.timezone(self.schedule.timezone or Localization.get().get_timezone())
@@ -362,9 +379,19 @@ class ScheduledTask(BaseTask):
             return next_run_seconds < frequency_seconds
 
     def get_next_run(self) -> datetime | None:
+        return self.get_next_run_after(datetime.now(timezone.utc))
+
+    def get_next_run_after(self, after: datetime) -> datetime | None:
         with self._lock:
-            crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
-            return crontab.next(now=datetime.now(timezone.utc), return_datetime=True)  # type: ignore
+            crontab = get_crontab(self.schedule.to_crontab())
+            task_timezone = pytz.timezone(self.schedule.timezone or Localization.get().get_timezone())
+            next_run_seconds: Optional[float] = crontab.next(  # type: ignore
+                now=after.astimezone(task_timezone),
+                return_datetime=False
+            )  # type: ignore
+            if next_run_seconds is None:
+                return None
+            return after + timedelta(seconds=next_run_seconds)
 
 
 class PlannedTask(BaseTask):
@@ -422,6 +449,10 @@ class PlannedTask(BaseTask):
         with self._lock:
             return self.plan.get_next_launch_time()
 
+    def get_next_run_after(self, after: datetime) -> datetime | None:
+        # past launch times are due right away
+        return self.get_next_run()
+
     async def on_run(self):
         with self._lock:
             # Get the next launch time and set it as in_progress
@@ -442,10 +473,7 @@ class PlannedTask(BaseTask):
 
         # If we updated the plan, make sure to persist it
         if plan_updated:
-            scheduler = TaskScheduler.get()
-            await scheduler.reload()
-            await scheduler.update_task(self.uuid, plan=self.plan)
-            await scheduler.save()  # Force save
+            await TaskScheduler.get().update_task(self.uuid, plan=self.plan)
 
         # Call the parent implementation for any additional cleanup
         await super().on_finish()
@@ -459,83 +487,66 @@ class PlannedTask(BaseTask):
         await super().on_error(error)
 
 
+Task = Annotated[Union[ScheduledTask, AdHocTask, PlannedTask], Field(discriminator="type")]
+_task_adapter: TypeAdapter[Union[ScheduledTask, AdHocTask, PlannedTask]] = TypeAdapter(Task)
+
+
 class SchedulerTaskList(BaseModel):
-    tasks: list[Annotated[Union[ScheduledTask, AdHocTask, PlannedTask], Field(discriminator="type")]] = Field(default_factory=list)
+    """Tasks indexed in memory, persisted as tasks.json plus a journal of changes.
+
+    The files are only parsed again when their size or mtime changed,
+    for example when another instance edited the tasks.
+    """
+
+    tasks: list[Task] = Field(default_factory=list)
     # Singleton instance
     __instance: ClassVar[Optional["SchedulerTaskList"]] = PrivateAttr(default=None)
 
-    # lock: threading.Lock = Field(exclude=True, default=threading.Lock())
-
     @classmethod
     def get(cls) -> "SchedulerTaskList":
-        path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
         if cls.__instance is None:
-            if not exists(path):
-                make_dirs(path)
-                cls.__instance = asyncio.run(cls(tasks=[]).save())
+            cls.__instance = cls(tasks=[])
+            if exists(get_abs_path(SCHEDULER_FOLDER, TASKS_FILE)):
+                cls.__instance._reload_if_changed()
             else:
-                cls.__instance = cls.model_validate_json(read_file(path))
+                cls.__instance._write_snapshot()
         else:
-            asyncio.run(cls.__instance.reload())
+            cls.__instance._reload_if_changed()
         return cls.__instance
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._lock = threading.RLock()
+        self._by_uuid: dict[str, Union[ScheduledTask, AdHocTask, PlannedTask]] = {}
+        self._by_context: dict[str, list[Union[ScheduledTask, AdHocTask, PlannedTask]]] = {}
+        # min-heap of (due timestamp, uuid), entries not matching _next_due are stale
+        self._due_heap: list[tuple[float, str]] = []
+        self._next_due: dict[str, float] = {}
+        # cron schedules are due when they fire after this time
+        self._checked_until = datetime.now(timezone.utc)
+        self._stamp: tuple | None = None
+        self._journal_entries = 0
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._reindex()
 
     async def reload(self) -> "SchedulerTaskList":
-        path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
-        if exists(path):
-            with self._lock:
-                data = self.__class__.model_validate_json(read_file(path))
-                self.tasks.clear()
-                self.tasks.extend(data.tasks)
+        self._reload_if_changed()
         return self
 
     async def add_task(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]) -> "SchedulerTaskList":
         with self._lock:
+            self._reload_if_changed()
             self.tasks.append(task)
-            await self.save()
+            self._index(task)
+            self._append_journal({"op": "upsert", "task": self._dump_task(task)})
+            self._schedule(task)
+        self._notify()
         return self
 
     async def save(self) -> "SchedulerTaskList":
+        """Write all tasks to tasks.json and clear the journal."""
         with self._lock:
-            # Debug: check for AdHocTasks with null tokens before saving
-            for task in self.tasks:
-                if isinstance(task, AdHocTask):
-                    if task.token is None or task.token == "":
-                        PrintStyle.warning(
-                            f"WARNING: AdHocTask {task.name} ({task.uuid}) has a null or empty token before saving: '{task.token}'"
-                        )
-                        # Generate a new token to prevent errors
-                        task.token = str(random.randint(1000000000000000000, 9999999999999999999))
-                        PrintStyle.info(
-                            f"Fixed: Generated new token '{task.token}' for task {task.name}"
-                        )
-
-            path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
-            if not exists(path):
-                make_dirs(path)
-
-            # Get the JSON string before writing
-            json_data = self.model_dump_json()
-
-            # Debug: check if 'null' appears as token value in JSON
-            if '"type": "adhoc"' in json_data and '"token": null' in json_data:
-                PrintStyle.error(
-                    "ERROR: Found null token in JSON output for an adhoc task"
-                )
-
-            write_file(path, json_data)
-
-            # Debug: Verify after saving
-            if exists(path):
-                loaded_json = read_file(path)
-                if '"type": "adhoc"' in loaded_json and '"token": null' in loaded_json:
-                    PrintStyle.error(
-                        "ERROR: Null token persisted in JSON file for an adhoc task"
-                    )
-
+            self._write_snapshot()
         return self
 
     async def update_task_by_uuid(
@@ -553,21 +564,22 @@ class SchedulerTaskList(BaseModel):
         Returns the updated task or None if not found.
         """
         with self._lock:
-            # Reload to ensure we have the latest state
-            await self.reload()
+            # Pick up changes of other instances first
+            self._reload_if_changed()
 
-            # Find the task
-            task = next((task for task in self.tasks if task.uuid == task_uuid and verify_func(task)), None)
-            if task is None:
+            task = self._by_uuid.get(task_uuid)
+            if task is None or not verify_func(task):
                 return None
 
-            # Apply the updates via the provided function
+            context_id = task.context_id
             updater_func(task)
+            if task.context_id != context_id:
+                self._reindex()
 
-            # Save the changes
-            await self.save()
-
-            return task
+            self._append_journal({"op": "upsert", "task": self._dump_task(task)})
+            self._schedule(task)
+        self._notify()
+        return task
 
     def get_tasks(self) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
         with self._lock:
@@ -576,22 +588,64 @@ class SchedulerTaskList(BaseModel):
     def get_tasks_by_context_id(self, context_id: str, only_running: bool = False) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
         with self._lock:
             return [
-                task for task in self.tasks
-                if task.context_id == context_id
-                and (not only_running or task.state == TaskState.RUNNING)
+                task for task in self._by_context.get(context_id, [])
+                if not only_running or task.state == TaskState.RUNNING
             ]
 
     async def get_due_tasks(self) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
         with self._lock:
-            await self.reload()
-            return [
-                task for task in self.tasks
-                if task.check_schedule() and task.state == TaskState.IDLE
-            ]
+            self._reload_if_changed()
+            now = datetime.now(timezone.utc)
+            fired: list[Union[ScheduledTask, AdHocTask, PlannedTask]] = []
+            while self._due_heap and self._due_heap[0][0] <= now.timestamp():
+                due, task_uuid = heapq.heappop(self._due_heap)
+                task = self._by_uuid.get(task_uuid)
+                if task is None or self._next_due.get(task_uuid) != due:
+                    continue  # removed or rescheduled
+                del self._next_due[task_uuid]
+                fired.append(task)
+
+            # missed runs are not repeated, schedules continue from now
+            self._checked_until = now
+            due_tasks = []
+            for task in fired:
+                idle = task.state == TaskState.IDLE
+                if idle and (isinstance(task, ScheduledTask) or task.check_schedule()):
+                    due_tasks.append(task)
+                    if isinstance(task, PlannedTask):
+                        continue  # scheduled again when its plan is updated
+                elif isinstance(task, PlannedTask) and not idle:
+                    continue  # scheduled again when its state is updated
+                self._schedule(task)
+            return due_tasks
+
+    def seconds_until_due(self) -> float | None:
+        """Seconds until the earliest scheduled run, None without scheduled tasks."""
+        with self._lock:
+            while self._due_heap:
+                due, task_uuid = self._due_heap[0]
+                if self._next_due.get(task_uuid) == due:
+                    return max(due - datetime.now(timezone.utc).timestamp(), 0.0)
+                heapq.heappop(self._due_heap)
+            return None
+
+    async def wait_for_change(self, timeout: float):
+        """Wait until tasks are added or updated in this process, or the timeout passes."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
 
     def get_task_by_uuid(self, task_uuid: str) -> Union[ScheduledTask, AdHocTask, PlannedTask] | None:
         with self._lock:
-            return next((task for task in self.tasks if task.uuid == task_uuid), None)
+            return self._by_uuid.get(task_uuid)
 
     def get_task_by_name(self, name: str) -> Union[ScheduledTask, AdHocTask, PlannedTask] | None:
         with self._lock:
@@ -603,16 +657,146 @@ class SchedulerTaskList(BaseModel):
 
     async def remove_task_by_uuid(self, task_uuid: str) -> "SchedulerTaskList":
         with self._lock:
-            self.tasks = [task for task in self.tasks if task.uuid != task_uuid]
-            await self.save()
+            self._reload_if_changed()
+            self._remove([task for task in self.tasks if task.uuid == task_uuid])
         return self
 
     async def remove_task_by_name(self, name: str) -> "SchedulerTaskList":
         with self._lock:
-            self.tasks = [task for task in self.tasks if task.name != name]
-            await self.save()
+            self._reload_if_changed()
+            self._remove([task for task in self.tasks if task.name == name])
         return self
 
+    def _remove(self, removed: list[Union[ScheduledTask, AdHocTask, PlannedTask]]):
+        if not removed:
+            return
+        uuids = {task.uuid for task in removed}
+        self.tasks = [task for task in self.tasks if task.uuid not in uuids]
+        self._reindex()
+        for task_uuid in uuids:
+            self._append_journal({"op": "remove", "uuid": task_uuid})
+
+    # ----------------------
+    # Index and schedule
+    # ----------------------
+
+    def _index(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]):
+        self._by_uuid[task.uuid] = task
+        if task.context_id:
+            self._by_context.setdefault(task.context_id, []).append(task)
+
+    def _reindex(self):
+        self._by_uuid = {}
+        self._by_context = {}
+        for task in self.tasks:
+            self._index(task)
+        self._due_heap = []
+        self._next_due = {}
+        for task in self.tasks:
+            self._schedule(task)
+
+    def _schedule(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]):
+        try:
+            next_run = task.get_next_run_after(self._checked_until)
+        except Exception as e:
+            PrintStyle.error(f"Invalid schedule of task {task.name} ({task.uuid}): {e}")
+            next_run = None
+        if next_run is None:
+            self._next_due.pop(task.uuid, None)
+            return
+        due = next_run.timestamp()
+        if self._next_due.get(task.uuid) != due:
+            self._next_due[task.uuid] = due
+            heapq.heappush(self._due_heap, (due, task.uuid))
+
+    def _notify(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    # ----------------------
+    # Persistence
+    # ----------------------
+
+    def _file_stamp(self) -> tuple:
+        stamp = []
+        for name in (TASKS_FILE, JOURNAL_FILE):
+            try:
+                stat = os.stat(get_abs_path(SCHEDULER_FOLDER, name))
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _reload_if_changed(self):
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return
+            path = get_abs_path(SCHEDULER_FOLDER, TASKS_FILE)
+            tasks = self.__class__.model_validate_json(read_file(path)).tasks if exists(path) else []
+            by_uuid = {task.uuid: task for task in tasks}
+            entries = 0
+            journal = get_abs_path(SCHEDULER_FOLDER, JOURNAL_FILE)
+            if exists(journal):
+                for line in read_file(journal).splitlines():
+                    try:
+                        entry = json.loads(line)
+                        if entry["op"] == "upsert":
+                            task = _task_adapter.validate_python(entry["task"])
+                            by_uuid[task.uuid] = task
+                        else:
+                            by_uuid.pop(entry["uuid"], None)
+                    except (ValueError, KeyError):
+                        break  # torn write at the end of the journal
+                    entries += 1
+            self.tasks.clear()
+            self.tasks.extend(by_uuid.values())
+            self._journal_entries = entries
+            self._stamp = stamp
+            self._reindex()
+
+    def _dump_task(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]) -> dict[str, Any]:
+        if isinstance(task, AdHocTask) and not task.token:
+            PrintStyle.warning(
+                f"WARNING: AdHocTask {task.name} ({task.uuid}) has a null or empty token before saving: '{task.token}'"
+            )
+            # Generate a new token to prevent errors
+            task.token = str(random.randint(1000000000000000000, 9999999999999999999))
+            PrintStyle.info(
+                f"Fixed: Generated new token '{task.token}' for task {task.name}"
+            )
+        return task.model_dump(mode="json")
+
+    def _append_journal(self, entry: dict[str, Any]):
+        if self._journal_entries >= JOURNAL_MAX_ENTRIES:
+            self._write_snapshot()
+            return
+        path = get_abs_path(SCHEDULER_FOLDER, JOURNAL_FILE)
+        make_dirs(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal_entries += 1
+        self._stamp = self._file_stamp()
+
+    def _write_snapshot(self):
+        for task in self.tasks:
+            self._dump_task(task)
+        path = get_abs_path(SCHEDULER_FOLDER, TASKS_FILE)
+        make_dirs(path)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.model_dump_json())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        # the snapshot contains all journaled changes
+        with open(get_abs_path(SCHEDULER_FOLDER, JOURNAL_FILE), "w", encoding="utf-8"):
+            pass
+        self._journal_entries = 0
+        self._stamp = self._file_stamp()
+
 
 class TaskScheduler:
 
@@ -706,6 +890,13 @@ class TaskScheduler:
         for task in await self._tasks.get_due_tasks():
             await self._run_task(task)
 
+    async def wait_for_due(self, max_seconds: float):
+        """Sleep until the next task is due, tasks change or max_seconds pass."""
+        delay = self._tasks.seconds_until_due()
+        delay = max_seconds if delay is None else min(delay, max_seconds)
+        if delay > 0:
+            await self._tasks.wait_for_change(delay)
+
     async def run_task_by_uuid(self, task_uuid: str, task_context: str | None = None):
         # First reload tasks to ensure we have the latest state
         await self._tasks.reload()
@@ -944,14 +1135,6 @@ class TaskScheduler:
                 except Exception:
                     pass
 
-                # Make one final save to ensure all states are persisted
-                try:
-                    await asyncio.shield(self._tasks.save())
-                except asyncio.CancelledError:
-                    pass
-                except Exception:
-                    pass
-
                 self._unregister_running_task(task_uuid)
 
         deferred_task = DeferredTask(thread_name=self.__class__.__name__)
@@ -1020,6 +1203,7 @@ def parse_datetime(dt_str: Optional[str]) -> Optional[datetime]:
 def serialize_task_schedule(schedule: TaskSchedule) -> Dict[str, str]:
     """Convert TaskSchedule to a standardized dictionary format."""
     return {
+        'second': schedule.second,
         'minute': schedule.minute,
         'hour': schedule.hour,
         'day': schedule.day,
@@ -1038,7 +1222,8 @@ def parse_task_schedule(schedule_data: Dict[str, str]) -> TaskSchedule:
             day=schedule_data.get('day', '*'),
             month=schedule_data.get('month', '*'),
             weekday=schedule_data.get('weekday', '*'),
-            timezone=schedule_data.get('timezone', Localization.get().get_timezone())
+            timezone=schedule_data.get('timezone', Localization.get().get_timezone()),
+            second=schedule_data.get('second', '0') or '0',
         )
     except Exception as e:
         raise ValueError(f"Invalid schedule format: {e}") from e
@@ -0,0 +1,197 @@
+import os
+import re
+import uuid
+from collections import deque
+from itertools import chain, islice
+from typing import IO
+
+from python.helpers import files
+
+# cleaned output kept in memory and returned as full output, the rest is only in the spill file
+HEAD_CHARS = 200_000
+TAIL_CHARS = 700_000
+MAX_PENDING_CHARS = 100_000  # an unterminated line longer than this is committed as is
+SPILL_FOLDER = "tmp/terminal"
+KEPT_SPILL_FILES = 10  # spill files of earlier commands kept until close(), oldest are deleted first
+
+_ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+_PARTIAL_ESCAPE = re.compile(r"\x1B(?:\[[0-?]*[ -/]*)?$")  # rest of the sequence is in the next chunk
+_LEADING_IPYTHON = re.compile(r"^[ \r]*(?:\r*\n>[ \r]*)*")
+_LEADING_PROMPTS = re.compile(r"^(>\s*)+")
+
+
+class TerminalOutput:
+    """
+    Cleaned output of one terminal command, built incrementally.
+    Produces the same text as shell_ssh.clean_string over the whole output,
+    but every chunk is cleaned only once and complete lines are never touched again.
+    When the output outgrows HEAD_CHARS + TAIL_CHARS, the middle is dropped from memory
+    and the full transcript is written to a spill file instead.
+    With spool=True the transcript is written to the spill file from the first line.
+    Every command gets its own spill file, the agent may still read earlier ones.
+    """
+
+    def __init__(self, spool: bool = False):
+        self.spill_path = ""
+        self.spool = spool
+        self._spill: IO[str] | None = None
+        self._kept: deque[str] = deque()  # spill files of earlier commands
+        self.reset()
+
+    def reset(self):
+        """Start the output of the next command, the last spill file stays on disk."""
+        self._close_spill()
+        if self.spill_path and os.path.exists(self.spill_path):
+            self._kept.append(self.spill_path)
+            while len(self._kept) > KEPT_SPILL_FILES:
+                _remove(self._kept.popleft())
+        self.spill_path = files.get_abs_path(SPILL_FOLDER, f"{uuid.uuid4().hex}.log")
+        self.line_count = 0
+        self.dropped_lines = 0
+        self._head: list[str] = []
+        self._head_chars = 0
+        self._tail: deque[str] = deque()
+        self._tail_chars = 0
+        self._lead = ""  # raw output before the first content
+        self._started = False
+        self._pending = ""  # raw text after the last newline
+        self._committed: str | None = ""
+
+    def close(self):
+        """Delete all spill files, called when the terminal session ends."""
+        self._close_spill()
+        for path in (*self._kept, self.spill_path):
+            _remove(path)
+        self._kept.clear()
+
+    def _close_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def append(self, data: str):
+        if not data:
+            return
+        if not self._started:
+            # leading prompts are stripped once the first content and its escapes are complete
+            self._lead += data
+            lead = _strip_start(_clean_chars(self._lead))
+            if not lead.strip() or _PARTIAL_ESCAPE.search(self._lead):
+                return
+            data, self._lead, self._started = lead, "", True
+
+        *lines, self._pending = (self._pending + data).split("\n")
+        for line in lines:
+            self._commit(_clean_line(line))
+        if len(self._pending) > MAX_PENDING_CHARS:
+            self._collapse_pending()
+        if self._spill is not None:
+            self._spill.flush()
+
+    def finish(self):
+        """Commit the unterminated last line, no more output will be appended."""
+        if self._started and self._pending:
+            self._commit(_clean_line(self._pending, False))
+            self._pending = ""
+        if self._spill is not None:
+            self._spill.flush()
+
+    def text(self) -> str:
+        if not self._started:
+            *lines, last = _strip_start(_clean_chars(self._lead)).split("\n")
+            return "\n".join([*(_clean_line(line) for line in lines), _clean_line(last, False)])
+        if self._committed is None:
+            parts = self._head.copy()
+            if self.dropped_lines:
+                parts.append(
+                    f"[... {self.dropped_lines} lines omitted, full output in {self.spill_path} ...]"
+                )
+            parts.extend(self._tail)
+            self._committed = "\n".join(parts) + "\n"
+        last = _clean_line(self._pending, False)
+        return self._committed + last if self.line_count else last
+
+    def tail_text(self, chars: int) -> str:
+        """Last chars of text(), without building the text."""
+        if not self._started:
+            return self.text()[-chars:]
+        lines = [_clean_line(self._pending, False)]
+        size = len(lines[0])
+        omitted = [f"[... {self.dropped_lines} lines omitted, full output in {self.spill_path} ...]"]
+        for line in chain(reversed(self._tail), omitted if self.dropped_lines else (), reversed(self._head)):
+            if size >= chars:
+                break
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join(reversed(lines))[-chars:]
+
+    def tail(self, count: int) -> list[str]:
+        """Last lines of text().splitlines(), without building the text."""
+        if not self._started:
+            return self.text().splitlines()[-count:]
+        lines = [_clean_line(self._pending, False)]
+        lines.extend(islice(reversed(self._tail), count))
+        if len(lines) <= count:
+            lines.extend(islice(reversed(self._head), count + 1 - len(lines)))
+        return "\n".join(reversed(lines)).splitlines()[-count:]
+
+    def _commit(self, line: str):
+        self.line_count += 1
+        self._committed = None
+        if self._spill is None and self.spool:
+            self._open_spill()
+        if self._spill is not None:
+            self._spill.write(line + "\n")
+        if not self._tail and self._head_chars + len(line) < HEAD_CHARS:
+            self._head.append(line)
+            self._head_chars += len(line) + 1
+            return
+        self._tail.append(line)
+        self._tail_chars += len(line) + 1
+        while self._tail_chars > TAIL_CHARS and len(self._tail) > 1:
+            if self._spill is None:
+                self._open_spill()
+            dropped = self._tail.popleft()
+            self._tail_chars -= len(dropped) + 1
+            self.dropped_lines += 1
+
+    def _open_spill(self):
+        # everything so far is still in memory, later lines are appended by _commit
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        self._spill = open(self.spill_path, "w", encoding="utf-8", errors="replace")
+        for line in self._head:
+            self._spill.write(line + "\n")
+        for line in self._tail:
+            self._spill.write(line + "\n")
+
+    def _collapse_pending(self):
+        # progress bars redraw one line with \r, only the last non-blank part is shown
+        cut = self._pending.rfind("\r")
+        if cut > 0 and self._pending[cut + 1 :].strip():
+            self._pending = self._pending[cut + 1 :]
+        if len(self._pending) > MAX_PENDING_CHARS:
+            self._commit(_clean_line(self._pending))
+            self._pending = ""
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _clean_chars(text: str) -> str:
+    return _ANSI_ESCAPE.sub("", text).replace("\x00", "")
+
+
+def _strip_start(text: str) -> str:
+    text = _LEADING_IPYTHON.sub("", text)
+    text = _LEADING_PROMPTS.sub("", text)
+    return text.lstrip("\r ")
+
+
+def _clean_line(line: str, terminated: bool = True) -> str:
+    line = _clean_chars(line)
+    if terminated and line.endswith("\r"):
+        line = line[:-1]  # \r\n line ending
+    parts = [part for part in line.split("\r") if part.strip()]
+    return parts[-1].rstrip() if parts else line
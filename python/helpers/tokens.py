@@ -1,8 +1,25 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Literal
 import tiktoken
 
 APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
+CHARS_PER_TOKEN = 4  # rough average for english text and code
+FAST_ESTIMATE_MAX_CHARS = 64  # cached counts estimate texts up to this length instead of encoding
+COUNT_CACHE_SIZE = 4096
+
+_count_cache: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name="cl100k_base") -> tiktoken.Encoding:
+    # tiktoken.get_encoding is costly to call repeatedly, keep one encoder per encoding
+    return tiktoken.get_encoding(encoding_name)
 
 
 def count_tokens(text: str, encoding_name="cl100k_base") -> int:
@@ -10,7 +27,7 @@ def count_tokens(text: str, encoding_name="cl100k_base") -> int:
         return 0
 
     # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    encoding = get_encoding(encoding_name)
 
     # Encode the text and count the tokens
     tokens = encoding.encode(text, disallowed_special=())
@@ -19,12 +36,77 @@ def count_tokens(text: str, encoding_name="cl100k_base") -> int:
     return token_count
 
 
+def count_tokens_cached(text: str, encoding_name="cl100k_base") -> int:
+    if not text:
+        return 0
+
+    # key by content hash so the LRU does not keep large texts alive
+    key = (encoding_name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached is not None:
+            _count_cache.move_to_end(key)
+            return cached
+
+    count = count_tokens(text, encoding_name)
+
+    with _count_cache_lock:
+        _count_cache[key] = count
+        if len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return count
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
 def approximate_tokens(
     text: str,
 ) -> int:
     return int(count_tokens(text) * APPROX_BUFFER)
 
 
+def approximate_tokens_cached(
+    text: str,
+) -> int:
+    # history counts, short messages are not worth a tokenizer call
+    if len(text) <= FAST_ESTIMATE_MAX_CHARS:
+        return estimate_tokens(text)
+    return int(count_tokens_cached(text) * APPROX_BUFFER)
+
+
+class StreamTokenCounter:
+    """Token bookkeeping for a streamed response.
+
+    Deltas are only estimated while streaming, the exact count is computed
+    once when the stream ends and the difference is returned as a correction.
+    The correction is negative when the estimates were too high.
+    """
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.estimated = 0
+
+    def add(self, delta: str) -> int:
+        if not delta:
+            return 0
+        self.parts.append(delta)
+        tokens = estimate_tokens(delta)
+        self.estimated += tokens
+        return tokens
+
+    def finalize(self) -> int:
+        text = "".join(self.parts)
+        exact = int(count_tokens(text) * APPROX_BUFFER)
+        correction = exact - self.estimated
+        self.parts = [text]
+        self.estimated = exact
+        return correction
+
+
 def trim_to_tokens(
     text: str,
     max_tokens: int,
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from python.helpers import extract_tools, subagents
+
+if TYPE_CHECKING:
+    from agent import Agent
+    from python.helpers.tool import Tool
+
+# (profile, project, tool name) -> candidate files in priority order
+_paths: dict[tuple[str, str, str], list[str]] = {}
+# file -> (mtime, tool class or None when the file has no Tool subclass)
+_classes: dict[str, tuple[float, "type[Tool] | None"]] = {}
+# tool name -> {"loads", "hits", "load_ms"}
+_stats: dict[str, dict[str, float]] = {}
+_lock = threading.RLock()
+
+
+def get_tool_class(agent: "Agent", name: str) -> "type[Tool] | None":
+    """Returns the tool class for the agent's profile and project, None if not found.
+    Files are imported once and reloaded only when their mtime changes."""
+    key = _key(agent, name)
+    with _lock:
+        paths = _paths.get(key)
+    if paths is None:
+        paths = subagents.get_paths(agent, "tools", name + ".py", default_root="python")
+        # unresolved names are not cached so newly added tools are found
+        if paths:
+            with _lock:
+                _paths[key] = paths
+
+    for path in paths:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            # resolved file disappeared, resolve again next time
+            with _lock:
+                _paths.pop(key, None)
+            continue
+
+        with _lock:
+            cached = _classes.get(path)
+        if cached and cached[0] == mtime:
+            _record(name, hit=True)
+            return cached[1]
+
+        start = time.perf_counter()
+        try:
+            from python.helpers.tool import Tool
+
+            classes = extract_tools.load_classes_from_file(path, Tool)  # type: ignore[arg-type]
+        except Exception:
+            continue
+        tool_class = classes[0] if classes else None
+        with _lock:
+            _classes[path] = (mtime, tool_class)
+        _record(name, load_ms=(time.perf_counter() - start) * 1000)
+        return tool_class
+
+    return None
+
+
+def reload(name: str | None = None):
+    """Drops cached paths and classes for a tool name, or everything when name is None."""
+    with _lock:
+        if name is None:
+            _paths.clear()
+            _classes.clear()
+            return
+        file_name = name + ".py"
+        for key in [key for key in _paths if key[2] == name]:
+            del _paths[key]
+        for path in [path for path in _classes if os.path.basename(path) == file_name]:
+            del _classes[path]
+
+
+def get_stats() -> dict[str, dict[str, float]]:
+    """Per tool: number of module loads, cache hits and the last load time in ms."""
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def _key(agent: "Agent", name: str) -> tuple[str, str, str]:
+    from python.helpers import projects
+
+    profile = agent.config.profile or ""
+    project = projects.get_context_project_name(agent.context) or ""
+    return profile, project, name
+
+
+def _record(name: str, hit: bool = False, load_ms: float = 0.0):
+    with _lock:
+        stats = _stats.setdefault(name, {"loads": 0, "hits": 0, "load_ms": 0.0})
+        if hit:
+            stats["hits"] += 1
+        else:
+            stats["loads"] += 1
+            stats["load_ms"] = load_ms
@@ -79,6 +79,10 @@ class TTYSession:
             raise RuntimeError("TTYSpawn is not started")
         return await self._proc.wait()
 
+    @property
+    def pid(self) -> int | None:
+        return self._proc.pid if self._proc else None
+
     def kill(self):
         """Force-kill the running child process.
 
@@ -134,6 +138,11 @@ class TTYSession:
                 break
             yield chunk
 
+    async def read_until_eof(self):
+        # Yield each chunk as soon as it arrives until the child closes the terminal
+        while (chunk := await self._buf.get()) is not None:
+            yield chunk
+
     # ── internal: stream raw output into the queue ────────────────────
     async def _pump_stdout(self):
         if self._proc is None:
@@ -144,6 +153,7 @@ class TTYSession:
             if not chunk:
                 break
             self._buf.put_nowait(chunk.decode(self.encoding, "replace"))
+        self._buf.put_nowait(None)  # EOF, read() treats it like a timeout
 
 
 # ──────────────────────────── POSIX IMPLEMENTATION ────────────────────
@@ -2,15 +2,16 @@ import asyncio
 from dataclasses import dataclass
 import shlex
 import time
+from agent import Agent
 from python.helpers.tool import Tool, Response
-from python.helpers import files, rfc_exchange, projects, runtime, settings
+from python.helpers import background_jobs, files, rfc_exchange, projects, runtime, settings
 from python.helpers.print_style import PrintStyle
 from python.helpers.shell_local import LocalInteractiveSession
 from python.helpers.shell_ssh import SSHInteractiveSession
 from python.helpers.docker import DockerContainerManager
 from python.helpers.strings import truncate_text as truncate_text_string
 from python.helpers.messages import truncate_text as truncate_text_agent
-from python.helpers.target_policy import validate_targets
+from python.helpers.target_policy import blocked_scan_message, validate_targets
 import re
 
 # Timeouts for python, nodejs, and terminal runtimes.
@@ -29,6 +30,16 @@ OUTPUT_TIMEOUTS: dict[str, int] = {
     "dialog_timeout": 5,
 }
 
+# Output tail searched for the heading line.
+HEADING_SCAN_CHARS = 10_000
+
+# Output tail shown in the log while a command runs, the full output is built when it returns.
+LOG_PREVIEW_CHARS = 20_000
+
+# Longest wait for background jobs in one call, intervention is checked every slice.
+JOBS_MAX_WAIT = 300
+JOBS_WAIT_SLICE = 1
+
 @dataclass
 class ShellWrap:
     id: int
@@ -83,6 +94,17 @@ class CodeExecution(Tool):
             response = await self.get_terminal_output(
                 session=session, timeouts=OUTPUT_TIMEOUTS
             )
+        elif runtime == "background":
+            response = await self.start_background_job(command=self.args["code"])
+        elif runtime == "jobs":
+            response = await self.get_background_jobs(
+                jobs=self.args.get("jobs"),
+                wait=float(self.args.get("wait", 0) or 0),
+                wait_for=str(self.args.get("wait_for", "any")).lower().strip(),
+                lines=int(self.args.get("lines", background_jobs.TAIL_LINES)),
+            )
+        elif runtime == "kill":
+            response = await self.kill_background_jobs(jobs=self.args.get("jobs"))
         elif runtime == "reset":
             response = await self.reset_terminal(session=session)
         else:
@@ -133,6 +155,7 @@ class CodeExecution(Tool):
             for s in list(shells.keys()):
                 await shells[s].session.close()
             shells = {}
+            self.close_jobs()
 
         # initialize local or remote interactive shell interface for session 0 if needed
         if session is not None and session not in shells:
@@ -235,13 +258,7 @@ class CodeExecution(Tool):
         if allowed:
             return None
 
-        message = (
-            "Sentra policy blocked this scan request. "
-            f"{reason} "
-            "This prototype only permits authorized local-lab targets such as localhost, private IPs, "
-            "`dvwa`, `juice-shop`, `sentra-demo-vulnerable`, and `sentra-demo-remediated`."
-        )
-        return Response(message=message, break_loop=False)
+        return Response(message=blocked_scan_message(reason), break_loop=False)
 
     async def terminal_session(
         self, session: int, command: str, reset: bool = False, prefix: str = "", timeouts: dict | None = None
@@ -323,18 +340,20 @@ class CodeExecution(Tool):
 
         start_time = time.time()
         last_output_time = start_time
-        full_output = ""
-        truncated_output = ""
+        output = self.state.shells[session].session.output
         got_output = False
 
+        def full_output() -> str:
+            return self.fix_full_output(output.text()) if got_output else ""
+
         # if prefix, log right away
         if prefix:
             self.log.update(content=prefix)
 
         while True:
             await asyncio.sleep(sleep_time)
-            full_output, partial_output = await self.state.shells[session].session.read_output(
-                timeout=1, reset_full_output=reset_full_output
+            _, partial_output = await self.state.shells[session].session.read_output(
+                timeout=1, reset_full_output=reset_full_output, with_full_output=False
             )
             reset_full_output = False  # only reset once
 
@@ -343,18 +362,16 @@ class CodeExecution(Tool):
             now = time.time()
             if partial_output:
                 PrintStyle(font_color="#85C1E9").stream(partial_output)
-                # full_output += partial_output # Append new output
-                truncated_output = self.fix_full_output(full_output)
-                self.set_progress(truncated_output)
-                heading = self.get_heading_from_output(truncated_output, 0)
-                self.log.update(content=prefix + truncated_output, heading=heading)
+                # only the end of the output is cleaned and shown while it grows
+                preview = self.fix_full_output(output.tail_text(LOG_PREVIEW_CHARS))
+                self.set_progress(preview)
+                heading = self.get_heading_from_output(preview, 0)
+                self.log.update(content=prefix + preview, heading=heading)
                 last_output_time = now
                 got_output = True
 
                 # Check for shell prompt at the end of output
-                last_lines = (
-                    truncated_output.splitlines()[-3:] if truncated_output else []
-                )
+                last_lines = output.tail(3)
                 last_lines.reverse()
                 for idx, line in enumerate(last_lines):
                     for pat in self.prompt_patterns:
@@ -366,7 +383,9 @@ class CodeExecution(Tool):
                             heading = self.get_heading_from_output(
                                 "\n".join(last_lines), idx + 1, True
                             )
-                            self.log.update(heading=heading)
+                            truncated_output = full_output()
+                            self.set_progress(truncated_output)
+                            self.log.update(content=prefix + truncated_output, heading=heading)
                             self.mark_session_idle(session)
                             return truncated_output
 
@@ -376,6 +395,7 @@ class CodeExecution(Tool):
                     "fw.code.max_time.md", timeout=max_exec_timeout
                 )
                 response = self.agent.read_prompt("fw.code.info.md", info=sysinfo)
+                truncated_output = full_output()
                 if truncated_output:
                     response = truncated_output + "\n\n" + response
                 PrintStyle.warning(sysinfo)
@@ -400,6 +420,7 @@ class CodeExecution(Tool):
                         "fw.code.pause_time.md", timeout=between_output_timeout
                     )
                     response = self.agent.read_prompt("fw.code.info.md", info=sysinfo)
+                    truncated_output = full_output()
                     if truncated_output:
                         response = truncated_output + "\n\n" + response
                     PrintStyle.warning(sysinfo)
@@ -410,9 +431,7 @@ class CodeExecution(Tool):
                 # potential dialog detection
                 if now - last_output_time > dialog_timeout:
                     # Check for dialog prompt at the end of output
-                    last_lines = (
-                        truncated_output.splitlines()[-2:] if truncated_output else []
-                    )
+                    last_lines = output.tail(2)
                     for line in last_lines:
                         for pat in self.dialog_patterns:
                             if pat.search(line.strip()):
@@ -426,6 +445,7 @@ class CodeExecution(Tool):
                                 response = self.agent.read_prompt(
                                     "fw.code.info.md", info=sysinfo
                                 )
+                                truncated_output = full_output()
                                 if truncated_output:
                                     response = truncated_output + "\n\n" + response
                                 PrintStyle.warning(sysinfo)
@@ -455,9 +475,7 @@ class CodeExecution(Tool):
         self.set_progress(truncated_output)
         heading = self.get_heading_from_output(truncated_output, 0)
 
-        last_lines = (
-            truncated_output.splitlines()[-3:] if truncated_output else []
-        )
+        last_lines = self.state.shells[session].session.output.tail(3)
         last_lines.reverse()
         for idx, line in enumerate(last_lines):
             for pat in self.prompt_patterns:
@@ -507,20 +525,100 @@ class CodeExecution(Tool):
 
         # Only reset the specified session while preserving others
         await self.prepare_state(reset=True, session=session)
+        # background jobs do not outlive a terminal reset
+        self.close_jobs()
         response = self.agent.read_prompt(
             "fw.code.info.md", info=self.agent.read_prompt("fw.code.reset.md")
         )
         self.log.update(content=response)
         return response
 
+    def get_jobs(self) -> background_jobs.BackgroundJobs:
+        jobs: background_jobs.BackgroundJobs | None = self.agent.get_data(Agent.DATA_NAME_BACKGROUND_JOBS)
+        if not jobs:
+            jobs = background_jobs.BackgroundJobs()
+            self.agent.set_data(Agent.DATA_NAME_BACKGROUND_JOBS, jobs)
+        return jobs
+
+    def close_jobs(self):
+        jobs: background_jobs.BackgroundJobs | None = self.agent.get_data(Agent.DATA_NAME_BACKGROUND_JOBS)
+        if jobs:
+            jobs.close()
+            self.agent.set_data(Agent.DATA_NAME_BACKGROUND_JOBS, None)
+
+    def parse_job_ids(self, jobs) -> list[int]:
+        if not jobs:
+            return []
+        if isinstance(jobs, (int, float)):
+            return [int(jobs)]
+        if isinstance(jobs, str):
+            jobs = jobs.replace(",", " ").split()
+        return [int(j) for j in jobs]
+
+    async def start_background_job(self, command: str):
+        if self.agent.config.code_exec_ssh_enabled:
+            # jobs run in a local terminal, over ssh they would run on the wrong machine
+            return self.agent.read_prompt(
+                "fw.code.info.md", info=self.agent.read_prompt("fw.code.job_unavailable.md")
+            )
+        policy_violation = self.block_unauthorized_scan_targets(command)
+        if policy_violation:
+            return policy_violation.message
+
+        try:
+            job = await self.get_jobs().start(command, cwd=await self.ensure_cwd())
+        except RuntimeError as e:
+            return self.agent.read_prompt("fw.code.info.md", info=str(e))
+        response = self.agent.read_prompt(
+            "fw.code.job_started.md", job=job.id, path=job.output.spill_path
+        )
+        self.log.update(content=f"job {job.id}> {self.format_command_for_output(command)}\n\n{response}")
+        return response
+
+    async def get_background_jobs(self, jobs=None, wait: float = 0, wait_for: str = "any", lines: int = background_jobs.TAIL_LINES):
+        try:
+            selected = self.get_jobs().get(self.parse_job_ids(jobs))
+        except (KeyError, ValueError) as e:
+            return self.agent.read_prompt("fw.code.info.md", info=str(e).strip("'\""))
+        if not selected:
+            return self.agent.read_prompt("fw.code.info.md", info="No background jobs.")
+
+        mode = "all" if wait_for == "all" else "any"
+        running = [job for job in selected if job.running]
+        deadline = time.time() + min(wait, JOBS_MAX_WAIT)
+        # job completion wakes the wait right away, slices only keep interventions responsive
+        while running and not await background_jobs.wait_jobs(running, min(deadline - time.time(), JOBS_WAIT_SLICE), mode):
+            await self.agent.handle_intervention()
+            if time.time() >= deadline:
+                break
+
+        response = "\n\n".join(job.describe(lines) for job in selected)
+        self.log.update(content=response)
+        return response
+
+    async def kill_background_jobs(self, jobs=None):
+        try:
+            ids = self.parse_job_ids(jobs)
+            if not ids:
+                return self.agent.read_prompt("fw.code.info.md", info="Provide the ids of the jobs to kill.")
+            selected = self.get_jobs().get(ids)
+        except (KeyError, ValueError) as e:
+            return self.agent.read_prompt("fw.code.info.md", info=str(e).strip("'\""))
+        for job in selected:
+            job.kill()
+        await background_jobs.wait_jobs(selected, background_jobs.EXIT_DRAIN_TIMEOUT + 1, "all")
+        response = "\n\n".join(job.describe(5) for job in selected)
+        self.log.update(content=response)
+        return response
+
     def get_heading_from_output(self, output: str, skip_lines=0, done=False):
         done_icon = " icon://done_all" if done else ""
 
         if not output:
             return self.get_heading() + done_icon
 
-        # find last non-empty line with skip
-        lines = output.splitlines()
+        # find last non-empty line with skip, only the end of long outputs is needed
+        lines = output[-HEADING_SCAN_CHARS:].splitlines()
         # Start from len(lines) - skip_lines - 1 down to 0
         for i in range(len(lines) - skip_lines - 1, -1, -1):
             line = lines[i].strip()
@@ -0,0 +1,50 @@
+import asyncio
+from python.helpers import cve_index, files
+from python.helpers.tool import Tool, Response
+
+CVE_LOOKUP_RESULTS = 10  # per service, highest CVSS first
+
+
+class CveLookup(Tool):
+
+    async def execute(self, services: list | None = None, product="", version="", cpe="", **kwargs) -> Response:
+        await self.agent.handle_intervention()
+
+        queries: list[dict] = list(services or [])
+        if product or cpe:
+            queries.append({"product": product, "version": version, "cpe": cpe})
+        if not queries:
+            return Response(message="Provide services as a list of {product, version} or {cpe}.", break_loop=False)
+
+        # the first call after new feeds were added builds the index
+        index = await asyncio.to_thread(
+            cve_index.get_index,
+            files.get_abs_path(cve_index.INDEX_FILE),
+            files.get_abs_path(cve_index.FEEDS_FOLDER),
+        )
+        if index is None:
+            return Response(
+                message=f"No offline CVE index: no NVD 2.0 JSON feeds in {cve_index.FEEDS_FOLDER}. Use the NVD API instead.",
+                break_loop=False,
+            )
+
+        return Response(message="\n\n".join(self.format_query(index, q) for q in queries), break_loop=False)
+
+    def format_query(self, index: cve_index.CveIndex, query: dict) -> str:
+        product = str(query.get("product") or "")
+        version = str(query.get("version") or "")
+        cpe = str(query.get("cpe") or "")
+        if cpe:
+            matches = index.lookup_cpe(cpe)
+            name = cpe
+        else:
+            matches = index.lookup(product, version)
+            name = f"{product} {version}".strip()
+
+        if not matches:
+            return f"{name}: no known CVEs in the offline index"
+        lines = [f"{name}: {len(matches)} CVEs"]
+        for match in matches[:CVE_LOOKUP_RESULTS]:
+            cvss = f"{match.cvss:.1f}" if match.cvss is not None else "?"
+            lines.append(f"- {match.id} CVSS {cvss} ({match.severity}): {match.summary}")
+        return "\n".join(lines)
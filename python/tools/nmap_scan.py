@@ -0,0 +1,114 @@
+import shlex
+from python.helpers import nmap_xml, runtime
+from python.helpers.tool import Tool, Response
+from python.helpers.target_policy import blocked_scan_message, validate_targets
+
+# nmap writes its own -oX report, other output files are not needed
+OUTPUT_OPTIONS = {"-oX", "-oN", "-oG", "-oA", "-oS", "-oM"}
+# options taking the next token as value, without dashes (nmap takes -name and --name alike)
+VALUE_OPTIONS = {
+    "p", "exclude-ports", "top-ports", "port-ratio", "exclude", "script", "script-args",
+    "script-args-file", "script-timeout", "D", "S", "e", "g", "source-port", "dns-servers",
+    "proxies", "data", "data-string", "data-length", "ip-options", "ttl", "mtu", "spoof-mac",
+    "version-intensity", "max-os-tries", "min-hostgroup", "max-hostgroup", "min-parallelism",
+    "max-parallelism", "min-rtt-timeout", "max-rtt-timeout", "initial-rtt-timeout", "max-retries",
+    "host-timeout", "scan-delay", "max-scan-delay", "min-rate", "max-rate", "stylesheet",
+    "datadir", "servicedb", "versiondb", "oX", "oN", "oG", "oA", "oS", "oM",
+}
+# options whose value is a host the scan sends traffic to: idle scan zombie, ftp bounce relay
+HOST_VALUE_OPTIONS = {"sI", "b"}
+# options that read or choose targets, targets must be given as the target argument
+# so the policy can check them
+BLOCKED_OPTIONS = {"iL", "iR", "resume", "excludefile"}
+
+
+class NmapScan(Tool):
+
+    async def execute(self, target="", options="", timeout=nmap_xml.NMAP_TIMEOUT, **kwargs) -> Response:
+        await self.agent.handle_intervention()
+
+        targets = target.split() if isinstance(target, str) else [str(t) for t in target]
+        if not targets:
+            return Response(message="Provide the target to scan.", break_loop=False)
+        try:
+            tokens = shlex.split(options) if isinstance(options, str) else [str(o) for o in options]
+        except ValueError as e:
+            return Response(message=f"Invalid nmap options: {e}", break_loop=False)
+
+        # nmap scans every token that is not an option or its value
+        option_targets, blocked = self.option_targets(tokens)
+        if blocked:
+            return Response(message=f"Options {', '.join(blocked)} are not allowed, pass targets as target.", break_loop=False)
+
+        allowed, reason = validate_targets(targets + option_targets)
+        if not allowed:
+            return Response(message=blocked_scan_message(reason), break_loop=False)
+
+        result = await runtime.call_development_function(
+            nmap_xml.run_nmap, targets, self.strip_output_options(tokens), float(timeout)
+        )
+        hosts = [nmap_xml.NmapHost.from_dict(h) for h in result["hosts"]]
+
+        # structured results of all scans in this chat, by host address
+        context = self.agent.context
+        context.set_data(
+            nmap_xml.INVENTORY_KEY,
+            nmap_xml.merge_inventory(context.get_data(nmap_xml.INVENTORY_KEY), hosts),
+        )
+
+        message = f"{result['command']}\n\n{nmap_xml.summarize(hosts)}"
+        if result["timed_out"]:
+            message += f"\n\nScan stopped after {timeout} seconds, results are partial."
+        elif result["returncode"] != 0 and result["error"]:
+            message += f"\n\nnmap exited with code {result['returncode']}:\n{result['error']}"
+        return Response(message=message, break_loop=False)
+
+    def option_targets(self, tokens: list[str]) -> tuple[list[str], list[str]]:
+        """Hosts named in the options (bare tokens and host values) and the blocked options."""
+        targets: list[str] = []
+        blocked: list[str] = []
+        value_of = None
+        for token in tokens:
+            if value_of is not None:
+                if value_of in HOST_VALUE_OPTIONS:
+                    targets.append(_host_value(token))
+                value_of = None
+                continue
+            if not token.startswith("-"):
+                targets.append(token)
+                continue
+            name, _, value = token.lstrip("-").partition("=")
+            if _is_blocked(name):
+                blocked.append(token)
+            elif value and name in HOST_VALUE_OPTIONS:
+                targets.append(_host_value(value))
+            elif "=" not in token and name in VALUE_OPTIONS | HOST_VALUE_OPTIONS:
+                value_of = name
+        return targets, blocked
+
+    def strip_output_options(self, tokens: list[str]) -> list[str]:
+        options = []
+        skip_next = False
+        for token in tokens:
+            if skip_next:
+                skip_next = False
+            elif token in OUTPUT_OPTIONS:
+                skip_next = True
+            else:
+                options.append(token)
+        return options
+
+
+def _is_blocked(name: str) -> bool:
+    # -iL and -iR also take their value attached (-iLhosts.txt)
+    if name.startswith(("iL", "iR")):
+        return True
+    # nmap accepts unambiguous abbreviations of long options (--excludef, --resu)
+    return len(name) > 1 and name not in VALUE_OPTIONS and any(
+        option.startswith(name) for option in BLOCKED_OPTIONS if len(option) > 2
+    )
+
+
+def _host_value(value: str) -> str:
+    # ftp bounce relays are given as [user:password@]server[:port]
+    return value.rsplit("@", 1)[-1]
@@ -0,0 +1,46 @@
+from python.helpers import nmap_xml, scan_pipeline
+from python.helpers.tool import Tool, Response
+from python.helpers.target_policy import blocked_scan_message, validate_targets
+
+
+class ScanPipeline(Tool):
+
+    async def execute(self, target="", stages="", timeout=scan_pipeline.STAGE_TIMEOUT, **kwargs) -> Response:
+        await self.agent.handle_intervention()
+
+        context = self.agent.context
+        inventory = context.get_data(nmap_xml.INVENTORY_KEY) or {}
+        hosts = [nmap_xml.NmapHost.from_dict(h) for h in inventory.values()]
+        targets = target.split() if isinstance(target, str) else [str(t) for t in target]
+        if targets:
+            allowed, reason = validate_targets(targets)
+            if not allowed:
+                return Response(message=blocked_scan_message(reason), break_loop=False)
+            hosts = [h for h in hosts if h.address in targets or set(h.hostnames) & set(targets)]
+        if not hosts:
+            return Response(message="No scanned hosts to follow up, run nmap_scan with -sV first.", break_loop=False)
+
+        names = stages.replace(",", " ").split() if isinstance(stages, str) else [str(s) for s in stages]
+        unknown = [s for s in names if s not in scan_pipeline.STAGES]
+        if unknown:
+            return Response(
+                message=f"Unknown stages {', '.join(unknown)}, use {', '.join(scan_pipeline.STAGES)}.",
+                break_loop=False,
+            )
+
+        pipeline = scan_pipeline.ScanPipeline(
+            hosts, stages=names or scan_pipeline.STAGES, stage_timeout=float(timeout)
+        )
+        planned = len(pipeline.plan())
+        if not planned:
+            return Response(message="No web ports or versioned services to follow up.", break_loop=False)
+
+        done: list[str] = []
+
+        def on_stage_done(stage: scan_pipeline.StageResult):
+            done.append(f"{stage.stage} {stage.target}: {stage.status} in {stage.seconds:.1f}s")
+            self.log.update(content=f"{len(done)}/{planned} stages done\n" + "\n".join(done))
+
+        result = await pipeline.run(on_stage_done)
+        context.set_data(scan_pipeline.PIPELINE_KEY, result.to_dict())
+        return Response(message=result.summarize(), break_loop=False)
@@ -161,6 +161,7 @@ class SchedulerTool(Tool):
             day=schedule.get("day", "*"),
             month=schedule.get("month", "*"),
             weekday=schedule.get("weekday", "*"),
+            second=schedule.get("second", "0"),
         )
 
         # Validate cron expression, agent might hallucinate
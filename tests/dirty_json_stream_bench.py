@@ -0,0 +1,88 @@
+"""Replay streamed LLM responses through the response JSON parser.
+
+Compares re-parsing the accumulated text on every chunk (the old
+Agent.handle_response_stream behaviour) with the resumable DirtyJson.feed_full.
+
+Usage:
+    python tests/dirty_json_stream_bench.py [recorded_response.txt ...]
+
+Without arguments, synthetic 20-50 KB code_execution_tool responses are used.
+"""
+
+import sys, os, json, random, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers.dirty_json import DirtyJson
+
+CHUNK_MIN = 4
+CHUNK_MAX = 24
+
+
+def synthetic_response(size: int) -> str:
+    rnd = random.Random(size)
+    lines = []
+    while sum(len(line) + 1 for line in lines) < size:
+        port = rnd.randint(1, 65535)
+        lines.append(
+            f"for h in $(cat hosts.txt); do nmap -sV -p {port} --script vuln \"$h\" | tee -a out_{port}.log; done"
+        )
+    return json.dumps(
+        {
+            "thoughts": ["Enumerate services on every host", "Collect vuln script output"],
+            "headline": "Running service scan",
+            "tool_name": "code_execution_tool",
+            "tool_args": {"runtime": "terminal", "session": 0, "code": "\n".join(lines)},
+        },
+        indent=4,
+    )
+
+
+def chunks(text: str):
+    rnd = random.Random(len(text))
+    i = 0
+    while i < len(text):
+        step = rnd.randint(CHUNK_MIN, CHUNK_MAX)
+        yield text[i : i + step]
+        i += step
+
+
+def replay_full(text: str):
+    full = ""
+    result = None
+    start = time.perf_counter()
+    for chunk in chunks(text):
+        full += chunk
+        result = DirtyJson.parse_string(full)
+    return time.perf_counter() - start, result
+
+
+def replay_incremental(text: str):
+    parser = DirtyJson()
+    full = ""
+    result = None
+    start = time.perf_counter()
+    for chunk in chunks(text):
+        full += chunk
+        result = parser.feed_full(full)
+    return time.perf_counter() - start, result
+
+
+def main(paths: list[str]):
+    if paths:
+        samples = [(os.path.basename(p), open(p, encoding="utf-8").read()) for p in paths]
+    else:
+        samples = [(f"synthetic {kb} KB", synthetic_response(kb * 1024)) for kb in (20, 35, 50)]
+
+    for name, text in samples:
+        full_time, full_result = replay_full(text)
+        inc_time, inc_result = replay_incremental(text)
+        same = "ok" if full_result == inc_result else "MISMATCH"
+        print(
+            f"{name}: {len(text) / 1024:.1f} KB, "
+            f"reparse {full_time * 1000:.0f} ms, incremental {inc_time * 1000:.1f} ms, "
+            f"speedup {full_time / max(inc_time, 1e-9):.0f}x, result {same}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+"""Replay a streamed LLM response through the secrets masking of the stream-chunk extensions.
+
+Compares masking the accumulated response on every chunk (the old
+_10_mask_stream behaviour, secrets_mgr.mask_values(full)) with extending the
+masked text from the StreamingSecretsFilter output. Reports the average cost
+per chunk while the response grows, which should stay flat for the filter.
+
+Usage:
+    python tests/secrets_stream_mask_bench.py [size_kb]
+
+Without arguments, a synthetic 100 KB response with a few embedded secrets is used.
+"""
+
+import sys, os, random, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers.aho_corasick import AhoCorasick
+from python.helpers.secrets import StreamingSecretsFilter, alias_for_key
+
+CHUNK_MIN = 4
+CHUNK_MAX = 24
+BUCKETS = 5
+
+SECRETS = {
+    "API_KEY": "sk-live-4f9a8b7c6d5e4f3a2b1c",
+    "DB_PASSWORD": "correct-horse-battery-staple",
+    "SSH_PASS": "hunter2hunter2",
+}
+
+
+def synthetic_response(size: int) -> str:
+    rnd = random.Random(size)
+    values = list(SECRETS.values())
+    parts = []
+    length = 0
+    while length < size:
+        port = rnd.randint(1, 65535)
+        line = f"nmap -sV -p {port} --script vuln target.example | tee -a out_{port}.log\n"
+        if rnd.random() < 0.01:
+            line = f"export TOKEN={rnd.choice(values)}\n"
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)
+
+
+def chunks(text: str):
+    rnd = random.Random(len(text))
+    i = 0
+    while i < len(text):
+        step = rnd.randint(CHUNK_MIN, CHUNK_MAX)
+        yield text[i : i + step]
+        i += step
+
+
+def replay(text: str, remask_full: bool):
+    matcher = AhoCorasick(SECRETS.values())
+    value_to_key = {v: k for k, v in SECRETS.items()}
+    stream_filter = StreamingSecretsFilter(SECRETS, matcher=matcher)
+    full = ""
+    timings: list[tuple[int, float]] = []
+    for chunk in chunks(text):
+        full += chunk
+        start = time.perf_counter()
+        stream_filter.process_chunk(chunk)
+        if remask_full:
+            masked = matcher.replace(full, lambda value: alias_for_key(value_to_key[value]))
+        else:
+            masked = stream_filter.output
+        timings.append((len(full), time.perf_counter() - start))
+    stream_filter.finalize()
+    masked = stream_filter.output if not remask_full else masked
+    return timings, masked
+
+
+def per_bucket(timings: list[tuple[int, float]], size: int) -> list[float]:
+    sums = [0.0] * BUCKETS
+    counts = [0] * BUCKETS
+    for length, seconds in timings:
+        bucket = min(BUCKETS - 1, (length - 1) * BUCKETS // size)
+        sums[bucket] += seconds
+        counts[bucket] += 1
+    return [s / max(c, 1) for s, c in zip(sums, counts)]
+
+
+def main(args: list[str]):
+    size = int(args[0]) * 1024 if args else 100 * 1024
+    text = synthetic_response(size)
+
+    old_timings, old_masked = replay(text, remask_full=True)
+    new_timings, new_masked = replay(text, remask_full=False)
+    same = "ok" if old_masked == new_masked else "MISMATCH"
+
+    labels = [f"{(i + 1) * size // BUCKETS // 1024} KB" for i in range(BUCKETS)]
+    print(f"{len(text) / 1024:.0f} KB response, {len(new_timings)} chunks, masked result {same}")
+    print("avg us per chunk at    " + " ".join(f"{label:>8}" for label in labels))
+    for name, timings in (("re-mask full text", old_timings), ("filter output", new_timings)):
+        row = " ".join(f"{t * 1e6:8.1f}" for t in per_bucket(timings, len(text)))
+        print(f"{name:22s} {row}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="posix terminal")
+
+
+@pytest.fixture
+def background_jobs(monkeypatch):
+    # tty_session reconfigures stdin on import, pytest replaces it
+    monkeypatch.setattr(sys.stdin, "reconfigure", lambda **kwargs: None, raising=False)
+    from python.helpers import background_jobs
+
+    return background_jobs
+
+
+def test_jobs_run_detached_and_wake_waiters_on_exit(background_jobs) -> None:
+    async def scenario():
+        jobs = background_jobs.BackgroundJobs()
+        slow = await jobs.start("sleep 5; echo late")
+        fast = await jobs.start("for i in 1 2 3; do echo line $i; done; sleep 0.3; printf 'no newline'; exit 3")
+        assert slow.running and fast.running and slow.id == 1 and fast.id == 2
+
+        start = time.monotonic()
+        assert await background_jobs.wait_jobs([slow, fast], 10, "any")
+        assert time.monotonic() - start < 3
+        assert fast.returncode == 3 and slow.running
+        assert not await background_jobs.wait_jobs([slow, fast], 0.1, "all")
+
+        assert fast.output.text().splitlines() == ["line 1", "line 2", "line 3", "no newline"]
+        with open(fast.output.spill_path) as file:
+            assert file.read() == "line 1\nline 2\nline 3\nno newline\n"
+        assert fast.describe(2).splitlines() == [
+            f"job 2 exited with code 3 after {fast.seconds:.0f}s: " + fast.command,
+            f"last 2 of 4 lines, full output in {fast.output.spill_path}",
+            "line 3",
+            "no newline",
+        ]
+
+        slow.kill()
+        assert await background_jobs.wait_jobs([slow], 5, "all")
+        assert slow.killed and "killed after" in slow.describe()
+        return jobs, [fast.output.spill_path]
+
+    jobs, paths = asyncio.run(scenario())
+    with pytest.raises(KeyError):
+        jobs.get([3])
+    for job in jobs.get():
+        job.output.close()
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_kill_stops_child_processes(background_jobs, tmp_path) -> None:
+    marker = tmp_path / "marker"
+
+    async def scenario():
+        jobs = background_jobs.BackgroundJobs()
+        job = await jobs.start(f"(sleep 1; touch {marker}) & wait")
+        await asyncio.sleep(0.2)
+        job.kill()
+        assert await background_jobs.wait_jobs([job], 5, "all")
+        await asyncio.sleep(1.5)
+        job.output.close()
+
+    asyncio.run(scenario())
+    assert not marker.exists()
+
+
+def test_close_kills_jobs_and_deletes_their_output(background_jobs) -> None:
+    async def scenario():
+        jobs = background_jobs.BackgroundJobs()
+        done = await jobs.start("echo done")
+        assert await background_jobs.wait_jobs([done], 5, "all")
+        running = await jobs.start("echo started; sleep 5")
+        await asyncio.sleep(0.3)
+        paths = [done.output.spill_path, running.output.spill_path]
+        assert all(os.path.exists(p) for p in paths)
+
+        jobs.close()
+        assert jobs.get() == [] and running.killed
+        # the output of a running job is deleted once its process has exited
+        assert await background_jobs.wait_jobs([running], 5, "all")
+        return paths
+
+    paths = asyncio.run(scenario())
+    assert not any(os.path.exists(p) for p in paths)
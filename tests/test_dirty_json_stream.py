@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from python.helpers.dirty_json import DirtyJson
+
+
+SAMPLES = [
+    '{"thoughts": ["scan target", "check ports\\n"], "headline": "Scanning", '
+    '"tool_name": "code_execution_tool", "tool_args": {"runtime": "terminal", '
+    '"session": 0, "reset": false, "code": "nmap -sV 10.0.0.1 \\u0041 \\"q\\""}}',
+    'Sure!\n{\n  // comment\n  "a": 1.5e3, b: true, "c": null, /* note */ '
+    '"d": [1, 2, [3, {"e": \'f\'}],], "g": """ multi\nline """\n}',
+    "[1, 2, 3]",
+    '"just a string"',
+    '{"a": -12, "b": foo bar, "c": TRUE}',
+]
+
+
+@pytest.mark.parametrize("sample", SAMPLES)
+@pytest.mark.parametrize("step", [1, 2, 3, 7, 64, 10_000])
+def test_feed_matches_parse(sample: str, step: int) -> None:
+    expected = DirtyJson.parse_string(sample)
+    parser = DirtyJson()
+    snapshot = None
+    for i in range(0, len(sample), step):
+        snapshot = parser.feed(sample[i : i + step])
+    assert snapshot == expected
+
+
+def test_feed_snapshots_partial_values() -> None:
+    parser = DirtyJson()
+    parser.feed('{"tool_name": "resp')
+    assert parser.feed("") == {"tool_name": "resp"}
+    snapshot = parser.feed('onse", "tool_args": {"text": "Hel')
+    assert snapshot == {"tool_name": "response", "tool_args": {"text": "Hel"}}
+    snapshot = parser.feed('lo"}}')
+    assert snapshot == {"tool_name": "response", "tool_args": {"text": "Hello"}}
+
+
+def test_short_string_values_stream_before_triple_quote_check() -> None:
+    parser = DirtyJson()
+    assert parser.feed('{"headline": "x') == {"headline": "x"}
+    parser = DirtyJson()
+    parser.feed('{"a": ""')
+    # two quotes may still open a triple-quoted string
+    assert parser.feed('"multi"""}') == {"a": "multi"}
+
+
+def test_snapshots_are_independent_of_parser_state() -> None:
+    parser = DirtyJson()
+    first = parser.feed('{"tool_args": {"code": "ls')
+    first["tool_args"] = {"replaced": True}
+    first["tool_args"]["extra"] = 1
+    second = parser.feed(' -la"}}')
+    assert second == {"tool_args": {"code": "ls -la"}}
+
+
+def test_feed_full_restarts_when_text_changes() -> None:
+    parser = DirtyJson()
+    parser.feed_full('{"a": "secret-va')
+    # earlier text was rewritten (e.g. masked), the parser starts over
+    result = parser.feed_full('{"a": "***", "b": 1}')
+    assert result == {"a": "***", "b": 1}
+    result = parser.feed_full('{"a": "***", "b": 1}')
+    assert result == {"a": "***", "b": 1}
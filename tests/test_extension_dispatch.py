@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import types
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+EXTENSION_SOURCE = """
+from python.helpers.extension import Extension
+
+class Probe{name}(Extension):
+    reusable = {reusable}
+
+    async def execute(self, calls=None, **kwargs):
+        calls.append(("{name}", id(self)))
+"""
+
+
+def _write(folder: Path, name: str, reusable: bool = False) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"_{name}.py").write_text(EXTENSION_SOURCE.format(name=name, reusable=reusable))
+
+
+def _setup(tmp_path, monkeypatch):
+    from python.helpers import extension
+
+    resolved: list[str] = []
+
+    def get_paths(agent, *subpaths, must_exist_completely=True, **kwargs):
+        resolved.append("/".join(subpaths))
+        path = tmp_path.joinpath(*subpaths)
+        return [str(path)] if (not must_exist_completely or path.exists()) else []
+
+    monkeypatch.setattr("python.helpers.subagents.get_paths", get_paths)
+    monkeypatch.setattr(extension, "CHANGE_CHECK_INTERVAL", 0)
+    extension.clear_cache()
+    return extension, resolved
+
+
+def test_dispatch_table_resolves_each_point_once(tmp_path, monkeypatch) -> None:
+    extension, resolved = _setup(tmp_path, monkeypatch)
+    _write(tmp_path / "extensions" / "point", "20_second")
+    _write(tmp_path / "extensions" / "point", "10_first")
+
+    calls: list[tuple[str, int]] = []
+    for _ in range(3):
+        asyncio.run(extension.call_extensions("point", calls=calls))
+        asyncio.run(extension.call_extensions("empty_point", calls=calls))
+
+    assert [name for name, _ in calls] == ["10_first", "20_second"] * 3
+    assert resolved.count("extensions/point") == 1
+    assert resolved.count("extensions/empty_point") == 1
+    timings = extension.get_timings()
+    assert timings["point/_10_first"]["calls"] == 3
+
+
+def test_file_changes_invalidate_the_table(tmp_path, monkeypatch) -> None:
+    extension, _ = _setup(tmp_path, monkeypatch)
+    folder = tmp_path / "extensions" / "point"
+    _write(folder, "10_first")
+
+    calls: list[tuple[str, int]] = []
+    asyncio.run(extension.call_extensions("point", calls=calls))
+    _write(folder, "20_added")
+    stat = folder.stat()
+    os.utime(folder, (stat.st_atime, stat.st_mtime + 10))
+    asyncio.run(extension.call_extensions("point", calls=calls))
+
+    assert [name for name, _ in calls] == ["10_first", "10_first", "20_added"]
+
+
+def test_reusable_extensions_are_instantiated_once_per_agent(tmp_path, monkeypatch) -> None:
+    extension, _ = _setup(tmp_path, monkeypatch)
+    _write(tmp_path / "extensions" / "point", "10_reused", reusable=True)
+    _write(tmp_path / "extensions" / "point", "20_fresh")
+    monkeypatch.setattr(
+        "python.helpers.projects.get_context_project_name", lambda context: ""
+    )
+
+    class FakeAgent:
+        config = types.SimpleNamespace(profile="")
+        context = None
+
+    agent = FakeAgent()
+    calls: list[tuple[str, int]] = []
+    for _ in range(2):
+        asyncio.run(extension.call_extensions("point", agent=agent, calls=calls))  # type: ignore[arg-type]
+
+    reused = {instance for name, instance in calls if name == "10_reused"}
+    assert len(reused) == 1
+    assert len([name for name, _ in calls if name == "20_fresh"]) == 2
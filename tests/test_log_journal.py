@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+
+def test_output_returns_latest_state_of_changed_items_only() -> None:
+    from python.helpers.log import Log
+
+    log = Log()
+    first = log.log(type="user", heading="User message", content="hello")
+    second = log.log(type="agent", heading="Agent", content="")
+    version = log.version
+
+    for i in range(100):
+        second.update(content="x" * i)
+
+    changed = log.output(start=version)
+    assert [item["no"] for item in changed] == [second.no]
+    assert changed[0]["content"] == "x" * 99
+    assert log.version == version + 100
+    assert len(log._journal) == 2
+
+    first.update(content="edited")
+    assert [item["no"] for item in log.output(start=log.version - 1)] == [first.no]
+    assert [item["no"] for item in log.output(start=0)] == [first.no, second.no]
+
+
+def test_compacted_journal_resends_everything_to_stale_readers() -> None:
+    from python.helpers.log import Log
+
+    log = Log(journal_retention=3)
+    for i in range(10):
+        log.log(type="info", content=str(i))
+    version = log.version
+
+    assert len(log._journal) == 3
+    assert [item["no"] for item in log.output(start=version - 3)] == [7, 8, 9]
+    # reader is behind the compacted part of the journal
+    assert len(log.output(start=1)) == 10
+    assert log.output(start=version) == []
+
+
+def test_reset_starts_a_new_journal() -> None:
+    from python.helpers.log import Log
+
+    log = Log()
+    log.log(type="info", content="a")
+    guid = log.guid
+    log.reset()
+    assert log.guid != guid
+    assert log.version == 0
+    assert log.output(start=0) == []
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import anyio
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+class FakeSession:
+    def __init__(self, number: int):
+        self.number = number
+        self.healthy = True
+
+    async def send_ping(self):
+        if not self.healthy:
+            raise ConnectionError("gone")
+
+
+@pytest.fixture
+def pool_factory():
+    from python.helpers.mcp_session_pool import MCPSessionPool
+
+    opened: list[FakeSession] = []
+    closed: list[FakeSession] = []
+    pools: list[MCPSessionPool] = []
+
+    async def factory(stack):
+        session = FakeSession(len(opened))
+        opened.append(session)
+        stack.callback(closed.append, session)
+        return session
+
+    def create(**kwargs) -> MCPSessionPool:
+        pool = MCPSessionPool("test", factory, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield create, opened, closed
+    for pool in pools:
+        pool.close()
+
+
+def test_sessions_are_reused_up_to_pool_size(pool_factory) -> None:
+    create, opened, _ = pool_factory
+    pool = create(size=2)
+    active: list[int] = []
+    peak: list[int] = []
+
+    async def operation(session):
+        active.append(session.number)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(session.number)
+        return session.number
+
+    async def main():
+        await pool.run(operation)
+        await pool.run(operation)
+        return await asyncio.gather(*[pool.run(operation) for _ in range(6)])
+
+    numbers = asyncio.run(main())
+    assert len(opened) == 2
+    assert set(numbers) == {0, 1}
+    assert max(peak) == 2
+    metrics = pool.output()
+    assert metrics["calls"] == 8 and metrics["sessions_opened"] == 2
+    assert metrics["open_sessions"] == 2 and metrics["sessions_in_use"] == 0
+
+
+def test_closed_transport_reconnects_and_retries(pool_factory) -> None:
+    create, opened, closed = pool_factory
+    pool = create()
+    attempts: list[int] = []
+
+    async def operation(session):
+        attempts.append(session.number)
+        if session.number == 0:
+            raise anyio.ClosedResourceError()
+        return session.number
+
+    assert asyncio.run(pool.run(operation)) == 1
+    assert attempts == [0, 1]
+    assert pool.output()["reconnects"] == 1
+
+    # other errors are raised to the caller, the session stays in the pool
+    async def failing(session):
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(failing))
+    assert pool.output()["open_sessions"] == 1
+    time.sleep(0.05)
+    assert [s.number for s in closed] == [0]
+
+
+def test_unhealthy_session_is_replaced(pool_factory, monkeypatch) -> None:
+    from python.helpers import mcp_session_pool
+
+    create, opened, _ = pool_factory
+    pool = create()
+
+    async def operation(session):
+        return session.number
+
+    assert asyncio.run(pool.run(operation)) == 0
+    monkeypatch.setattr(mcp_session_pool, "HEALTH_CHECK_AFTER", 0)
+    opened[0].healthy = False
+    assert asyncio.run(pool.run(operation)) == 1
+    assert pool.output()["reconnects"] == 1
+
+
+def test_idle_sessions_are_evicted(pool_factory) -> None:
+    create, opened, closed = pool_factory
+    pool = create(idle_timeout=0.05)
+
+    async def operation(session):
+        return session.number
+
+    asyncio.run(pool.run(operation))
+    time.sleep(0.3)
+    metrics = pool.output()
+    assert metrics["open_sessions"] == 0 and metrics["evictions"] == 1
+    assert closed == opened
+
+    assert asyncio.run(pool.run(operation)) == 1
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+HOST_UP = """<host><status state="up" reason="arp-response"/>
+<address addr="10.0.0.{n}" addrtype="ipv4"/><address addr="02:42:0A:00:00:05" addrtype="mac"/>
+<hostnames><hostname name="dvwa" type="PTR"/></hostnames>
+<ports><extraports state="closed" count="997"/>
+<port protocol="tcp" portid="22"><state state="open" reason="syn-ack"/>
+<service name="ssh" product="OpenSSH" version="7.4p1 Debian 10+deb9u7" extrainfo="protocol 2.0">
+<cpe>cpe:/a:openbsd:openssh:7.4p1</cpe></service></port>
+<port protocol="tcp" portid="80"><state state="open" reason="syn-ack"/>
+<service name="http" product="Apache httpd" version="2.4.25" extrainfo="(Debian)"/>
+<script id="http-title" output="DVWA&#xa;second line"/></port>
+<port protocol="tcp" portid="443"><state state="filtered" reason="no-response"/></port>
+</ports><os><osmatch name="Linux 4.15" accuracy="95"/></os></host>
+"""
+HOST_DOWN = """<host><status state="down" reason="no-response"/><address addr="10.0.1.{n}" addrtype="ipv4"/></host>
+"""
+
+
+def _report(hosts: str, finished: bool = True) -> str:
+    text = f'<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -sV">\n{hosts}'
+    return text + '<runstats><finished elapsed="1.0"/></runstats></nmaprun>\n' if finished else text
+
+
+def test_hosts_are_parsed_into_records(tmp_path) -> None:
+    from python.helpers import nmap_xml
+
+    path = tmp_path / "scan.xml"
+    path.write_text(_report(HOST_UP.format(n=5) + HOST_DOWN.format(n=1)))
+
+    hosts = list(nmap_xml.iter_hosts(str(path)))
+    assert [h.address for h in hosts] == ["10.0.0.5"]
+    host = hosts[0]
+    assert host.hostnames == ["dvwa"] and host.mac == "02:42:0A:00:00:05" and host.os == "Linux 4.15"
+    assert host.closed_ports == 997
+    ssh, http, https = host.ports
+    assert (ssh.port, ssh.state, ssh.service.product) == (22, "open", "OpenSSH")
+    assert ssh.service.cpes == ["cpe:/a:openbsd:openssh:7.4p1"]
+    assert http.scripts[0].id == "http-title" and http.scripts[0].output == "DVWA\nsecond line"
+    assert https.service is None
+    assert len(list(nmap_xml.iter_hosts(str(path), include_down=True))) == 2
+
+    summary = nmap_xml.summarize(hosts)
+    assert summary.splitlines() == [
+        "host 10.0.0.5 (dvwa) os: Linux 4.15",
+        "PORT\tSTATE\tSERVICE\tVERSION",
+        "22/tcp\topen\tssh\tOpenSSH 7.4p1 Debian 10+deb9u7 (protocol 2.0)",
+        "80/tcp\topen\thttp\tApache httpd 2.4.25 ((Debian))",
+        "  http-title: DVWA",
+        "998 closed or filtered ports not shown",
+    ]
+    assert nmap_xml.NmapHost.from_dict(host.to_dict()) == host
+
+
+def test_truncated_report_keeps_finished_hosts(tmp_path) -> None:
+    from python.helpers import nmap_xml
+
+    path = tmp_path / "scan.xml"
+    path.write_text(_report(HOST_UP.format(n=5) + HOST_UP.format(n=6)[:200], finished=False))
+    assert [h.address for h in nmap_xml.iter_hosts(str(path))] == ["10.0.0.5"]
+
+
+def test_large_sweep_in_bounded_memory(tmp_path) -> None:
+    from python.helpers import nmap_xml
+
+    path = tmp_path / "sweep.xml"
+    with open(path, "w") as file:
+        file.write(_report("", finished=False))
+        for n in range(20_000):
+            file.write((HOST_UP if n % 10 == 0 else HOST_DOWN).format(n=n))
+        file.write("</nmaprun>\n")
+    assert path.stat().st_size > 3_000_000
+
+    tracemalloc.start()
+    count = sum(1 for _ in nmap_xml.iter_hosts(str(path)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 2000
+    assert peak < 1_000_000
+
+
+def test_inventory_merges_ports_of_later_scans() -> None:
+    from python.helpers import nmap_xml
+
+    first = nmap_xml.NmapHost("10.0.0.5", hostnames=["dvwa"], ports=[
+        nmap_xml.NmapPort("tcp", 22, "open"), nmap_xml.NmapPort("tcp", 80, "open"),
+    ])
+    second = nmap_xml.NmapHost("10.0.0.5", ports=[nmap_xml.NmapPort("tcp", 80, "closed")])
+    inventory = nmap_xml.merge_inventory(None, [first])
+    inventory = nmap_xml.merge_inventory(inventory, [second])
+
+    host = nmap_xml.NmapHost.from_dict(inventory["10.0.0.5"])
+    assert host.hostnames == ["dvwa"]
+    assert [(p.port, p.state) for p in host.ports] == [(22, "open"), (80, "closed")]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def chat(tmp_path, monkeypatch):
+    from python.helpers import dotenv, task_scheduler
+    from python.helpers.print_style import PrintStyle
+
+    # the print log, .env and scheduled tasks of the test stay out of logs/ and usr/
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path / "log.html"))
+    monkeypatch.setattr(dotenv, "get_dotenv_file_path", lambda: str(tmp_path / ".env"))
+    monkeypatch.setattr(task_scheduler, "SCHEDULER_FOLDER", str(tmp_path / "scheduler"))
+
+    from agent import AgentContext
+    from initialize import initialize_agent
+    from python.helpers import persist_chat
+
+    monkeypatch.setattr(persist_chat, "CHATS_FOLDER", str(tmp_path / "chats"))
+    context = AgentContext(config=initialize_agent())
+    yield persist_chat, context
+    persist_chat._journals.pop(context.id, None)
+    AgentContext.remove(context.id)
+
+
+def _stored(persist_chat, context) -> dict:
+    data = persist_chat._read_chat_file(persist_chat._get_chat_file_path(context.id))
+    data.pop("snapshot_id")
+    return data
+
+
+def _live(persist_chat, context) -> dict:
+    return json.loads(persist_chat.export_json_chat(context))
+
+
+def test_saves_append_to_journal_and_replay_on_load(chat) -> None:
+    persist_chat, context = chat
+    agent = context.agent0
+    agent.history.add_message(False, "scan example.com")
+    item = context.log.log(type="agent", heading="Working", content="")
+    persist_chat.save_tmp_chat(context)
+
+    chat_file = persist_chat._get_chat_file_path(context.id)
+    journal_file = persist_chat._get_journal_file_path(context.id)
+    snapshot = Path(chat_file).read_text()
+
+    for i in range(5):
+        agent.history.add_message(True, f"step {i}")
+        item.update(content=f"progress {i}")
+        context.log.log(type="tool", heading=f"tool {i}", content="output")
+        persist_chat.save_tmp_chat(context)
+
+    assert Path(chat_file).read_text() == snapshot
+    assert len(Path(journal_file).read_text().splitlines()) == 5
+    assert _stored(persist_chat, context) == _live(persist_chat, context)
+
+    # a torn write at the end is skipped
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write('{"snapshot": "')
+    assert _stored(persist_chat, context) == _live(persist_chat, context)
+
+
+def test_restructured_history_is_compacted_into_snapshot(chat) -> None:
+    persist_chat, context = chat
+    agent = context.agent0
+    agent.history.add_message(False, "first task")
+    persist_chat.save_tmp_chat(context)
+    agent.history.add_message(True, "answer")
+    persist_chat.save_tmp_chat(context)
+
+    journal_file = persist_chat._get_journal_file_path(context.id)
+    assert os.path.getsize(journal_file) > 0
+
+    agent.history.new_topic()
+    agent.history.add_message(False, "second task")
+    persist_chat.save_tmp_chat(context)
+
+    assert os.path.getsize(journal_file) == 0
+    assert _stored(persist_chat, context) == _live(persist_chat, context)
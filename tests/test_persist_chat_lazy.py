@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def saved_chat(tmp_path, monkeypatch):
+    from python.helpers import dotenv, task_scheduler
+    from python.helpers.print_style import PrintStyle
+
+    # the print log, .env and scheduled tasks of the test stay out of logs/ and usr/
+    monkeypatch.setattr(PrintStyle, "log_file_path", str(tmp_path / "log.html"))
+    monkeypatch.setattr(dotenv, "get_dotenv_file_path", lambda: str(tmp_path / ".env"))
+    monkeypatch.setattr(task_scheduler, "SCHEDULER_FOLDER", str(tmp_path / "scheduler"))
+
+    from agent import AgentContext
+    from initialize import initialize_agent
+    from python.helpers import persist_chat
+
+    monkeypatch.setattr(persist_chat, "CHATS_FOLDER", str(tmp_path / "chats"))
+    context = AgentContext(config=initialize_agent(), name="recon")
+    context.agent0.history.add_message(False, "scan example.com")
+    context.log.log(type="user", heading="User message", content="scan example.com")
+    persist_chat.save_tmp_chat(context)
+    context.agent0.history.add_message(True, "starting nmap")
+    context.log.log(type="agent", heading="Working", content="")
+    persist_chat.save_tmp_chat(context)
+    expected = _exported(persist_chat, context)
+
+    # simulate a restart
+    persist_chat._journals.pop(context.id, None)
+    AgentContext.remove(context.id)
+
+    yield persist_chat, context.id, expected
+    persist_chat._journals.pop(context.id, None)
+    persist_chat._unloaded.pop(context.id, None)
+    persist_chat._unreadable.discard(context.id)
+    AgentContext.remove(context.id)
+
+
+def _exported(persist_chat, context) -> dict:
+    data = json.loads(persist_chat.export_json_chat(context))
+    # progress is reset and empty kvps become None on load
+    data["log"].pop("progress")
+    data["log"].pop("progress_no")
+    for item in data["log"]["logs"]:
+        item["kvps"] = item["kvps"] or None
+    return data
+
+
+def test_chats_load_lazily_and_hydrate_on_access(saved_chat) -> None:
+    from agent import AgentContext
+
+    persist_chat, ctxid, expected = saved_chat
+    assert persist_chat.load_tmp_chats() == [ctxid]
+
+    context = AgentContext.get(ctxid)
+    assert context is not None and not context.loaded
+    output = context.output()
+    assert output["name"] == "recon"
+    assert output["log_length"] == 3  # greeting, user message, agent
+    assert not context.loaded
+
+    assert context.agent0.history.counter > 0
+    assert context.loaded
+    assert _exported(persist_chat, context) == expected
+    assert context.output()["log_version"] == output["log_version"]
+
+
+def test_unloaded_chat_saves_metadata_only(saved_chat) -> None:
+    from agent import AgentContext
+
+    persist_chat, ctxid, expected = saved_chat
+    persist_chat.load_tmp_chats()
+    context = AgentContext.get(ctxid)
+    assert context is not None
+
+    context.name = "renamed"
+    persist_chat.save_tmp_chat(context)
+    assert not context.loaded
+
+    # the next start still uses the metadata and sees the new name
+    persist_chat._unloaded.pop(ctxid, None)
+    AgentContext.remove(ctxid)
+    persist_chat.load_tmp_chats()
+    context = AgentContext.get(ctxid)
+    assert context is not None and not context.loaded
+    assert context.name == "renamed"
+    expected["name"] = "renamed"
+    assert _exported(persist_chat, context) == expected
+
+
+def test_chat_without_metadata_is_loaded_fully(saved_chat) -> None:
+    from agent import AgentContext
+
+    persist_chat, ctxid, expected = saved_chat
+    Path(persist_chat._get_meta_file_path(ctxid)).unlink()
+
+    persist_chat.load_tmp_chats()
+    context = AgentContext.get(ctxid)
+    assert context is not None and context.loaded
+    assert _exported(persist_chat, context) == expected
+    assert Path(persist_chat._get_meta_file_path(ctxid)).exists()
+
+
+def test_unreadable_chat_opens_empty_and_is_not_saved_over(saved_chat) -> None:
+    from agent import AgentContext
+
+    persist_chat, ctxid, expected = saved_chat
+    persist_chat.load_tmp_chats()
+    chat_file = Path(persist_chat._get_chat_file_path(ctxid))
+    # same size, so the metadata still matches and the chat is loaded lazily
+    corrupt = "x" + chat_file.read_text(encoding="utf-8")[1:]
+    chat_file.write_text(corrupt, encoding="utf-8")
+
+    context = AgentContext.get(ctxid)
+    assert context is not None and not context.loaded
+    assert context.log is not None
+    assert context.loaded and context.agent0 is not None
+    assert context.log.logs[-1].type == "error"
+
+    context.agent0.history.add_message(False, "new message")
+    persist_chat.save_tmp_chat(context)
+    assert chat_file.read_text(encoding="utf-8") == corrupt
+    assert ctxid not in persist_chat._journals
+
+    persist_chat.remove_chat(ctxid)
+    assert ctxid not in persist_chat._unreadable
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+CASES = [
+    "plain {{name}} and {{missing}} and {{ name }}",
+    "{{if flag}}yes {{name}}{{endif}} after",
+    "{{if not flag}}no{{endif}}{{if count > 1}}many{{endif}}",
+    "{{if flag}}outer {{if count > 5}}inner{{endif}} tail{{endif}}!",
+    "{{if unknown_name}}kept {{name}}{{endif}} {{if flag}}raw{{endif}}",
+    "{{if flag}}unterminated {{name}}",
+    "stray {{endif}} and {{{name}}}",
+    "head {{ include 'part.md' }} tail {{include \"missing.md\"}}",
+]
+
+
+@pytest.mark.parametrize("content", CASES)
+def test_compiled_render_matches_sequential_passes(tmp_path, content) -> None:
+    from python.helpers import files
+
+    files.clear_prompt_cache()
+    (tmp_path / "part.md").write_text("part {{name}}")
+    (tmp_path / "main.md").write_text(content)
+    variables = {"name": "agent", "flag": True, "count": 3}
+
+    expected = files.evaluate_text_conditions(content, **variables)
+    expected = files.replace_placeholders_text(expected, **variables)
+    expected = files.process_includes(expected, [str(tmp_path)], **variables)
+
+    assert files.read_prompt_file("main.md", [str(tmp_path)], **variables) == expected
+
+
+def test_values_with_tags_use_sequential_passes(tmp_path) -> None:
+    from python.helpers import files
+
+    files.clear_prompt_cache()
+    (tmp_path / "main.md").write_text("{{first}} {{second}}")
+
+    result = files.read_prompt_file(
+        "main.md", [str(tmp_path)], first="{{second}}", second="two"
+    )
+    assert result == "two two"
+
+
+def test_templates_and_plugins_reload_when_changed(tmp_path, monkeypatch) -> None:
+    from python.helpers import extract_tools, files
+
+    files.clear_prompt_cache()
+    monkeypatch.setattr(files, "PATH_CHECK_INTERVAL", 0)
+    prompt = tmp_path / "main.md"
+    prompt.write_text("value {{extra}}")
+    plugin = tmp_path / "main.py"
+    plugin.write_text(
+        "from python.helpers.files import VariablesPlugin\n"
+        "class Extra(VariablesPlugin):\n"
+        "    def get_variables(self, file, backup_dirs=None, **kwargs):\n"
+        "        return {'extra': 'one'}\n"
+    )
+
+    loads: list[str] = []
+    load_classes = extract_tools.load_classes_from_file
+
+    def counting_load(file, *args, **kwargs):
+        loads.append(file)
+        return load_classes(file, *args, **kwargs)
+
+    monkeypatch.setattr(extract_tools, "load_classes_from_file", counting_load)
+
+    for _ in range(3):
+        assert files.read_prompt_file("main.md", [str(tmp_path)]) == "value one"
+    assert len(loads) == 1
+
+    stat = prompt.stat()
+    prompt.write_text("changed {{extra}}")
+    os.utime(prompt, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert files.read_prompt_file("main.md", [str(tmp_path)]) == "changed one"
+
+    override = tmp_path / "usr"
+    override.mkdir()
+    (override / "main.md").write_text("override")
+    assert files.read_prompt_file("main.md", [str(override), str(tmp_path)]) == "override"
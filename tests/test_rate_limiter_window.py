@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+
+
+def test_window_counter_expires_oldest_buckets() -> None:
+    from python.helpers.rate_limiter import WindowCounter
+
+    counter = WindowCounter(seconds=60, buckets=60)
+    counter.add(10, now=1000.0)
+    counter.add(5, now=1030.0)
+    assert counter.total(1030.0) == 15
+    # 10 more over the limit of 5 expires with the first bucket
+    assert counter.wait_time(5, now=1030.0) == 30.0
+    assert counter.total(1060.0) == 5
+    assert counter.total(1200.0) == 0
+
+
+def test_token_bucket_drains_at_limit_rate() -> None:
+    from python.helpers.rate_limiter import TokenBucketCounter
+
+    counter = TokenBucketCounter(seconds=60)
+    counter.rate_limit = 60
+    counter.add(90, now=0.0)
+    assert counter.wait_time(60, now=0.0) == 30.0
+    assert counter.total(10.0) == 80.0
+    assert counter.wait_time(60, now=30.0) == 0.0
+
+
+def test_wait_sleeps_until_usage_expires(monkeypatch) -> None:
+    from python.helpers import rate_limiter
+
+    clock = [1000.0]
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+
+    limiter = rate_limiter.RateLimiter(seconds=60, requests=2)
+    for _ in range(3):
+        limiter.add(requests=1)
+    asyncio.run(limiter.wait())
+    assert sleeps == [60.0]
+
+
+def test_callback_can_skip_waiting() -> None:
+    from python.helpers.rate_limiter import RateLimiter
+
+    calls = []
+
+    async def callback(msg: str, key: str, total: int, limit: int) -> bool:
+        calls.append((key, total, limit))
+        return True
+
+    limiter = RateLimiter(seconds=60, input=10)
+    limiter.add(input=25)
+    asyncio.run(limiter.wait(callback))
+    assert calls == [("input", 25, 10)]
+
+
+def test_shared_limiter_sees_usage_from_other_instances(tmp_path) -> None:
+    from python.helpers.rate_limiter import SharedRateLimiter
+
+    db = str(tmp_path / "limits.db")
+    first = SharedRateLimiter("provider\\model", db, requests=5)
+    second = SharedRateLimiter("provider\\model", db, requests=5)
+    other = SharedRateLimiter("provider\\other", db, requests=5)
+
+    first.add(requests=3)
+    second.add(requests=4)
+    assert asyncio.run(first.get_total("requests")) == 7
+    assert asyncio.run(other.get_total("requests")) == 0
+    assert 0 < second._wait_time("requests", 5) <= 60
+    assert first._wait_time("requests", 10) == 0.0
+
+
+def test_shared_token_bucket(tmp_path) -> None:
+    from python.helpers.rate_limiter import SharedRateLimiter
+
+    limiter = SharedRateLimiter("p\\m", str(tmp_path / "limits.db"), mode="token_bucket", input=60)
+    limiter.add(input=120)
+    assert 55 < limiter._wait_time("input", 60) <= 60
+
+
+def test_shared_token_bucket_adds_from_all_threads(tmp_path) -> None:
+    import threading
+
+    from python.helpers.rate_limiter import SharedRateLimiter
+
+    db = str(tmp_path / "limits.db")
+    limiters = [SharedRateLimiter("p\\m", db, mode="token_bucket") for _ in range(4)]
+
+    def add(limiter):
+        for _ in range(200):
+            limiter.add(input=1)
+
+    threads = [threading.Thread(target=add, args=(limiter,)) for limiter in limiters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # no limit set, so nothing drains and every add is counted
+    assert asyncio.run(limiters[0].get_total("input")) == 800
+
+
+def test_shared_window_buckets_are_pruned_by_add(tmp_path, monkeypatch) -> None:
+    from python.helpers import rate_limiter
+
+    monkeypatch.setattr(rate_limiter, "CLEANUP_EVERY", 2)
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+    limiter = rate_limiter.SharedRateLimiter("p\\pruned", str(tmp_path / "limits.db"), requests=5)
+    limiter.add(requests=1)
+    clock[0] += 120
+    limiter.add(requests=1)
+    rows = limiter._db.execute("SELECT bucket FROM window_buckets WHERE limiter = ?", ("p\\pruned",)).fetchall()
+    assert len(rows) == 1
+    assert asyncio.run(limiter.get_total("requests")) == 1
+
+
+def test_unknown_mode_is_rejected() -> None:
+    import pytest
+
+    from python.helpers.rate_limiter import RateLimiter
+
+    with pytest.raises(ValueError, match="token_bucket"):
+        RateLimiter(mode="tokenbucket")  # type: ignore[arg-type]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+NIKTO_OUTPUT = """- Nikto v2.5.0
++ Target IP:          10.0.0.5
++ Target Port:        80
++ Start Time:         2026-10-16 10:00:00 (GMT0)
++ Server: Apache/2.4.25 (Debian)
++ /: The anti-clickjacking X-Frame-Options header is not present.
++ /config/: Directory indexing found.
++ 1 host(s) tested
+"""
+GOBUSTER_OUTPUT = "/.git/HEAD            (Status: 200) [Size: 23]\n/config               (Status: 301) [Size: 310]\n"
+
+
+class FakeIndex:
+    def lookup(self, product, version):
+        from python.helpers.cve_index import CveMatch
+
+        return [CveMatch("CVE-2016-10012", 7.8, "Issue.")] if product == "OpenSSH" else []
+
+
+@pytest.fixture
+def pipeline_env(monkeypatch):
+    from python.helpers import cve_index, runtime, scan_pipeline, target_policy
+
+    running = {"now": 0, "peak": 0, "hosts": {}, "host_peak": 0}
+
+    async def call_development_function(func, *args):
+        return await func(*args)
+
+    async def run_command(commands, timeout):
+        argv = commands[0]
+        host = argv[argv.index("-u") + 1 if "-u" in argv else 2].split("//")[1].split(":")[0]
+        running["now"] += 1
+        running["hosts"][host] = running["hosts"].get(host, 0) + 1
+        running["peak"] = max(running["peak"], running["now"])
+        running["host_peak"] = max(running["host_peak"], running["hosts"][host])
+        await asyncio.sleep(0.02)
+        running["now"] -= 1
+        running["hosts"][host] -= 1
+        output = NIKTO_OUTPUT if argv[0] == "nikto" else GOBUSTER_OUTPUT
+        return {"command": " ".join(argv), "returncode": 0, "timed_out": False, "output": output, "error": ""}
+
+    monkeypatch.setattr(runtime, "call_development_function", call_development_function)
+    monkeypatch.setattr(scan_pipeline, "run_command", run_command)
+    monkeypatch.setattr(cve_index, "get_index", lambda *args: FakeIndex())
+    monkeypatch.setattr(target_policy, "_target_slots", {})
+    monkeypatch.setattr(target_policy, "_target_limiters", {})
+    monkeypatch.setattr(target_policy, "TARGET_STAGES_PER_MINUTE", 1000)
+    return running
+
+
+def _host(address: str):
+    from python.helpers.nmap_xml import NmapHost, NmapPort, NmapService
+
+    return NmapHost(address, ports=[
+        NmapPort("tcp", 22, "open", service=NmapService("ssh", "OpenSSH", "7.3")),
+        NmapPort("tcp", 80, "open", service=NmapService("http", "Apache httpd", "2.4.25")),
+        NmapPort("tcp", 8443, "open", service=NmapService("http", tunnel="ssl")),
+        NmapPort("tcp", 3306, "open", service=NmapService("mysql")),
+        NmapPort("tcp", 8080, "closed", service=NmapService("http-proxy")),
+    ])
+
+
+def test_stages_run_concurrently_within_limits(pipeline_env) -> None:
+    from python.helpers import scan_pipeline, target_policy
+
+    hosts = [_host("10.0.0.5"), _host("10.0.0.6"), _host("10.0.0.7")]
+    pipeline = scan_pipeline.ScanPipeline(hosts, max_concurrent=4)
+    assert [(s.name, s.target) for s in pipeline.plan()[:5]] == [
+        ("cve", "10.0.0.5:22/tcp"),
+        ("nikto", "http://10.0.0.5"),
+        ("content", "http://10.0.0.5"),
+        ("cve", "10.0.0.5:80/tcp"),
+        ("nikto", "https://10.0.0.5:8443"),
+    ]
+
+    done = []
+    result = asyncio.run(pipeline.run(done.append))
+    assert len(result.stages) == len(done) == 18
+    assert all(s.status == "ok" for s in result.stages)
+    assert pipeline_env["peak"] == 4
+    assert pipeline_env["host_peak"] <= target_policy.TARGET_MAX_CONCURRENT_STAGES
+    assert all(s.seconds > 0 for s in result.stages if s.stage != "cve")
+
+    # one merged result, findings keep the stage target and tool
+    data = result.to_dict()
+    findings = [f for f in data["findings"] if f["target"] == "http://10.0.0.5"]
+    assert [(f["tool"], f["title"]) for f in findings] == [
+        ("nikto", "Server: Apache/2.4.25 (Debian)"),
+        ("nikto", "/: The anti-clickjacking X-Frame-Options header is not present."),
+        ("nikto", "/config/: Directory indexing found."),
+        ("gobuster", "/.git/HEAD (HTTP 200)"),
+        ("gobuster", "/config (HTTP 301)"),
+    ]
+    cves = [f for f in data["findings"] if f["cve"]]
+    assert len(cves) == 3 and cves[0]["severity"] == "high" and cves[0]["target"] == "10.0.0.5:22/tcp"
+    assert "CVE-2016-10012 CVSS 7.8" in result.summarize()
+
+
+def test_unauthorized_and_failing_stages_are_reported(pipeline_env, monkeypatch) -> None:
+    from python.helpers import scan_pipeline
+
+    async def missing(commands, timeout):
+        return {"command": "nikto", "returncode": None, "timed_out": False, "output": "", "error": "nikto not installed"}
+
+    monkeypatch.setattr(scan_pipeline, "run_command", missing)
+    result = asyncio.run(scan_pipeline.ScanPipeline(
+        [_host("8.8.8.8"), _host("10.0.0.5")], stages=["nikto"]
+    ).run())
+    assert [(s.target, s.status) for s in result.stages] == [
+        ("http://8.8.8.8", "blocked"),
+        ("https://8.8.8.8:8443", "blocked"),
+        ("http://10.0.0.5", "failed"),
+        ("https://10.0.0.5:8443", "failed"),
+    ]
+    assert "outside" in result.stages[0].error and result.stages[2].error == "nikto not installed"
+    assert result.findings() == []
+
+
+def test_cve_lookups_take_no_target_slot(pipeline_env, monkeypatch) -> None:
+    from python.helpers import scan_pipeline, target_policy
+
+    slots = []
+    target_slot = target_policy.target_slot
+
+    def counting_slot(host):
+        slots.append(host)
+        return target_slot(host)
+
+    monkeypatch.setattr(target_policy, "target_slot", counting_slot)
+    result = asyncio.run(scan_pipeline.ScanPipeline([_host("10.0.0.5")], stages=["nikto", "cve"]).run())
+    assert sorted(s.stage for s in result.stages) == ["cve", "cve", "nikto", "nikto"]
+    assert all(s.status == "ok" for s in result.stages)
+    assert slots == ["10.0.0.5", "10.0.0.5"]
+
+
+def test_unauthorized_reverse_names_are_not_scanned(pipeline_env, monkeypatch) -> None:
+    from python.helpers import scan_pipeline
+
+    scanned = []
+
+    async def run_command(commands, timeout):
+        scanned.append(commands[0][2])
+        return {"command": "nikto", "returncode": 0, "timed_out": False, "output": "", "error": ""}
+
+    monkeypatch.setattr(scan_pipeline, "run_command", run_command)
+    private = _host("10.0.0.5")
+    private.hostnames = ["www.example.com"]  # PTR record of a private address
+    lab = _host("10.0.0.6")
+    lab.hostnames = ["www.example.com", "dvwa"]
+    result = asyncio.run(scan_pipeline.ScanPipeline([private, lab], stages=["nikto"]).run())
+    assert all(s.status == "ok" for s in result.stages)
+    assert sorted(scanned) == ["http://10.0.0.5", "http://dvwa", "https://10.0.0.5:8443", "https://dvwa:8443"]
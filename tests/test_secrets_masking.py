@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from python.helpers.aho_corasick import AhoCorasick
+
+
+def _naive_leftmost_longest(text: str, values: list[str]) -> list[tuple[int, int]]:
+    values = sorted(values, key=len, reverse=True)
+    found = []
+    i = 0
+    while i < len(text):
+        for value in values:
+            if text.startswith(value, i):
+                found.append((i, i + len(value)))
+                i += len(value)
+                break
+        else:
+            i += 1
+    return found
+
+
+def test_find_all_reports_every_occurrence() -> None:
+    rnd = random.Random(7)
+    for _ in range(500):
+        patterns = ["".join(rnd.choice("abc") for _ in range(rnd.randint(1, 5))) for _ in range(4)]
+        text = "".join(rnd.choice("abcx") for _ in range(rnd.randint(0, 30)))
+        expected = {
+            (i, i + len(p)) for p in patterns for i in range(len(text)) if text.startswith(p, i)
+        }
+        assert sorted(AhoCorasick(patterns).find_all(text)) == sorted(expected)
+
+
+def test_scan_resumes_across_chunks() -> None:
+    matcher = AhoCorasick(["secret", "cret-key"])
+    text = "a secret-key and a secret"
+    state = 0
+    matches = []
+    for i in range(0, len(text), 3):
+        found, state = matcher.scan(text[i : i + 3], state, i)
+        matches.extend(found)
+    assert sorted(matches) == sorted(matcher.find_all(text))
+
+
+def test_replace_is_leftmost_longest() -> None:
+    rnd = random.Random(11)
+    for _ in range(500):
+        patterns = list({"".join(rnd.choice("abc") for _ in range(rnd.randint(2, 5))) for _ in range(4)})
+        text = "".join(rnd.choice("abcxy") for _ in range(rnd.randint(0, 40)))
+        expected_parts = []
+        cursor = 0
+        for start, end in _naive_leftmost_longest(text, patterns):
+            expected_parts.append(text[cursor:start] + "<" + text[start:end] + ">")
+            cursor = end
+        expected_parts.append(text[cursor:])
+        assert AhoCorasick(patterns).replace(text, lambda v: f"<{v}>") == "".join(expected_parts)
+
+
+def test_streaming_filter_matches_batch_masking() -> None:
+    pytest.importorskip("dotenv")
+    from python.helpers.secrets import StreamingSecretsFilter, alias_for_key
+
+    secrets = {"API_KEY": "sk-abc123", "PASSWORD": "hunter22", "TOKEN": "abc"}
+    text = "login with hunter22, key sk-abc123 then sk-abc and abc."
+    matcher = AhoCorasick(secrets.values())
+    value_to_key = {v: k for k, v in secrets.items()}
+    expected = matcher.replace(text, lambda v: alias_for_key(value_to_key[v]))
+
+    rnd = random.Random(3)
+    for _ in range(50):
+        streaming = StreamingSecretsFilter(secrets)
+        out = ""
+        i = 0
+        while i < len(text):
+            step = rnd.randint(1, 6)
+            out += streaming.process_chunk(text[i : i + step])
+            i += step
+        out += streaming.finalize()
+        assert out == expected
+
+
+def test_streaming_filter_masks_unresolved_partial() -> None:
+    pytest.importorskip("dotenv")
+    from python.helpers.secrets import StreamingSecretsFilter
+
+    streaming = StreamingSecretsFilter({"API_KEY": "sk-abc123"})
+    out = streaming.process_chunk("value: sk-ab")
+    assert "sk-" not in out
+    assert out + streaming.finalize() == "value: ***"
+
+
+def test_streaming_filter_output_is_masked_prefix() -> None:
+    pytest.importorskip("dotenv")
+    from python.helpers.secrets import StreamingSecretsFilter
+
+    streaming = StreamingSecretsFilter({"API_KEY": "sk-abc123"})
+    text = "key sk-abc123 and again sk-abc123 done"
+    snapshots = []
+    for i in range(0, len(text), 4):
+        streaming.process_chunk(text[i : i + 4])
+        snapshots.append(streaming.output)
+    streaming.finalize()
+
+    final = "key §§secret(API_KEY) and again §§secret(API_KEY) done"
+    assert streaming.output == final
+    # the streamed full text only grows and never shows a secret prefix
+    assert all(final.startswith(snapshot) for snapshot in snapshots)
+    assert not any("sk-" in snapshot for snapshot in snapshots)
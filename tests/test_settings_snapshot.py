@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    from python.helpers import dotenv, settings
+
+    env_file = tmp_path / ".env"
+    env_file.write_text("AUTH_LOGIN=admin\n")
+    monkeypatch.setenv("AUTH_LOGIN", "admin")
+    monkeypatch.setattr(dotenv, "get_dotenv_file_path", lambda: str(env_file))
+    monkeypatch.setattr(settings, "SETTINGS_FILE", str(tmp_path / "settings.json"))
+    monkeypatch.setattr(settings, "DEFAULT_SECRETS_FILE", str(tmp_path / "secrets.env"))
+    monkeypatch.setattr(settings, "_settings", None)
+    monkeypatch.setattr(settings, "_snapshot", None)
+    return settings
+
+
+def _touch(path: Path, content: str) -> None:
+    # same second writes on coarse filesystems still change size or mtime_ns
+    path.write_text(content)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_snapshot_is_reused_and_copied(settings) -> None:
+    first = settings.get_settings()
+    version = settings.get_settings_version()
+
+    first["agent_profile"] = "changed"
+    first["api_keys"]["openai"] = settings.API_KEY_PLACEHOLDER
+    second = settings.get_settings()
+    assert second["agent_profile"] != "changed"
+    assert second["api_keys"].get("openai") != settings.API_KEY_PLACEHOLDER
+    assert settings.get_settings_version() == version
+
+
+def test_file_changes_rebuild_snapshot(settings, tmp_path) -> None:
+    assert settings.get_settings()["auth_login"] == "admin"
+    version = settings.get_settings_version()
+
+    _touch(tmp_path / ".env", "AUTH_LOGIN=operator\n")
+    assert settings.get_settings_version() > version
+    assert settings.get_settings()["auth_login"] == "operator"
+    version = settings.get_settings_version()
+
+    _touch(tmp_path / "settings.json", json.dumps({"agent_profile": "hacker"}))
+    assert settings.get_settings()["agent_profile"] == "hacker"
+    assert settings.get_settings_version() > version
+
+    version = settings.get_settings_version()
+    settings.reload_settings()
+    assert settings.get_settings_version() > version
@@ -60,7 +60,7 @@ async def test_snapshot_builder_active_context_includes_incremental_logs():
         )
         assert first["context"] == ctxid
         assert first["logs"]
-        assert first["log_version"] == len(ctx.log.updates)
+        assert first["log_version"] == ctx.log.version
 
         from python.helpers import state_snapshot as snapshot
 
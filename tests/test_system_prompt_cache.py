@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def test_prompt_is_built_once_per_key(monkeypatch) -> None:
+    from python.helpers import system_prompt_cache
+
+    system_prompt_cache.clear()
+    key = ["v1"]
+    builds: list[int] = []
+    monkeypatch.setattr(system_prompt_cache, "get_key", lambda agent: (key[0],))
+
+    def build():
+        builds.append(1)
+        return ["main", f"tools {len(builds)}"]
+
+    first = system_prompt_cache.get_prompt(None, build)  # type: ignore[arg-type]
+    second = system_prompt_cache.get_prompt(None, build)  # type: ignore[arg-type]
+    assert first is second
+    assert first.parts == ("main", "tools 1")
+    assert len(builds) == 1
+
+    key[0] = "v2"
+    third = system_prompt_cache.get_prompt(None, build)  # type: ignore[arg-type]
+    assert third.parts == ("main", "tools 2")
+    assert third.hash != first.hash
+
+
+def test_folders_stamp_tracks_nested_changes(tmp_path) -> None:
+    from python.helpers.system_prompt_cache import folders_stamp
+
+    skill = tmp_path / "skills" / "demo"
+    skill.mkdir(parents=True)
+    skill_file = skill / "SKILL.md"
+    skill_file.write_text("one")
+
+    before = folders_stamp([str(tmp_path / "skills")], depth=-1)
+    shallow = folders_stamp([str(tmp_path / "skills")])
+    stat = skill_file.stat()
+    os.utime(skill_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert folders_stamp([str(tmp_path / "skills")], depth=-1) != before
+    assert folders_stamp([str(tmp_path / "skills")]) == shallow
+    assert folders_stamp([str(tmp_path / "missing")]) == (0, 0.0)
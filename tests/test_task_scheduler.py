@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    from python.helpers import task_scheduler
+
+    monkeypatch.setattr(task_scheduler, "SCHEDULER_FOLDER", str(tmp_path))
+    return task_scheduler
+
+
+def _load(scheduler):
+    # a new instance as SchedulerTaskList.get() creates it
+    tasks = scheduler.SchedulerTaskList(tasks=[])
+    tasks._reload_if_changed()
+    if tasks._stamp == (None, None):
+        tasks._write_snapshot()
+    return tasks
+
+
+def _scheduled(scheduler, name: str, minute: str = "*", second: str = "0", context_id=None):
+    schedule = scheduler.TaskSchedule(
+        minute=minute, hour="*", day="*", month="*", weekday="*", timezone="UTC", second=second
+    )
+    return scheduler.ScheduledTask.create(
+        name=name, system_prompt="", prompt="scan", schedule=schedule,
+        context_id=context_id, timezone="UTC",
+    )
+
+
+def test_changes_are_journaled_and_replayed(scheduler, tmp_path, monkeypatch) -> None:
+    tasks = _load(scheduler)
+    first = _scheduled(scheduler, "nightly", context_id="ctx")
+    second = _scheduled(scheduler, "hourly", context_id="ctx")
+    asyncio.run(tasks.add_task(first))
+    asyncio.run(tasks.add_task(second))
+    snapshot = (tmp_path / scheduler.TASKS_FILE).read_text()
+
+    asyncio.run(tasks.update_task_by_uuid(first.uuid, lambda t: t.update(prompt="rescan")))
+    asyncio.run(tasks.remove_task_by_uuid(second.uuid))
+
+    assert (tmp_path / scheduler.TASKS_FILE).read_text() == snapshot
+    assert len((tmp_path / scheduler.JOURNAL_FILE).read_text().splitlines()) == 4
+    assert [t.uuid for t in tasks.get_tasks_by_context_id("ctx")] == [first.uuid]
+
+    restored = _load(scheduler)
+    assert [(t.uuid, t.prompt) for t in restored.get_tasks()] == [(first.uuid, "rescan")]
+
+    # compaction rewrites tasks.json atomically and clears the journal
+    monkeypatch.setattr(scheduler, "JOURNAL_MAX_ENTRIES", 4)
+    asyncio.run(tasks.update_task_by_uuid(first.uuid, lambda t: t.update(prompt="final")))
+    assert (tmp_path / scheduler.JOURNAL_FILE).read_text() == ""
+    assert [t.prompt for t in _load(scheduler).get_tasks()] == ["final"]
+
+
+def test_external_changes_are_picked_up(scheduler) -> None:
+    tasks = _load(scheduler)
+    other_instance = _load(scheduler)
+    task = _scheduled(scheduler, "nightly")
+    asyncio.run(other_instance.add_task(task))
+
+    assert tasks.get_task_by_uuid(task.uuid) is None
+    asyncio.run(tasks.reload())
+    assert tasks.get_task_by_uuid(task.uuid) is not None
+
+
+def test_due_tasks_fire_once_per_schedule(scheduler) -> None:
+    tasks = _load(scheduler)
+    task = _scheduled(scheduler, "every minute")
+    idle = _scheduled(scheduler, "running")
+    idle.state = scheduler.TaskState.RUNNING
+    tasks._checked_until = datetime.now(timezone.utc) - timedelta(seconds=61)
+    asyncio.run(tasks.add_task(task))
+    asyncio.run(tasks.add_task(idle))
+
+    assert asyncio.run(tasks.get_due_tasks()) == [task]
+    assert asyncio.run(tasks.get_due_tasks()) == []
+    delay = tasks.seconds_until_due()
+    assert delay is not None and 0 < delay <= 60
+
+
+def test_sub_minute_schedule(scheduler) -> None:
+    tasks = _load(scheduler)
+    task = _scheduled(scheduler, "lab rescan", second="*/5")
+    assert task.schedule.to_crontab() == "*/5 * * * * * *"
+    asyncio.run(tasks.add_task(task))
+
+    delay = tasks.seconds_until_due()
+    assert delay is not None and delay <= 5
+    next_run = task.get_next_run()
+    assert next_run is not None and next_run.second % 5 == 0
+
+
+def test_wait_wakes_up_on_change(scheduler) -> None:
+    tasks = _load(scheduler)
+
+    def add_later():
+        time.sleep(0.1)
+        asyncio.run(tasks.add_task(_scheduled(scheduler, "new")))
+
+    thread = threading.Thread(target=add_later)
+    start = time.perf_counter()
+    thread.start()
+    asyncio.run(tasks.wait_for_change(10))
+    thread.join()
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def terminal_output(tmp_path, monkeypatch):
+    from python.helpers import terminal_output
+
+    monkeypatch.setattr(terminal_output, "SPILL_FOLDER", str(tmp_path))
+    return terminal_output
+
+
+RAW_OUTPUT = (
+    "\r\r\n> > Starting Nmap 7.94 ( https://nmap.org )\r\n"
+    "\x1b[1mNmap scan report for 10.0.0.5\x1b[0m\r\n"
+    "PORT   STATE SERVICE\r\n22/tcp open  ssh\x00\r\n"
+    "Stats: 0:00:01 elapsed\rStats: 0:00:02 elapsed\rStats: 0:00:03 done   \r\n"
+    "   \r\n\r\n"
+    "Progress: 10%\rProgress: 55%\rProgress: 100%"
+)
+# escapes around the leading prompts may be split across chunks
+PROMPT_OUTPUT = "\x1b[0m\x1b[01;32m> \x1b[0m> \x1b[?2004hls -la\r\ntotal 8\r\n\x1b[01;34mdir\x1b[0m\r\n"
+
+
+def _chunks(text: str, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    chunks, start = [], 0
+    while start < len(text):
+        end = start + rng.randint(1, 12)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def test_incremental_cleaning_matches_clean_string(terminal_output) -> None:
+    from python.helpers.shell_ssh import clean_string
+
+    for seed in range(100):
+        output = terminal_output.TerminalOutput()
+        received = ""
+        for chunk in _chunks(RAW_OUTPUT if seed % 2 else PROMPT_OUTPUT, seed):
+            output.append(chunk)
+            received += chunk
+            expected = clean_string(received)
+            assert output.text() == expected
+            assert output.tail(3) == expected.splitlines()[-3:]
+            assert output.tail_text(20) == expected[-20:]
+
+
+def test_long_output_keeps_head_and_tail_and_spills(terminal_output, monkeypatch) -> None:
+    monkeypatch.setattr(terminal_output, "HEAD_CHARS", 100)
+    monkeypatch.setattr(terminal_output, "TAIL_CHARS", 200)
+    output = terminal_output.TerminalOutput()
+    lines = [f"line {i:04d}" for i in range(1000)]
+    for i in range(0, len(lines), 7):
+        output.append("\r\n".join(lines[i : i + 7]) + "\r\n")
+
+    text = output.text()
+    assert len(text) < 500
+    assert text.startswith("line 0000\n")
+    assert text.endswith("line 0999\n")
+    assert f"{output.dropped_lines} lines omitted" in text
+    assert output.tail(2) == ["line 0998", "line 0999"]
+    for chars in (5, 150, 10_000):
+        assert output.tail_text(chars) == text[-chars:]
+    assert Path(output.spill_path).read_text().splitlines() == lines
+
+    # the agent may still read the spill file of the last command
+    spilled = output.spill_path
+    output.reset()
+    assert output.text() == "" and output.spill_path != spilled
+    assert not Path(output.spill_path).exists()
+    assert Path(spilled).read_text().splitlines() == lines
+    output.close()
+    assert not Path(spilled).exists()
+
+
+def test_spill_files_of_earlier_commands_are_pruned(terminal_output, monkeypatch) -> None:
+    monkeypatch.setattr(terminal_output, "KEPT_SPILL_FILES", 2)
+    output = terminal_output.TerminalOutput(spool=True)
+    paths = []
+    for i in range(4):
+        output.append(f"command {i}\n")
+        paths.append(output.spill_path)
+        output.reset()
+    assert [Path(p).exists() for p in paths] == [False, False, True, True]
+    output.close()
+    assert not any(Path(p).exists() for p in paths)
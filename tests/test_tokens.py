@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    from python.helpers import tokens
+
+    calls: list[str] = []
+
+    def fake_count(text: str, encoding_name="cl100k_base") -> int:
+        # one token per word, the real encoder needs a download
+        calls.append(text)
+        return len(text.split())
+
+    monkeypatch.setattr(tokens, "count_tokens", fake_count)
+    monkeypatch.setattr(tokens, "_count_cache", type(tokens._count_cache)())
+    tokens.calls = calls
+    yield tokens
+    del tokens.calls
+
+
+def test_count_tokens_cached_hits_and_misses(tokens) -> None:
+    assert tokens.count_tokens_cached("scan the target") == 3
+    assert tokens.count_tokens_cached("scan the target") == 3
+    assert tokens.calls == ["scan the target"]
+    assert tokens.count_tokens_cached("scan the other target") == 4
+    assert len(tokens.calls) == 2
+    # encodings are cached separately
+    tokens.count_tokens_cached("scan the target", encoding_name="o200k_base")
+    assert len(tokens.calls) == 3
+    assert tokens.count_tokens_cached("") == 0
+    assert len(tokens.calls) == 3
+
+
+def test_count_tokens_cached_evicts_least_recently_used(tokens, monkeypatch) -> None:
+    monkeypatch.setattr(tokens, "COUNT_CACHE_SIZE", 2)
+    tokens.count_tokens_cached("a")
+    tokens.count_tokens_cached("b")
+    tokens.count_tokens_cached("a")  # a is now the most recent
+    tokens.count_tokens_cached("c")  # evicts b
+    assert len(tokens._count_cache) == 2
+    tokens.calls.clear()
+    tokens.count_tokens_cached("a")
+    tokens.count_tokens_cached("c")
+    assert tokens.calls == []
+    tokens.count_tokens_cached("b")
+    assert tokens.calls == ["b"]
+
+
+def test_estimate_tokens_rounds_up_per_four_characters(tokens) -> None:
+    assert tokens.estimate_tokens("") == 0
+    assert tokens.estimate_tokens("abc") == 1
+    assert tokens.estimate_tokens("abcd") == 1
+    assert tokens.estimate_tokens("abcde") == 2
+    assert tokens.calls == []
+
+
+def test_approximate_tokens_is_exact_for_short_texts(tokens) -> None:
+    assert tokens.approximate_tokens("a b c d e f g h i j") == int(10 * tokens.APPROX_BUFFER)
+    assert tokens.calls == ["a b c d e f g h i j"]
+    # only the cached history count estimates short texts
+    assert tokens.approximate_tokens_cached("a b c d e f g h i j") == tokens.estimate_tokens("a b c d e f g h i j")
+    assert len(tokens.calls) == 1
+
+
+def test_stream_counter_corrects_estimates_at_finalize(tokens) -> None:
+    counter = tokens.StreamTokenCounter()
+    assert counter.add("one two ") == 2
+    assert counter.add("three") == 2
+    assert counter.add("") == 0
+    assert tokens.calls == []
+    # exact is int(3 * 1.1) = 3, the 4 estimated tokens were one too many
+    assert counter.finalize() == -1
+    assert tokens.calls == ["one two three"]
+    assert counter.estimated == 3
+    assert counter.finalize() == 0
+
+
+def test_stream_counter_correction_is_positive_for_dense_text(tokens) -> None:
+    counter = tokens.StreamTokenCounter()
+    counter.add("a b c d e f g h")
+    assert counter.finalize() == int(8 * tokens.APPROX_BUFFER) - 4
+
+
+def test_limiter_totals_take_the_negative_correction(tokens) -> None:
+    from python.helpers.rate_limiter import RateLimiter
+
+    for mode in ("window", "token_bucket"):
+        limiter = RateLimiter(seconds=60, mode=mode, output=100)
+        counter = tokens.StreamTokenCounter()
+        limiter.add(output=counter.add("one two "))
+        limiter.add(output=counter.add("three"))
+        limiter.add(output=counter.finalize())
+        assert asyncio.run(limiter.get_total("output")) == 3
+
+    # a bucket never drops below empty
+    limiter = RateLimiter(seconds=60, mode="token_bucket", output=100)
+    limiter.add(output=-5)
+    assert asyncio.run(limiter.get_total("output")) == 0
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import sys
+import types
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+TOOL_SOURCE = """
+from python.helpers.tool import Tool, Response
+
+class Probe(Tool):
+    VERSION = {version}
+
+    async def execute(self, **kwargs):
+        return Response(message="ok", break_loop=False)
+"""
+
+
+def _setup(tmp_path, monkeypatch, version: int = 1):
+    from python.helpers import tool_registry
+
+    tool_file = tmp_path / "probe.py"
+    tool_file.write_text(TOOL_SOURCE.format(version=version))
+    resolved: list[int] = []
+
+    def get_paths(agent, *subpaths, **kwargs):
+        resolved.append(1)
+        return [str(tmp_path / subpaths[-1])] if (tmp_path / subpaths[-1]).exists() else []
+
+    monkeypatch.setattr(tool_registry.subagents, "get_paths", get_paths)
+    monkeypatch.setattr(tool_registry, "_key", lambda agent, name: ("", "", name))
+    tool_registry.reload()
+    agent = types.SimpleNamespace()
+    return tool_registry, tool_file, agent, resolved
+
+
+def test_tool_module_is_loaded_once(tmp_path, monkeypatch) -> None:
+    tool_registry, _, agent, resolved = _setup(tmp_path, monkeypatch)
+
+    before = tool_registry.get_stats().get("probe", {"loads": 0, "hits": 0})
+    first = tool_registry.get_tool_class(agent, "probe")
+    second = tool_registry.get_tool_class(agent, "probe")
+
+    assert first is not None and first is second
+    assert len(resolved) == 1
+    stats = tool_registry.get_stats()["probe"]
+    assert stats["loads"] == before["loads"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_changed_file_is_reloaded(tmp_path, monkeypatch) -> None:
+    tool_registry, tool_file, agent, _ = _setup(tmp_path, monkeypatch)
+
+    first = tool_registry.get_tool_class(agent, "probe")
+    tool_file.write_text(TOOL_SOURCE.format(version=2))
+    stat = tool_file.stat()
+    os.utime(tool_file, (stat.st_atime, stat.st_mtime + 10))
+
+    second = tool_registry.get_tool_class(agent, "probe")
+    assert first.VERSION == 1  # type: ignore[union-attr]
+    assert second.VERSION == 2  # type: ignore[union-attr]
+
+
+def test_explicit_reload_and_unknown_tools(tmp_path, monkeypatch) -> None:
+    tool_registry, _, agent, resolved = _setup(tmp_path, monkeypatch)
+
+    assert tool_registry.get_tool_class(agent, "missing") is None
+    assert tool_registry.get_tool_class(agent, "missing") is None
+    # unresolved names are looked up again every time
+    assert len(resolved) == 2
+
+    first = tool_registry.get_tool_class(agent, "probe")
+    loads = tool_registry.get_stats()["probe"]["loads"]
+    tool_registry.reload("probe")
+    second = tool_registry.get_tool_class(agent, "probe")
+    assert first is not second
+    assert tool_registry.get_stats()["probe"]["loads"] == loads + 1
@@ -162,6 +162,8 @@ function normalizeSchedule(schedule) {
     month: schedule.month || "*",
     weekday: schedule.weekday || "*",
     timezone: schedule.timezone || getUserTimezone(),
+    // sub-minute schedules, no editor field yet but kept on save
+    second: schedule.second || "0",
   };
 }
 
@@ -891,7 +893,11 @@ const schedulerStoreModel = {
   formatSchedule(task) {
     if (!task.schedule) return "None";
     if (typeof task.schedule === "string") return task.schedule;
-    return `${task.schedule.minute || "*"} ${task.schedule.hour || "*"} ${
+    const second =
+      task.schedule.second && task.schedule.second !== "0"
+        ? `${task.schedule.second}s `
+        : "";
+    return `${second}${task.schedule.minute || "*"} ${task.schedule.hour || "*"} ${
       task.schedule.day || "*"
     } ${task.schedule.month || "*"} ${task.schedule.weekday || "*"}`;
   },